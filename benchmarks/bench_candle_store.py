@@ -0,0 +1,58 @@
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from utils.candle_store import CandleArray
+from bench_candle_pyramid import make_bars, to_base
+
+
+def dataframe_ticks(data, ticks):
+    # What PriceManager.merge_bars used to do for every revision of the live bar
+    for i in range(ticks):
+        bar = data.iloc[-1:]
+        head = data[data.index < bar.index[0]]
+        data = pd.concat([head, bar])
+    return data
+
+
+def array_ticks(candles, bar, ticks):
+    for i in range(ticks):
+        candles.merge(bar)
+    return candles
+
+
+def bench_candle_store(n_bars=500_000, ticks=2000):
+    data = make_bars(n_bars)
+    frame_bytes = int(data.memory_usage(index=True).sum())
+    print(f"{n_bars:,} bars of 30m data")
+    print(f"DataFrame:          {frame_bytes / n_bars:5.1f} bytes a candle")
+    for dtype in ['float64', 'float32']:
+        candles = CandleArray(dtype)
+        candles.load(to_base(data))
+        per_candle = 8 + 5 * candles.dtype.itemsize
+        print(f"CandleArray {dtype}: {per_candle:5.1f} bytes a candle"
+              f" ({candles.nbytes / n_bars:.1f} with spare capacity)")
+
+    start = time.perf_counter()
+    dataframe_ticks(data, ticks)
+    frame_time = (time.perf_counter() - start) / ticks
+
+    candles = CandleArray()
+    candles.load(to_base(data))
+    bar = {field: values[-1:].copy() for field, values in to_base(data).items()}
+    start = time.perf_counter()
+    array_ticks(candles, bar, ticks)
+    array_time = (time.perf_counter() - start) / ticks
+
+    assert np.array_equal(candles.arrays()['close'], data['Close'].to_numpy())
+    print(f"live bar revision, DataFrame concat: {frame_time * 1e6:9.1f} us")
+    print(f"live bar revision, in place:         {array_time * 1e6:9.1f} us")
+
+
+if __name__ == "__main__":
+    bench_candle_store()
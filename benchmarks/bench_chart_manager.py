@@ -0,0 +1,68 @@
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import utils.chart_manager as chart_manager
+from bench_candle_pyramid import make_bars
+
+
+class OffscreenCanvas(FigureCanvasAgg):
+    """Agg canvas standing in for the Tk one; blit() has no screen to copy to"""
+
+    def __init__(self, figure, master=None):
+        super().__init__(figure)
+
+    def blit(self, bbox=None):
+        pass
+
+
+def median_ms(func, repeat=50):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return np.median(times) * 1000
+
+
+def bench_chart(chart, data, timeframe, label):
+    chart.reset()
+    chart.update_chart(data, timeframe, revision=0)
+    revision = [0]
+
+    def live_tick():
+        # The live candle moves, well inside the drawn range
+        data.iloc[-1, data.columns.get_loc('Close')] = data['Close'].iloc[-2] * (1 + np.random.uniform(-1e-4, 1e-4))
+        chart.update_chart(data, timeframe, revision=0)
+
+    def full_refresh():
+        # A closed candle changed: new vertex arrays and a full draw
+        revision[0] += 1
+        chart.update_chart(data, timeframe, revision=revision[0])
+
+    live = median_ms(live_tick)
+    full = median_ms(full_refresh, repeat=10)
+    print(f"{label:32s} live candle {live:6.2f} ms   full redraw {full:7.2f} ms")
+
+
+def bench_chart_manager():
+    chart_manager.FigureCanvasTkAgg = OffscreenCanvas
+    chart = chart_manager.ChartManager(None)
+
+    bars = make_bars(20_000)
+    daily = bars.resample('1D').agg({
+        'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'
+    }).dropna()
+    bench_chart(chart, daily.copy(), '1d', f"1d, {chart.timeframe_candle_count['1d']} candles")
+
+    chart.timeframe_candle_count['30m'] = 5000
+    bench_chart(chart, bars.copy(), '30m', "30m, 5,000 candles")
+
+
+if __name__ == "__main__":
+    bench_chart_manager()
@@ -0,0 +1,52 @@
+import sys
+import os
+import asyncio
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils.engine import GameEngine
+from utils.market_data import SimulatedDataSource
+from utils.watchlist import Watchlist
+
+
+def trader(session):
+    # Flips between all in and all out, with a resting order half the time
+    ledger = session.ledger
+    if ledger.spot_quantity:
+        session.sell(ledger.spot_quantity)
+    elif not session.orders.orders and session.id % 2:
+        session.place_order('buy', 'limit', session.price() * 0.999, ledger.cash / session.price())
+    else:
+        session.buy(ledger.cash / session.price() / 2)
+
+
+def bench_engine(n_sessions=1000, ticks=60):
+    now = [pd.Timestamp('2024-03-01 12:00', tz='UTC')]
+    source = SimulatedDataSource(seed=1, clock=lambda: now[0])
+    with tempfile.TemporaryDirectory() as data_dir:
+        engine = GameEngine(Watchlist(source=source, data_dir=data_dir), poll_interval=0)
+        for _ in range(n_sessions):
+            engine.open_session(bot=trader)
+
+        async def play():
+            engine.dispatch(await asyncio.get_running_loop().run_in_executor(None, engine.poll))
+            started = time.perf_counter()
+            for _ in range(ticks):
+                now[0] += pd.Timedelta(minutes=1)  # One new 1m bar per tick
+                await engine.tick()
+            return time.perf_counter() - started
+
+        elapsed = asyncio.run(play())
+        engine.shutdown()
+
+    print(f"{n_sessions:,} bot sessions on one shared feed, {ticks} ticks")
+    print(f"per tick (one poll + every session): {elapsed / ticks * 1000:7.1f} ms")
+    print(f"per session per tick:                {elapsed / ticks / n_sessions * 1e6:7.1f} us")
+
+
+if __name__ == "__main__":
+    bench_engine()
@@ -1,8 +1,11 @@
 import tkinter as tk
 from screens.start_screen import StartScreen
 from screens.save_screen import SaveScreen
-from screens.game_screen import GameScreen
 from utils.constants import *
+from utils.warmup import Warmup
+
+# The chart and data stack, imported in the background while the menus are up
+GAME_MODULES = ['pandas', 'matplotlib.backends.backend_tkagg', 'screens.game_screen']
 
 
 class TradingGame:
@@ -11,16 +14,32 @@ class TradingGame:
         self.root.title(GAME_TITLE)
         self.root.geometry(f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}")
         self.root.resizable(False, False)
+        # Closing the window must not drop the autosave's pending writes
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
         # Initialize screens - pass self as game_instance
         self.start_screen = StartScreen(self.root, self)
         self.save_screen = SaveScreen(self.root, self)
-        self.game_screen = GameScreen(self.root, self)
+        self.game_screen = None  # Built when the game starts
 
         # Show start screen
         self.start_screen.setup()
         self.start_screen.show()
 
+        # Warm up once the start screen has painted
+        self.warmup = Warmup(GAME_MODULES, self._create_engine, self._preload_history)
+        self.root.after(100, self.warmup.start)
+
+    @staticmethod
+    def _create_engine():
+        from utils.engine import GameEngine
+        return GameEngine()
+
+    @staticmethod
+    def _preload_history(engine):
+        # Maps the stored bars and tops them up if stale; GameScreen joins this if it's still running
+        engine.watchlist.load(['BTC-USD'])
+
     def show_save_screen(self):
         self.start_screen.hide()
         self.save_screen.setup()
@@ -32,9 +51,17 @@ class TradingGame:
 
     def start_game(self, save_data):
         self.save_screen.hide()
+        if self.game_screen is None:
+            from screens.game_screen import GameScreen
+            self.game_screen = GameScreen(self.root, self, engine=self.warmup.get())
         self.game_screen.setup(save_data)
         self.game_screen.show()
 
+    def close(self):
+        if self.game_screen is not None:
+            self.game_screen.shutdown()
+        self.root.destroy()
+
     def run(self):
         self.root.mainloop()
 
@@ -1,15 +1,31 @@
 # screens/game_screen.py
+import random
+import time
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, simpledialog
+import pandas as pd
 from utils.constants import *
 from utils.constants import *
 from utils.save_manager import SaveManager
 from utils.chart_manager import ChartManager
 from utils.price_manager import PriceManager
+from utils.engine import GameEngine
+from utils.data_loader import DataLoader
+from utils.frame_scheduler import FrameScheduler
+from utils.market_data import ReplayDataSource
+from utils.indicators import PRICE_OVERLAYS, OSCILLATORS
+from utils.portfolio import Ledger
+from utils.autosave import Autosaver
+from utils.event_journal import EventJournal
+
+# Simulated seconds per real second for each replay button, None = as fast as possible
+REPLAY_SPEEDS = {'1x': 1.0, '10x': 10.0, '100x': 100.0, 'Max': None}
+REPLAY_MIN_HISTORY = 48 * 7  # Bars of history to show before the replay start (a week of 30m)
+REPLAY_MIN_RUNWAY = 48 * 7  # Bars that must be left to play
 
 
 class GameScreen:
-    def __init__(self, root, game_instance):
+    def __init__(self, root, game_instance, engine=None):
         self.root = root
         self.game_instance = game_instance
         self.frame = tk.Frame(
@@ -19,12 +35,77 @@ class GameScreen:
             height=WINDOW_HEIGHT
         )
         self.player_data = None  # Will be set when loading a save
-        self.price_manager = PriceManager()
+
+        # The game itself runs in the engine, this screen is one client of it
+        self.engine = engine or GameEngine()
+        self.watchlist = self.engine.watchlist
+        self.live_price_manager = self.engine.price_manager('BTC-USD')  # The traded symbol
+        self.chart_symbol = self.live_price_manager.symbol
+        self.session = None
+        self.data_loader = DataLoader(root)
         self.current_timeframe = '1h'  # Default timeframe
+        self.autosaver = None
+        self.chart_manager = None  # Built with the widgets on the first setup
+        self._saved_after_id = None
+
+        # Everything on this screen is driven from one frame-paced loop. Data
+        # updates mark the views they change, each frame redraws just those.
+        self.scheduler = FrameScheduler(root)
+        self.scheduler.add_view('chart', self._update_chart)
+        self.scheduler.add_view('candle', self._update_chart, part_of='chart')  # Blits if it can
+        self.scheduler.add_view('price', self._update_price_label)
+        self.scheduler.add_view('account', self._update_account_label)
+        self.scheduler.add_view('orders', self._update_orders_label)
+        self.scheduler.add_view('replay', self._update_replay_label)
+        self._account_value = None
+
+    @property
+    def price_manager(self):
+        # The market being traded, replayed or live
+        return self.session.price_manager if self.session is not None else self.live_price_manager
 
     def setup(self, save_data):
         self.player_data = save_data
 
+        # Latest snapshot plus the events logged after it
+        slot = self.player_data['slot']
+        snapshot, events = SaveManager.load_state(slot)
+        self.ledger = Ledger.from_dict(snapshot or self.player_data['data'],
+                                       on_equity_change=self.update_account_value,
+                                       on_liquidation=self._on_liquidation,
+                                       on_event=self._log_event)
+        self.ledger.replay(events)
+        self.session = self.engine.open_session(self.ledger, on_event=self._log_event,
+                                                on_update=self._on_market_update)
+
+        # Events are saved in the background a moment after they happen
+        self.journal = EventJournal(slot, pending=len(events))
+        self.autosaver = Autosaver(self.root, self._read_save_data, self._write_save_data)
+
+        # The widgets and the chart's figure are built once and reused by every game
+        if self.chart_manager is None:
+            self._create_widgets()
+        self.name_label.config(text=f"Player: {self.player_data['name']}")
+        self._account_value = self.ledger.equity
+        self.price_label.config(text="Loading...")
+        self.arrow_label.config(text="")
+        self.symbol_var.set(self.chart_symbol)
+        self._sync_chart_source()
+        self.loading_label.config(text="Loading market data...")
+        self.loading_label.place(relx=0.5, rely=0.5, anchor="center")
+
+        self.scheduler.mark_dirty('account', 'orders', 'replay')
+
+        # Do initial price update, later polls are timed by when the next bar is due
+        self.scheduler.add_task('price', self._update_price_display,
+                                self.price_manager.update_interval, run_now=True)
+
+        # Joins the warm-up's load if it's still running
+        symbol = self.live_price_manager.symbol
+        self.data_loader.submit('history', lambda: self.watchlist.load([symbol]).get(symbol, False),
+                                self._on_history_loaded)
+
+    def _create_widgets(self):
         # Player info panel (top left)
         info_frame = tk.Frame(
             self.frame,
@@ -35,34 +116,34 @@ class GameScreen:
         info_frame.place(x=10, y=10)
 
         # Player name
-        name_label = tk.Label(
+        self.name_label = tk.Label(
             info_frame,
-            text=f"Player: {self.player_data['name']}",
+            text="Player:",
             font=("Helvetica", 12),
             bg=BACKGROUND_COLOR,
             fg=TEXT_COLOR
         )
-        name_label.pack(anchor="w")
+        self.name_label.pack(anchor="w")
 
         # Account value
         self.account_label = tk.Label(
             info_frame,
-            text=f"Account: ${self.player_data['data']['money']:.2f}",
+            text="Account:",
             font=("Helvetica", 12),
             bg=BACKGROUND_COLOR,
             fg=TEXT_COLOR
         )
         self.account_label.pack(anchor="w")
 
-        # Create chart frame
-        chart_frame = tk.Frame(
-            self.frame,
-            bg="white",
-            width=WINDOW_WIDTH - CONTROL_PANEL_WIDTH - 40,
-            height=WINDOW_HEIGHT - 150
+        # Resting orders
+        self.orders_label = tk.Label(
+            info_frame,
+            text="Open orders: 0",
+            font=("Helvetica", 10),
+            bg=BACKGROUND_COLOR,
+            fg=TEXT_COLOR
         )
-        chart_frame.place(x=20, y=100)
-        chart_frame.pack_propagate(False)
+        self.orders_label.pack(anchor="w")
 
         # Add the control buttons
         self._create_trading_controls()
@@ -89,8 +170,19 @@ class GameScreen:
             )
             btn.pack(side=tk.LEFT, padx=5)
 
+        # Symbol shown on the chart, trading stays on the traded symbol
+        self.symbol_var = tk.StringVar(value=self.chart_symbol)
+        tk.OptionMenu(
+            timeframe_frame,
+            self.symbol_var,
+            *self.watchlist.symbols,
+            command=self._change_symbol
+        ).pack(side=tk.LEFT, padx=5)
+        self._create_indicator_menu(timeframe_frame)
+
         # Add price display before chart
         self._create_price_display()
+        self._create_replay_controls()
 
         # Create chart frame with adjusted width for control panel
         chart_frame = tk.Frame(
@@ -102,41 +194,241 @@ class GameScreen:
         chart_frame.place(x=20, y=100)
         chart_frame.pack_propagate(False)
 
-        # Create trading controls
-        self._create_trading_controls()
-
-        # Initialize price data and chart
-        self.price_manager.fetch_historical_data()
+        # Initialize chart, the price history is downloaded in the background
         self.chart_manager = ChartManager(chart_frame)
-        self._update_chart()
         self.chart_manager.pack()
 
-        # Start periodic updates
-        self._schedule_price_update()
+        self.loading_label = tk.Label(
+            chart_frame,
+            text="Loading market data...",
+            font=("Helvetica", 14),
+            bg="white",
+            fg="black"
+        )
+
+    def _on_history_loaded(self, success):
+        if not success:
+            self.loading_label.config(text="Could not load market data")
+            return
+
+        # The other symbols are loaded when picked, see _change_symbol
+        self.loading_label.place_forget()
+        self.scheduler.mark_dirty('chart', 'price')
 
     def show(self):
         self.frame.pack(fill="both", expand=True)
 
     def hide(self):
-        if hasattr(self, 'chart_manager'):
-            self.chart_manager.destroy()
+        # Nothing of this game may keep running: timers, fetch callbacks, the session
+        if self.session is not None:
+            # Stops a replay and cancels the resting orders, logged before the save closes
+            self.engine.close_session(self.session)
+            self.session = None
+        self.scheduler.stop()  # After the session, which may still mark views
+        self.data_loader.cancel()
+        self.watchlist.save_all()  # Live bars are only written every few minutes
+        if self._saved_after_id is not None:
+            self.root.after_cancel(self._saved_after_id)
+            self._saved_after_id = None
+        self._close_save()
+        if self.chart_manager is not None:
+            self.chart_manager.reset()
         self.frame.pack_forget()
 
     def _change_timeframe(self, timeframe):
         self.current_timeframe = timeframe
-        self._update_chart()
+        self.scheduler.mark_dirty('chart')
+
+    def _chart_price_manager(self):
+        if self.chart_symbol == self.price_manager.symbol:
+            return self.price_manager  # Follows a running replay
+        return self.watchlist.get(self.chart_symbol)
+
+    def _sync_chart_source(self):
+        price_manager = self._chart_price_manager()
+        self.chart_manager.set_symbol(price_manager.display_name)
+        self.chart_manager.set_candle_source(price_manager.get_candles, price_manager.get_indicators,
+                                             price_manager.load_older)
+
+    def _create_indicator_menu(self, parent):
+        button = tk.Menubutton(parent, text="Indicators", relief=tk.RAISED)
+        menu = tk.Menu(button, tearoff=False)
+        button.config(menu=menu)
+
+        self.overlay_vars = {name: tk.BooleanVar(value=False) for name in PRICE_OVERLAYS}
+        for name, var in self.overlay_vars.items():
+            menu.add_checkbutton(label=name, variable=var, command=self._apply_indicators)
+        menu.add_separator()
+        self.oscillator_var = tk.StringVar(value='')
+        menu.add_radiobutton(label="No oscillator", value='', variable=self.oscillator_var,
+                             command=self._apply_indicators)
+        for name in OSCILLATORS:
+            menu.add_radiobutton(label=name, value=name, variable=self.oscillator_var,
+                                 command=self._apply_indicators)
+        button.pack(side=tk.LEFT, padx=5)
+
+    def _apply_indicators(self):
+        overlays = [name for name, var in self.overlay_vars.items() if var.get()]
+        self.chart_manager.set_indicators(overlays, self.oscillator_var.get() or None)
+        self.scheduler.mark_dirty('chart')
+
+    def _change_symbol(self, symbol):
+        if symbol == self.chart_symbol:
+            return
+        if self.chart_symbol != self.live_price_manager.symbol:
+            self.watchlist.unpin(self.chart_symbol)
+        self.chart_symbol = symbol
+        self.symbol_var.set(symbol)
+        self.watchlist.pin(symbol)
+        self._sync_chart_source()
+
+        if not self._chart_price_manager().has_data():
+            self.loading_label.config(text="Loading market data...")
+            self.loading_label.place(relx=0.5, rely=0.5, anchor="center")
+            self.data_loader.submit(f'history:{symbol}',
+                                    lambda: self.watchlist.load([symbol]).get(symbol, False),
+                                    self._on_history_loaded)
+        self.scheduler.mark_dirty('chart')
 
     def _update_chart(self):
-        data = self.price_manager.get_candles(self.current_timeframe)
-        self.chart_manager.update_chart(data, self.current_timeframe)
-
-    def _schedule_price_update(self):
-        # Update prices every minute
-        self._update_chart()
-        self.frame.after(60000, self._schedule_price_update)
+        price_manager = self._chart_price_manager()
+        if not price_manager.has_data():
+            return  # Still loading
+        data = price_manager.get_candles(self.current_timeframe)
+        self.chart_manager.update_chart(data, self.current_timeframe, price_manager.revision)
+
+    def _update_replay_label(self):
+        if not self.session.is_replaying:
+            self.replay_label.config(text="Replay:")
+            return
+        source = self.price_manager.source
+        if source.finished():
+            self.replay_label.config(text="Replay finished")
+        else:
+            speed = next(name for name, value in REPLAY_SPEEDS.items() if value == source.speed)
+            self.replay_label.config(text=f"{source.now():%d %b '%y %H:%M} @ {speed}")
+
+    def _on_market_update(self, session):
+        # The session has matched orders and positions against the new bars,
+        # the account view is marked by the ledger if the value changed
+        self.scheduler.mark_dirty('candle', 'price', 'orders')
+
+    def _place_order(self, side, kind):
+        price = simpledialog.askfloat(f"{side.title()} {kind}", "Price (USD):",
+                                      parent=self.root, minvalue=0.01)
+        if price is None:
+            return
+        quantity = simpledialog.askfloat(f"{side.title()} {kind}", "Quantity (BTC):",
+                                         parent=self.root, minvalue=0.00000001)
+        if quantity is None:
+            return
+
+        try:
+            self.session.place_order(side, kind, price, quantity)
+        except ValueError as e:
+            messagebox.showwarning("Order", str(e))
+            return
+        self.scheduler.mark_dirty('orders')
+
+    def _create_stop_order(self):
+        side = simpledialog.askstring("Stop order", "Side (buy/sell):", parent=self.root)
+        if side is None:
+            return
+        side = side.strip().lower()
+        if side not in ('buy', 'sell'):
+            messagebox.showwarning("Order", "Side must be buy or sell.")
+            return
+        self._place_order(side, 'stop')
+
+    def _current_price(self):
+        price = self.session.price()
+        if price is None:
+            messagebox.showinfo("Trade", "Market data is still loading.")
+        return price
+
+    def _spot_trade(self, side):
+        price = self._current_price()
+        if price is None:
+            return
+        quantity = simpledialog.askfloat(f"Spot {side}", f"Quantity (BTC) at ${price:,.2f}:",
+                                         parent=self.root, minvalue=0.00000001)
+        if quantity is None:
+            return
+
+        try:
+            if side == 'buy':
+                self.session.buy(quantity)
+            else:
+                self.session.sell(quantity)
+        except ValueError as e:
+            messagebox.showwarning("Trade", str(e))
+
+    def _margin_trade(self, leverage=1):
+        price = self._current_price()
+        if price is None:
+            return
+
+        if self.session.ledger.positions:
+            pnl = self.session.ledger.unrealized_pnl(price)
+            if messagebox.askyesno("Margin", f"Close open positions (PnL ${pnl:,.2f})?"):
+                self.session.close_positions()
+            return
+
+        side = simpledialog.askstring(f"Margin {leverage}x", "Side (long/short):", parent=self.root)
+        if side is None:
+            return
+        quantity = simpledialog.askfloat(f"Margin {leverage}x", f"Quantity (BTC) at ${price:,.2f}:",
+                                         parent=self.root, minvalue=0.00000001)
+        if quantity is None:
+            return
+
+        try:
+            self.session.open_position(side.strip().lower(), quantity, leverage)
+        except ValueError as e:
+            messagebox.showwarning("Trade", str(e))
+
+    def _log_event(self, event):
+        self.journal.record(event)
+        self.autosaver.mark_dirty('events')
+
+    def _read_save_data(self, keys):
+        # Runs on the Tk thread when an autosave window closes
+        data = self.player_data['data']
+        snapshot = {key: data[key] for key in keys if key in data}
+        if 'events' in keys or 'snapshot' in keys:
+            snapshot['events'] = self.journal.checkpoint(self.ledger.to_dict,
+                                                         force='snapshot' in keys)
+        return snapshot
+
+    def _write_save_data(self, snapshot):
+        # Runs on the autosave thread
+        if 'events' in snapshot:
+            self.journal.write(snapshot['events'])
+        data = {key: value for key, value in snapshot.items() if key != 'events'}
+        if data:
+            SaveManager.update_save(self.journal.slot, {'name': self.player_data['name'], 'data': data})
+
+    def _close_save(self):
+        if self.autosaver is not None:
+            # Snapshot on the way out so the next load has no events to replay
+            self.autosaver.mark_dirty('snapshot')
+            self.autosaver.shutdown()  # Waits for pending writes
+            self.autosaver = None
+
+    def _on_liquidation(self, position):
+        messagebox.showwarning("Liquidated", f"Your {position.side} position of "
+                               f"{position.quantity} BTC was liquidated.")
+
+    def _update_orders_label(self):
+        self.orders_label.config(text=f"Open orders: {len(self.session.orders.orders)}")
 
     def update_account_value(self, new_value):
-        self.account_label.config(text=f"Account: ${new_value:.2f}")
+        # Called by the ledger only when the displayed equity changes
+        self._account_value = new_value
+        self.scheduler.mark_dirty('account')
+
+    def _update_account_label(self):
+        self.account_label.config(text=f"Account: ${self._account_value:.2f}")
 
     def _create_trading_controls(self):
         # Control panel frame on the right
@@ -167,8 +459,10 @@ class GameScreen:
         )
         spot_frame.pack(fill='x', padx=1, pady=1)
 
-        tk.Button(spot_frame, text="Buy", **button_style).pack(pady=1)
-        tk.Button(spot_frame, text="Sell", **button_style).pack(pady=1)
+        tk.Button(spot_frame, text="Buy", command=lambda: self._spot_trade('buy'),
+                  **button_style).pack(pady=1)
+        tk.Button(spot_frame, text="Sell", command=lambda: self._spot_trade('sell'),
+                  **button_style).pack(pady=1)
 
         # Margin trading section
         margin_frame = tk.LabelFrame(
@@ -181,7 +475,8 @@ class GameScreen:
         )
         margin_frame.pack(fill='x', padx=1, pady=1)
 
-        tk.Button(margin_frame, text="1x", **button_style).pack(pady=1)  # Shortened text
+        tk.Button(margin_frame, text="1x", command=self._margin_trade,
+                  **button_style).pack(pady=1)  # Shortened text
 
         # Limit orders section
         limit_frame = tk.LabelFrame(
@@ -194,8 +489,10 @@ class GameScreen:
         )
         limit_frame.pack(fill='x', padx=1, pady=1)
 
-        tk.Button(limit_frame, text="Buy", **button_style).pack(pady=1)  # Shortened text
-        tk.Button(limit_frame, text="Sell", **button_style).pack(pady=1)  # Shortened text
+        tk.Button(limit_frame, text="Buy", command=lambda: self._place_order('buy', 'limit'),
+                  **button_style).pack(pady=1)  # Shortened text
+        tk.Button(limit_frame, text="Sell", command=lambda: self._place_order('sell', 'limit'),
+                  **button_style).pack(pady=1)  # Shortened text
 
         # Order creator section
         order_frame = tk.LabelFrame(
@@ -208,26 +505,44 @@ class GameScreen:
         )
         order_frame.pack(fill='x', padx=1, pady=1)
 
-        tk.Button(order_frame, text="Order", **button_style).pack(pady=1)  # Shortened text
+        tk.Button(order_frame, text="Order", command=self._create_stop_order,
+                  **button_style).pack(pady=1)  # Shortened text
 
     def _save_game(self):
-        # Get the save slot from player data
-        save_slot = self.player_data.get('slot')
-        if save_slot:
-            SaveManager.update_save(save_slot, self.player_data)
-            # Maybe add a small popup to confirm save
-            tk.messagebox.showinfo("Success", "Game saved successfully!")
+        # Write everything now, still in the background. The ledger goes out as
+        # events and a snapshot; player_data['data'] is only what the save was
+        # loaded with, writing its keys back would store stale balances
+        self.autosaver.mark_dirty('snapshot')
+        self.autosaver.flush()
+        self.save_button.config(text="Saved")
+        if self._saved_after_id is not None:
+            self.root.after_cancel(self._saved_after_id)
+        self._saved_after_id = self.root.after(1500, self._reset_save_button)
+
+    def _reset_save_button(self):
+        self._saved_after_id = None
+        self.save_button.config(text="Save")
 
     def _return_to_menu(self):
-        if tk.messagebox.askyesno("Return to Menu", "Are you sure? Don't forget to save your progress!"):
-            self.hide()
+        if tk.messagebox.askyesno("Return to Menu", "Are you sure?"):
+            self.hide()  # Flushes the autosave
             self.game_instance.show_start_screen()
 
     def _quit_game(self):
         if tk.messagebox.askyesno("Quit Game", "Save and quit?"):
-            self._save_game()
+            self.shutdown()
             self.root.quit()
 
+    def shutdown(self):
+        """Writes everything still pending and stops the background threads, for quitting"""
+        if self.session is not None:
+            self.engine.close_session(self.session)
+            self.session = None
+        self.scheduler.stop()
+        self._close_save()
+        self.data_loader.shutdown()
+        self.engine.shutdown()
+
     def _create_control_buttons(self):
         # Control buttons frame (top right)
         control_frame = tk.Frame(
@@ -239,13 +554,13 @@ class GameScreen:
         control_frame.place(relx=1, y=10, anchor="ne")
 
         # Save button
-        save_button = tk.Button(
+        self.save_button = tk.Button(
             control_frame,
             text="Save",
             command=self._save_game,
             width=10
         )
-        save_button.pack(side=tk.LEFT, padx=5)
+        self.save_button.pack(side=tk.LEFT, padx=5)
 
         # Main Menu button
         menu_button = tk.Button(
@@ -303,23 +618,128 @@ class GameScreen:
         )
         self.arrow_label.pack(side=tk.LEFT, padx=5)
 
-        # Do initial price update
-        self._update_price_display()
-
     def _update_price_display(self):
-        if self.price_manager.update_current_price():
-            price, is_increase = self.price_manager.get_price_change()
-
-            if price is not None:
-                # Format price with commas for thousands
-                formatted_price = f"${price:,.2f}"
-                self.price_label.config(text=formatted_price)
-
-                if is_increase is not None:
-                    if is_increase:
-                        self.arrow_label.config(text="↑", fg="#26a69a")  # Green arrow
-                    else:
-                        self.arrow_label.config(text="↓", fg="#ef5350")  # Red arrow
-
-        # Schedule next update
-        self.frame.after(self.price_manager.update_interval * 1000, self._update_price_display)
\ No newline at end of file
+        # Fetch in the background, one batched request for every symbol in memory
+        self.data_loader.submit('price', self.watchlist.refresh_prices, self._on_price_updated)
+
+    def _on_price_updated(self, results):
+        if not results:
+            return  # The task's interval stays as a retry
+        self.engine.dispatch(results)  # Updates the session, which marks its views
+        if results.get(self.chart_symbol) and self.chart_symbol != self.price_manager.symbol:
+            self.scheduler.mark_dirty('candle')
+        if not self.session.is_replaying:
+            # Poll again when the next bar should be out rather than on a fixed timer
+            self.scheduler.add_task('price', self._update_price_display,
+                                    self.live_price_manager.next_update_delay())
+
+    def _update_price_label(self):
+        price, is_increase = self.price_manager.get_price_change()
+
+        if price is not None:
+            # Format price with commas for thousands
+            formatted_price = f"${price:,.2f}"
+            self.price_label.config(text=formatted_price)
+
+            if is_increase is not None:
+                if is_increase:
+                    self.arrow_label.config(text="↑", fg="#26a69a")  # Green arrow
+                else:
+                    self.arrow_label.config(text="↓", fg="#ef5350")  # Red arrow
+
+    def _create_replay_controls(self):
+        # Replay frame - right side, under the control buttons
+        replay_frame = tk.Frame(
+            self.frame,
+            bg=BACKGROUND_COLOR
+        )
+        replay_frame.place(x=WINDOW_WIDTH - 20, y=65, anchor="ne")
+
+        self.replay_label = tk.Label(
+            replay_frame,
+            text="Replay:",
+            font=("Helvetica", 10),
+            bg=BACKGROUND_COLOR,
+            fg=TEXT_COLOR
+        )
+        self.replay_label.pack(side=tk.LEFT, padx=(0, 5))
+
+        for name in REPLAY_SPEEDS:
+            tk.Button(
+                replay_frame,
+                text=name,
+                command=lambda n=name: self._set_replay_speed(n),
+                width=4
+            ).pack(side=tk.LEFT, padx=2)
+
+        tk.Button(
+            replay_frame,
+            text="Live",
+            command=self._stop_replay,
+            width=4
+        ).pack(side=tk.LEFT, padx=2)
+
+    def _set_replay_speed(self, name):
+        if not self.session.is_replaying:
+            self._start_replay(REPLAY_SPEEDS[name])
+        else:
+            self.price_manager.source.set_speed(REPLAY_SPEEDS[name])
+            self.scheduler.mark_dirty('replay')
+
+    def _start_replay(self, speed):
+        # Jump to a random point in stored history, keeping some history and runway
+        store = self.live_price_manager.store
+        if len(store) < REPLAY_MIN_HISTORY + REPLAY_MIN_RUNWAY:
+            messagebox.showinfo("Replay", "Not enough stored price history to replay yet.")
+            return
+
+        row = random.randint(REPLAY_MIN_HISTORY, len(store) - REPLAY_MIN_RUNWAY)
+        start = pd.Timestamp(int(store.columns['timestamp'][row]), unit='ns', tz='UTC')
+        source = ReplayDataSource(store, start=start, speed=speed, batch_size=10)
+
+        replay = PriceManager(source=source, persist=False)
+        replay.fetch_historical_data()  # Reads the stored bars before the start point
+        try:
+            self.session.start_replay(replay)
+        except ValueError as e:
+            messagebox.showinfo("Replay", str(e))
+            return
+        self._change_symbol(replay.symbol)
+        self._sync_chart_source()
+
+        self.scheduler.remove_task('price')
+        self.scheduler.add_frame_callback('replay', self._replay_step)
+        self.scheduler.mark_dirty('chart', 'price', 'orders', 'replay')
+
+    def _replay_step(self, dt):
+        source = self.price_manager.source
+        started = time.perf_counter()
+
+        # Every bar that is due this frame is merged in one batch
+        live_feed = self.price_manager.live_feed
+        last_bars = live_feed.last_bars
+        self.price_manager.update_current_price()
+        if live_feed.last_bars is not last_bars:
+            self.session.on_bars(live_feed.last_bars)
+        self.scheduler.mark_dirty('replay')
+
+        if source.speed is None:
+            # Size the next batch so ingesting it takes about half a frame
+            elapsed_ms = max((time.perf_counter() - started) * 1000, 0.1)
+            target = self.scheduler.frame_ms / 2
+            source.batch_size = max(1, min(5000, int(source.batch_size * target / elapsed_ms)))
+
+        if source.finished():
+            self.scheduler.remove_frame_callback('replay')
+
+    def _stop_replay(self):
+        if not self.session.is_replaying:
+            return
+
+        self.scheduler.remove_frame_callback('replay')
+        self.session.stop_replay()
+        self._sync_chart_source()
+
+        self.scheduler.add_task('price', self._update_price_display,
+                                self.price_manager.update_interval, run_now=True)
+        self.scheduler.mark_dirty('chart', 'price', 'orders', 'replay')
\ No newline at end of file
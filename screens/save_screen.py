@@ -15,8 +15,8 @@ class SaveScreen:
             width=WINDOW_WIDTH,
             height=WINDOW_HEIGHT
         )
-        self.saves = SaveManager.load_saves()
-        self.save_buttons = []
+        self.saves = []  # Slot index only, full saves are loaded when picked
+        self.save_list = None
 
     def setup(self):
         # Title
@@ -29,20 +29,42 @@ class SaveScreen:
         )
         title_label.place(relx=0.5, rely=0.2, anchor="center")
 
-        # Create save slot buttons
-        for i in range(SaveManager.MAX_SAVES):
-            save_data = self.saves[f"save_{i + 1}"]
-            button_text = f"Save {i + 1}: {save_data['name'] or 'Empty'}"
-
-            button = tk.Button(
-                self.frame,
-                text=button_text,
-                font=("Helvetica", 16),
-                width=20,
-                command=lambda slot=i + 1: self._handle_save_selection(slot)
-            )
-            button.place(relx=0.5, rely=0.4 + (i * 0.15), anchor="center")
-            self.save_buttons.append(button)
+        # Scrollable list of saves, there's no limit on how many there are
+        list_frame = tk.Frame(self.frame, bg=BACKGROUND_COLOR)
+        list_frame.place(relx=0.5, rely=0.45, anchor="center")
+
+        scrollbar = tk.Scrollbar(list_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.save_list = tk.Listbox(
+            list_frame,
+            font=("Helvetica", 16),
+            width=24,
+            height=6,
+            yscrollcommand=scrollbar.set
+        )
+        self.save_list.pack(side=tk.LEFT)
+        scrollbar.config(command=self.save_list.yview)
+        self.save_list.bind("<Double-Button-1>", lambda event: self._load_selected())
+        self._update_save_list()
+
+        button_frame = tk.Frame(self.frame, bg=BACKGROUND_COLOR)
+        button_frame.place(relx=0.5, rely=0.7, anchor="center")
+
+        tk.Button(
+            button_frame,
+            text="Load",
+            font=("Helvetica", 16),
+            width=9,
+            command=self._load_selected
+        ).pack(side=tk.LEFT, padx=5)
+
+        tk.Button(
+            button_frame,
+            text="New Game",
+            font=("Helvetica", 16),
+            width=9,
+            command=lambda: self._handle_save_selection(None)
+        ).pack(side=tk.LEFT, padx=5)
 
         # Back button
         back_button = tk.Button(
@@ -53,28 +75,30 @@ class SaveScreen:
         )
         back_button.place(relx=0.1, rely=0.9, anchor="center")
 
-    def _handle_save_selection(self, slot):
-        save_data = self.saves[f"save_{slot}"]
+    def _load_selected(self):
+        selection = self.save_list.curselection()
+        if selection:
+            self._handle_save_selection(self.saves[selection[0]]['slot'])
 
-        if save_data["name"] is None:
+    def _handle_save_selection(self, slot):
+        if slot is None:
             player_name = simpledialog.askstring(
                 "New Game",
                 "Enter your name:",
                 parent=self.root
             )
+            if not player_name:
+                return
+            slot = SaveManager.create_new_save(player_name)
 
-            if player_name:
-                SaveManager.create_new_save(slot, player_name)
-                self.saves = SaveManager.load_saves()  # Refresh saves
-                # Remove the _update_button_texts call from here
-                self.game_instance.start_game(self.saves[f"save_{slot}"])
-        else:
+        save_data = SaveManager.load_save(slot)
+        if save_data is not None:
             self.game_instance.start_game(save_data)
 
-    def _update_button_texts(self):
-        for i, button in enumerate(self.save_buttons):
-            save_data = self.saves[f"save_{i + 1}"]
-            button.config(text=f"Save {i + 1}: {save_data['name'] or 'Empty'}")
+    def _update_save_list(self):
+        self.save_list.delete(0, tk.END)
+        for save in self.saves:
+            self.save_list.insert(tk.END, f"Save {save['slot']}: {save['name']}")
 
     def _go_back(self):
         self.hide()
@@ -82,8 +106,8 @@ class SaveScreen:
         # We'll implement this when we update the main game class
 
     def show(self):
-        # Reload saves and recreate buttons every time we show the screen
-        self.saves = SaveManager.load_saves()
+        # Reload the slot index and recreate buttons every time we show the screen
+        self.saves = SaveManager.list_saves()
         self.frame.destroy()  # Destroy old frame
         self.frame = tk.Frame(  # Create new frame
             self.root,
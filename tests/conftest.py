@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The test modules import utils/ and screens/ from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'xvfb: builds real Tk widgets, skipped without a display (run under xvfb-run when headless)')
@@ -0,0 +1,53 @@
+# Factories and fakes shared by the test modules
+import numpy as np
+import pandas as pd
+
+
+def make_bars(start, periods, seed=0):
+    """Random-walk 30m OHLCV bars starting at `start` (UTC)"""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=periods, freq='30min', tz='UTC')
+    close = 30000 + rng.normal(0, 50, periods).cumsum()
+    open_ = close + rng.normal(0, 10, periods)
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + 5,
+        'Low': np.minimum(open_, close) - 5,
+        'Close': close,
+        'Volume': rng.integers(1, 100, periods).astype(float)
+    }, index=index)
+
+
+def resample(data, minutes):
+    return data.resample(f'{minutes}min').agg({
+        'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'
+    }).dropna()
+
+
+class FakeWidget:
+    """Collects after() callbacks so the test decides when timers fire"""
+
+    def __init__(self):
+        self.timers = {}
+        self._ids = 0
+
+    def after(self, ms, func):
+        self._ids += 1
+        self.timers[self._ids] = func
+        return self._ids
+
+    def after_cancel(self, after_id):
+        self.timers.pop(after_id, None)
+
+    def fire(self):
+        timers, self.timers = self.timers, {}
+        for func in timers.values():
+            func()
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = pd.Timestamp(now, tz='UTC')
+
+    def __call__(self):
+        return self.now
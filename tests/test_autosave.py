@@ -0,0 +1,50 @@
+import threading
+
+from utils.autosave import Autosaver
+from helpers import FakeWidget
+
+
+def test_bursts_are_coalesced_into_one_background_write():
+    state = {'money': 100, 'btc': 0, 'positions': []}
+    writes = []
+    threads = []
+
+    def write(snapshot):
+        threads.append(threading.current_thread())
+        writes.append(snapshot)
+
+    widget = FakeWidget()
+    saver = Autosaver(widget, lambda keys: {key: state[key] for key in keys}, write)
+    for i in range(50):
+        state['money'] -= 1
+        state['btc'] += 1
+        saver.mark_dirty('money', 'btc')
+    assert len(widget.timers) == 1
+
+    widget.fire()
+    saver.flush(wait=True)
+    assert writes == [{'money': 50, 'btc': 50}]
+    assert threads[0] is not threading.current_thread()
+
+    # The snapshot was taken when the window closed, later changes go in the next one
+    state['positions'].append(1)
+    saver.mark_dirty('positions')
+    saver.shutdown()
+    assert writes[-1] == {'positions': [1]}
+    assert not widget.timers
+
+
+def test_failed_writes_are_retried_with_the_next_flush():
+    calls = []
+
+    def write(snapshot):
+        calls.append(snapshot)
+        if len(calls) == 1:
+            raise OSError("disk full")
+
+    saver = Autosaver(FakeWidget(), lambda keys: {key: 1 for key in keys}, write)
+    saver.mark_dirty('money')
+    saver.flush(wait=True)
+    assert saver.is_dirty()
+    saver.shutdown()
+    assert calls == [{'money': 1}, {'money': 1}]
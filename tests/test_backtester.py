@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from utils.backtester import Backtester, EventBacktester, sma_crossover, rsi_reversion
+from helpers import make_bars
+
+
+def test_vectorized_run_matches_the_event_driven_engine():
+    candles = make_bars('2024-01-01', 2000, seed=5)
+    bt = Backtester(candles, fee_rate=0.001)
+    vectorized = bt.run(sma_crossover, fast=10, slow=40)
+
+    def crossover(context):
+        i = context.i
+        fast, slow = context.bt.sma(10)[i], context.bt.sma(40)[i]
+        ledger = context.ledger
+        if fast > slow and ledger.spot_quantity == 0:
+            context.buy(ledger.cash / (context.price * (1 + context.bt.fee_rate)))
+        elif not fast > slow and ledger.spot_quantity > 0:
+            context.sell(ledger.spot_quantity)
+
+    event_driven = EventBacktester(candles, fee_rate=0.001).run(crossover)
+    assert vectorized.trades == event_driven.trades > 10
+    # Fees differ only at second order (fee on what's spent vs on what's bought)
+    np.testing.assert_allclose(vectorized.equity, event_driven.equity, rtol=1e-3)
+
+
+def test_sweep_ranks_every_configuration():
+    candles = make_bars('2024-01-01', 3000, seed=6)
+    bt = Backtester(candles, chunk_elements=3000 * 7)  # Several blocks
+    table = bt.sweep(sma_crossover, {'fast': [5, 10, 20], 'slow': [30, 50, 100, 200]})
+    assert len(table) == 12
+    assert table['total_return'].is_monotonic_decreasing
+
+    best = table.iloc[0]
+    single = bt.run(sma_crossover, fast=int(best['fast']), slow=int(best['slow']))
+    assert single.total_return == pytest.approx(best['total_return'])
+    assert single.max_drawdown == pytest.approx(best['max_drawdown'])
+    assert single.sharpe == pytest.approx(best['sharpe'])
+
+    # A scalar-only strategy goes through the same sweep one configuration at a time
+    scalar = bt.sweep(lambda bt, period, lower, upper: rsi_reversion(
+        bt, np.array([period]), np.array([lower]), np.array([upper]))[0],
+        {'period': [14], 'lower': [25, 30], 'upper': [70]}, vectorized=False)
+    batched = bt.sweep(rsi_reversion, {'period': [14], 'lower': [25, 30], 'upper': [70]})
+    np.testing.assert_allclose(scalar['final_equity'], batched['final_equity'])
+
+
+def test_event_driven_limit_orders_fill_through_the_order_engine():
+    candles = make_bars('2024-01-01', 500, seed=7)
+    low = candles['Low'].min()
+
+    def buy_the_dip(context):
+        if context.i == 0:
+            context.place('buy', 'limit', low + 1, 0.1)
+
+    result = EventBacktester(candles, fee_rate=0.0).run(buy_the_dip)
+    assert result.trades == 1
+    assert result.equity[-1] == pytest.approx(
+        10000 + 0.1 * (candles['Close'].iloc[-1] - (low + 1)))
+
+
+def test_bots_get_the_same_order_checks_and_fills_as_a_session(tmp_path):
+    from utils.engine import Session
+    from utils.portfolio import Ledger
+    from utils.price_manager import PriceManager
+
+    candles = make_bars('2024-01-01', 200, seed=4)
+    cash = 10000.0
+
+    def script(place, ledger, i, price):
+        # What a bot does on each bar, `place` returns None where the game refuses
+        if i == 0:
+            assert place('buy', 'limit', price * 0.99, cash / price * 2) is None  # Too big
+            assert place('sell', 'limit', price * 1.01, 1.0) is None  # No BTC yet
+            # Each fits on its own, together they don't: the second fill is rejected
+            return [place('buy', 'limit', price * 0.995, cash * 0.7 / price) for _ in range(2)]
+
+    backtest_orders = []
+
+    def strategy(context):
+        placed = script(context.place, context.ledger, context.i, context.price)
+        backtest_orders.extend(placed or [])
+
+    EventBacktester(candles, fee_rate=0.0, initial_cash=cash).run(strategy)
+
+    def session_place(*args):
+        try:
+            return session.place_order(*args)
+        except ValueError:
+            return None
+
+    session_orders = []
+    bars_seen = [0]
+
+    def bot(session):
+        i = bars_seen[0] - 1
+        placed = script(session_place, session.ledger, i, candles['Close'].iloc[i])
+        session_orders.extend(placed or [])
+
+    ledger = Ledger(cash)
+    session = Session(1, ledger, PriceManager(data_dir=str(tmp_path)), bot=bot)
+    for i in range(len(candles)):
+        bars_seen[0] = i + 1
+        session.on_bars(candles.iloc[i:i + 1])
+
+    statuses = [order.status for order in backtest_orders]
+    assert statuses == ['filled', 'rejected']
+    assert [order.status for order in session_orders] == statuses
+    assert [order.fill_price for order in session_orders] == [order.fill_price for order in backtest_orders]
@@ -0,0 +1,70 @@
+import pandas as pd
+
+from utils.price_manager import PriceManager
+from helpers import make_bars, resample
+
+
+def test_cached_candles_match_full_resample_after_updates(tmp_path):
+    pm = PriceManager(data_dir=str(tmp_path))
+    bars = make_bars('2024-01-01 00:00', 2000)
+    pm.merge_bars(bars.iloc[:1500])
+
+    for timeframe in ['1h', '4h', '1d']:
+        pm.get_candles(timeframe)
+
+    # Append new bars, then revise the live (last) bar
+    pm.merge_bars(bars.iloc[1500:])
+    revised = bars.iloc[-1:].copy()
+    revised['Close'] += 100
+    revised['High'] += 100
+    pm.merge_bars(revised)
+
+    for timeframe in ['1h', '4h', '1d']:
+        expected = resample(pm.raw_data, pm.timeframes[timeframe])
+        pd.testing.assert_frame_equal(pm.get_candles(timeframe), expected,
+                                      check_freq=False, check_index_type=False)
+
+
+def test_pyramid_skips_gaps_like_pandas(tmp_path):
+    pm = PriceManager(data_dir=str(tmp_path))
+    bars = make_bars('2024-01-01 00:00', 3000)
+    pm.merge_bars(bars.drop(bars.index[400:700]))
+
+    for timeframe in ['1h', '4h', '1d']:
+        expected = resample(pm.raw_data, pm.timeframes[timeframe])
+        pd.testing.assert_frame_equal(pm.get_candles(timeframe), expected,
+                                      check_freq=False, check_index_type=False)
+
+    weekly = pm.get_candles('1w')
+    assert (weekly.index.dayofweek == 0).all()
+    assert weekly['Volume'].sum() == pm.raw_data['Volume'].sum()
+
+
+def test_unchanged_data_returns_cached_frame(tmp_path):
+    pm = PriceManager(data_dir=str(tmp_path))
+    pm.merge_bars(make_bars('2024-01-01 00:00', 500))
+
+    first = pm.get_candles('4h')
+    assert pm.get_candles('4h') is first
+
+
+def test_live_bar_updates_the_cached_frame_in_place(tmp_path):
+    pm = PriceManager(data_dir=str(tmp_path))
+    bars = make_bars('2024-01-01 00:00', 500)
+    pm.merge_bars(bars.iloc[:-1])
+    daily = pm.get_candles('1d')
+    columns = pm._candle_cache['1d'][1]
+
+    # A new 30m bar inside the last day, then a revision of it: same frame, new values
+    pm.merge_bars(bars.iloc[-1:])
+    revised = bars.iloc[-1:].copy()
+    revised['High'] += 100
+    pm.merge_bars(revised)
+    assert pm.get_candles('1d') is daily and pm._candle_cache['1d'][1] is columns
+    pd.testing.assert_frame_equal(daily, resample(pm.raw_data, pm.timeframes['1d']),
+                                  check_freq=False, check_index_type=False)
+
+    # A bar opening a new day adds a row, so the frame is rebuilt
+    pm.merge_bars(make_bars(bars.index[-1].normalize() + pd.Timedelta(days=1), 1))
+    assert pm.get_candles('1d') is not daily
+    assert len(pm.get_candles('1d')) == len(daily) + 1
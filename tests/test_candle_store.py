@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from utils.candle_store import CandleArray, RingBuffer, frame_arrays
+from utils.price_manager import PriceManager
+from helpers import make_bars
+
+
+def test_candle_array_merges_like_the_dataframe_did():
+    bars = make_bars('2024-01-01 00:00', 500)
+    candles = CandleArray()
+    candles.merge(frame_arrays(bars.iloc[100:400]))
+
+    # Live bar revised, new bars appended, then a gap backfilled out of order
+    revised = bars.iloc[399:450].copy()
+    revised.iloc[0, revised.columns.get_loc('Close')] += 1
+    assert candles.merge(frame_arrays(revised)) == revised.index[0].value
+    assert candles.merge(frame_arrays(bars.iloc[:150])) == bars.index[0].value
+
+    expected = pd.concat([bars.iloc[:399], revised])
+    expected.index = expected.index.as_unit('ns')
+    pd.testing.assert_frame_equal(candles.to_frame(), expected, check_freq=False)
+
+
+def test_float32_candles_use_less_memory(tmp_path):
+    bars = make_bars('2024-01-01 00:00', 5000)
+    full = PriceManager(data_dir=str(tmp_path / 'full'))
+    compact = PriceManager(data_dir=str(tmp_path / 'compact'), price_dtype='float32')
+    full.merge_bars(bars)
+    compact.merge_bars(bars)
+
+    # 28 bytes a candle instead of 48: the timestamps stay int64
+    assert compact.candles.nbytes * 48 == full.candles.nbytes * 28
+    assert compact.raw_data['Close'].dtype == np.float32
+    np.testing.assert_allclose(compact.get_candles('1d')['Close'], full.get_candles('1d')['Close'],
+                               rtol=1e-6)
+
+    # The DataFrame is built on demand and a live bar revision is written into it
+    frame = full.raw_data
+    assert full.raw_data is frame
+    revised = bars.iloc[-1:].copy()
+    revised['Close'] += 1
+    full.merge_bars(revised)
+    assert full.raw_data is frame and frame['Close'].iloc[-1] == full.get_latest_price()
+    assert full.get_latest_price() == bars['Close'].iloc[-1] + 1
+
+
+def test_ring_buffer_keeps_the_newest_bars():
+    ring = RingBuffer(4)
+    for ts in range(6):
+        ring.append(ts, ts, ts + 10, ts - 10, ts + 1, 1.0)
+    ring.append(5, 5, 50, 5, 7, 2.0)  # Same timestamp replaces the newest bar
+
+    assert len(ring) == 4
+    assert list(ring.arrays()['timestamp']) == [2, 3, 4, 5]
+    assert ring.summary() == (2, 50, -8, 7, 5.0)
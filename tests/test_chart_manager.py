@@ -0,0 +1,224 @@
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib.backend_bases import MouseEvent
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import utils.chart_manager as chart_manager
+from helpers import make_bars
+
+
+class OffscreenCanvas(FigureCanvasAgg):
+    """Agg canvas standing in for the Tk one, counting full draws"""
+
+    def __init__(self, figure, master=None):
+        super().__init__(figure)
+        self.draws = 0
+
+    def draw(self):
+        self.draws += 1
+        super().draw()
+
+    def blit(self, bbox=None):
+        pass
+
+
+@pytest.fixture
+def chart(monkeypatch):
+    monkeypatch.setattr(chart_manager, 'FigureCanvasTkAgg', OffscreenCanvas)
+    return chart_manager.ChartManager(None)
+
+
+def candles_by_timeframe():
+    bars = make_bars('2024-01-01', 3000, seed=11)
+    frames = {'30m': bars}
+    for timeframe, rule in [('1h', '1h'), ('4h', '4h'), ('1d', '1D')]:
+        frames[timeframe] = bars.resample(rule).agg({
+            'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'
+        }).dropna()
+    return frames
+
+
+def test_switching_back_to_a_timeframe_restores_it_without_drawing(chart, tmp_path, monkeypatch):
+    from utils.price_manager import PriceManager
+
+    pm = PriceManager(data_dir=str(tmp_path))
+    pm.merge_bars(make_bars('2024-01-01', 3000, seed=11))
+    calls = []
+    for name in ['build', 'update']:
+        rebuild = getattr(pm.pyramid, name)
+        monkeypatch.setattr(pm.pyramid, name,
+                            lambda *args, name=name, rebuild=rebuild: calls.append(name) or rebuild(*args))
+
+    def get_candles(timeframe):
+        calls.append(timeframe)
+        return pm.get_candles(timeframe)
+
+    chart.set_candle_source(get_candles)
+    chart.update_chart(get_candles('1h'), '1h', pm.revision)
+    hourly = [segments.copy() for segments in chart.wicks.get_segments()]
+    hourly_ylim = chart.ax.get_ylim()
+    chart.update_chart(get_candles('1d'), '1d', pm.revision)
+    draws = chart.canvas.draws
+    assert draws == 2
+
+    # Cached everywhere: nothing asked for or aggregated, only the live candle laid out, no draw
+    calls.clear()
+    geometry = chart._candle_geometry
+    monkeypatch.setattr(chart, '_candle_geometry',
+                        lambda x, *args: calls.append(('geometry', len(x))) or geometry(x, *args))
+    chart.update_chart(pm.get_candles('1h'), '1h', pm.revision)
+    assert calls == [('geometry', 1)]
+    assert chart.canvas.draws == draws  # Restored from the cached background
+    assert chart.level == '1h'
+    assert chart.ax.get_ylim() == hourly_ylim
+    np.testing.assert_array_equal(np.array(chart.wicks.get_segments()), np.array(hourly))
+
+    # A new closed candle makes the cached state stale
+    chart.update_chart(pm.get_candles('1d'), '1d', pm.revision)
+    pm.merge_bars(make_bars(pm.raw_data.index[-1] + pd.Timedelta(minutes=30), 2, seed=12))
+    chart.update_chart(pm.get_candles('1h'), '1h', pm.revision)
+    assert chart.canvas.draws == draws + 1
+
+
+def test_render_cache_is_bounded_and_cleared_by_indicator_changes(chart):
+    frames = candles_by_timeframe()
+    chart.render_cache_size = 2
+    for timeframe in ['30m', '1h', '4h', '1d']:
+        chart.update_chart(frames[timeframe], timeframe)
+    assert [key[1] for key in chart._render_cache] == ['4h', '1d']
+
+    chart.set_indicators(['SMA 20'])
+    assert len(chart._render_cache) <= 1  # Only what set_indicators just drew
+
+
+def test_refreshes_reuse_the_candle_artists(chart):
+    frames = candles_by_timeframe()
+    data = frames['1h'].copy()
+    chart.update_chart(data, '1h', revision=1)
+    artists = list(chart.ax.collections)
+    draws = chart.canvas.draws
+
+    for i in range(20):
+        # Live candle ticks: blitted, no full draw
+        data.iloc[-1, data.columns.get_loc('Close')] += 1
+        chart.update_chart(data, '1h', revision=1)
+    assert chart.canvas.draws == draws
+
+    chart.update_chart(frames['1d'], '1d', revision=1)  # New candles
+    chart.view = (chart.ax.get_xlim()[0] - 30, chart.ax.get_xlim()[1])  # Panned
+    chart.update_chart(frames['1d'], '1d', revision=1)
+    assert chart.canvas.draws == draws + 2
+    assert list(chart.ax.collections) == artists
+    assert len(chart.bodies.get_paths()) == len(frames['1d']) - 1  # Same collections, new vertices
+
+
+def test_an_edited_older_candle_is_redrawn(chart):
+    data = candles_by_timeframe()['1h'].copy()
+    chart.update_chart(data, '1h')
+    draws = chart.canvas.draws
+
+    # Neither the last nor the second to last candle, and no revision given
+    data.iloc[-10, data.columns.get_loc('High')] += 40
+    chart.update_chart(data, '1h')
+    assert chart.canvas.draws == draws + 1
+    assert chart.wicks.get_segments()[-9][1, 1] == data['High'].iloc[-10]
+
+    # With a revision, a changed revision is what forces the redraw
+    chart.update_chart(data, '1h', revision=7)
+    draws = chart.canvas.draws
+    data.iloc[-10, data.columns.get_loc('High')] += 40
+    chart.update_chart(data, '1h', revision=8)
+    assert chart.canvas.draws == draws + 1
+
+
+def test_price_manager_revision_only_changes_with_closed_bars(tmp_path):
+    from utils.price_manager import PriceManager
+
+    bars = make_bars('2024-01-01', 300)
+    pm = PriceManager(data_dir=str(tmp_path))
+    pm.merge_bars(bars.iloc[:200])
+    revision = pm.revision
+
+    live = bars.iloc[199:201].copy()  # Revises the live bar and appends one
+    pm.merge_bars(live)
+    assert pm.revision == revision
+
+    pm.merge_bars(bars.iloc[150:151] + 1)
+    assert pm.revision != revision
+
+
+def send(chart, name, xdata, **kwargs):
+    """Feeds a mouse event at data x `xdata` through the canvas callbacks"""
+    x, y = chart.ax.transData.transform((xdata, np.mean(chart.ax.get_ylim())))
+    event = MouseEvent(name, chart.canvas, x, y, **kwargs)
+    chart.canvas.callbacks.process(name, event)
+
+
+def test_zooming_out_switches_to_a_coarser_timeframe(chart):
+    frames = candles_by_timeframe()
+    chart.set_candle_source(frames.get)
+    chart.update_chart(frames['30m'], '30m')
+    assert chart.level == '30m'
+
+    levels = []
+    for i in range(16):
+        send(chart, 'scroll_event', np.mean(chart.ax.get_xlim()), button='down')
+        levels.append(chart.level)
+        span_days = chart.view[1] - chart.view[0]
+        expected = next(level for level in chart.lod_levels
+                        if span_days * 1440 / chart.level_minutes[level] <= chart.max_candles)
+        assert chart.level == expected
+        assert len(chart.bodies.get_paths()) <= chart.max_candles + 2
+    assert levels[0] == '30m' and levels[-1] == '1d'
+    assert set(levels) == {'30m', '1h', '4h', '1d'}
+    assert levels == sorted(levels, key=chart.lod_levels.index)  # Never finer again
+
+    # Double-click snaps back to the latest candles of the selected timeframe
+    send(chart, 'button_press_event', np.mean(chart.ax.get_xlim()), button=1, dblclick=True)
+    assert chart.view is None and chart.level == '30m'
+    assert len(chart.bodies.get_paths()) == chart.timeframe_candle_count['30m'] - 1
+
+
+def test_dragging_pans_back_through_history(chart):
+    frames = candles_by_timeframe()
+    chart.update_chart(frames['1h'], '1h')
+    x_min, x_max = chart.ax.get_xlim()
+    latest = chart.live_body.get_paths()[0].vertices[:, 0].max()
+
+    start = x_min + (x_max - x_min) * 0.25
+    send(chart, 'button_press_event', start, button=1)
+    send(chart, 'motion_notify_event', start + (x_max - x_min) * 0.5)
+    send(chart, 'button_release_event', start + (x_max - x_min) * 0.5, button=1)
+
+    # Dragged right by half the width, so the view moved half a width back in time
+    assert chart.view == pytest.approx((x_min - (x_max - x_min) * 0.5, x_max - (x_max - x_min) * 0.5))
+    assert chart.ax.get_xlim() == pytest.approx(chart.view)
+    assert chart.level == '1h'
+    assert chart.bodies.get_paths()[-1].vertices[:, 0].max() < latest
+    assert chart._drag is None
+
+
+def test_panning_past_the_first_candle_pages_in_older_ones(chart):
+    frames = candles_by_timeframe()
+    loaded = {'1h': frames['1h'].iloc[-200:]}
+    requests = []
+
+    def load_older(start):
+        requests.append(start)
+        older = frames['1h'].loc[start:]
+        if len(older) == len(loaded['1h']):
+            return False
+        loaded['1h'] = older
+        return True
+
+    chart.set_candle_source(loaded.get, history_source=load_older)
+    chart.update_chart(loaded['1h'], '1h')
+    x_min, x_max = chart.ax.get_xlim()
+    assert not requests  # The latest candles are all loaded
+
+    chart.view = (x_min - 20, x_max - 20)  # Well before the first loaded candle
+    chart.update_chart(loaded['1h'], '1h')
+    assert requests and requests[0] < chart._to_timestamp(x_min - 20)
+    assert len(chart._data) > 200
+    assert len(chart.bodies.get_paths()) > 0
@@ -0,0 +1,57 @@
+import threading
+import time
+
+from utils.data_loader import DataLoader
+from helpers import FakeWidget
+
+
+def drain(widget, loader, timeout=2):
+    end = time.monotonic() + timeout
+    while widget.timers and time.monotonic() < end:
+        time.sleep(0.01)
+        widget.fire()
+
+
+def test_cancel_drops_callbacks_of_jobs_in_flight():
+    widget = FakeWidget()
+    loader = DataLoader(widget)
+    results = []
+
+    loader.submit('price', lambda: time.sleep(0.05) or 'old', results.append)
+    loader.cancel()
+    assert widget.timers == {}  # No polling left behind
+    assert not loader.is_loading('price')
+
+    loader.submit('price', lambda: time.sleep(0.1) or 'new', results.append)
+    drain(widget, loader)
+    assert results == ['new']
+    loader.shutdown()
+
+
+def test_requests_for_a_job_in_flight_are_coalesced():
+    widget = FakeWidget()
+    loader = DataLoader(widget)
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def fetch():
+        calls.append(threading.current_thread().name)
+        release.wait(2)
+        return len(calls)
+
+    assert loader.submit('history', fetch, results.append)
+    assert not loader.submit('history', fetch, results.append)
+    assert not loader.submit('history', fetch, results.append)
+    assert loader.submit('price', lambda: 'price', results.append)  # Other keys still run
+    release.set()
+    drain(widget, loader)
+
+    assert len(calls) == 1 and calls[0].startswith('data-loader')
+    assert sorted(results, key=str) == [1, 1, 1, 'price']
+
+    # Once the job finished the next request starts a new one
+    assert loader.submit('history', fetch, results.append)
+    drain(widget, loader)
+    assert results[-1] == 2
+    loader.shutdown()
@@ -0,0 +1,148 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from utils.engine import GameEngine
+from utils.market_data import SimulatedDataSource
+from utils.watchlist import Watchlist
+
+
+class Clock:
+    def __init__(self):
+        self.now = pd.Timestamp('2024-03-01 12:00', tz='UTC')
+
+    def __call__(self):
+        return self.now
+
+
+def make_engine(tmp_path, **kwargs):
+    clock = Clock()
+    source = SimulatedDataSource(seed=3, volatility=0.002, clock=clock)
+    watchlist = Watchlist(source=source, data_dir=str(tmp_path))
+    return GameEngine(watchlist, **kwargs), clock, source
+
+
+def test_sessions_share_one_feed(tmp_path):
+    engine, clock, source = make_engine(tmp_path)
+    updates = []
+    events = []
+    first = engine.open_session(on_event=events.append, on_update=updates.append)
+    second = engine.open_session(cash=1000)
+    assert first.price_manager is second.price_manager
+
+    engine.dispatch(engine.poll())
+    assert len(source.requests) == 1  # One poll serves both sessions
+    assert updates == [first]
+
+    price = first.price()
+    first.buy(0.001)
+    with pytest.raises(ValueError, match="Not enough money"):
+        first.place_order('buy', 'limit', price, 1)
+    order = second.place_order('buy', 'limit', price * 0.98, 0.01)
+
+    # Nothing new: the same bars aren't matched twice
+    engine.dispatch({'BTC-USD': True})
+    assert updates == [first]
+
+    while order.status == 'open':
+        clock.now += pd.Timedelta(minutes=30)
+        engine.dispatch(engine.poll())
+    assert order.status == 'filled'
+    assert second.ledger.spot_quantity == pytest.approx(0.01)
+    assert [event['type'] for event in events] == ['spot_buy']
+
+    engine.close_session(first)
+    engine.close_session(second)
+    assert engine.symbols() == []
+    assert 'BTC-USD' not in engine.watchlist.pinned
+
+
+def test_hundreds_of_bot_sessions_on_the_asyncio_clock(tmp_path):
+    engine, clock, source = make_engine(tmp_path, poll_interval=0)
+
+    def trader(session):
+        # Alternates between all in and all out
+        if session.ledger.spot_quantity:
+            session.sell(session.ledger.spot_quantity)
+        else:
+            session.buy(session.ledger.cash / session.price())
+
+    sessions = [engine.open_session(bot=trader) for _ in range(300)]
+
+    async def play():
+        task = asyncio.create_task(engine.run())
+        for _ in range(5):
+            clock.now += pd.Timedelta(minutes=1)
+            await asyncio.sleep(0.05)
+        engine.stop()
+        await task
+
+    asyncio.run(play())
+    assert len(source.requests) >= 2
+    equities = {round(session.ledger.equity, 6) for session in sessions}
+    assert len(equities) == 1  # Same bots on the same feed end up in the same place
+    engine.shutdown()
+
+
+def test_replay_trades_a_throwaway_ledger(tmp_path):
+    from utils.market_data import ReplayDataSource
+    from utils.ohlcv_store import OHLCVStore
+    from utils.portfolio import Ledger
+    from utils.price_manager import PriceManager
+    from helpers import make_bars
+
+    engine, clock, source = make_engine(tmp_path)
+    events = []
+    equity = []
+    ledger = Ledger(10000.0, on_event=events.append, on_equity_change=equity.append)
+    session = engine.open_session(ledger, on_event=events.append)
+    engine.dispatch(engine.poll())
+    session.buy(0.01)
+    session.place_order('buy', 'limit', session.price() * 0.5, 0.01)
+    live = ledger.to_dict()
+    events.clear()
+
+    bars = make_bars('2024-01-01', 200)
+    OHLCVStore(str(tmp_path / 'replay')).append(bars)
+    replay = PriceManager(source=ReplayDataSource(str(tmp_path / 'replay'), start=bars.index[100],
+                                                  speed=None, batch_size=5), persist=False)
+    replay.fetch_historical_data()
+    session.start_replay(replay)
+    assert [event['type'] for event in events] == ['order_cancelled']  # The live order
+    events.clear()
+
+    # Holdings carry into the replay, where they can be sold and traded freely
+    assert session.ledger is not ledger and session.ledger.spot_quantity == pytest.approx(0.01)
+    session.sell(0.01)
+    session.open_position('long', 0.05, 2)
+    order = session.place_order('buy', 'limit', session.price() * 2, 0.01)
+    replay.update_current_price()
+    session.on_bars(replay.live_feed.last_bars)
+    assert order.status == 'filled'
+    assert events == [] and ledger.to_dict() == live
+
+    # Live again: the real ledger as it was, shown again, nothing left resting
+    equity.clear()
+    session.stop_replay()
+    assert session.ledger is ledger and ledger.to_dict() == live
+    assert session.orders.orders == {}
+    assert equity == [round(ledger.equity, 2)]
+    assert events == []
+
+
+def test_closing_a_session_logs_its_dropped_orders(tmp_path):
+    engine, clock, source = make_engine(tmp_path)
+    events = []
+    session = engine.open_session(on_event=events.append)
+    engine.dispatch(engine.poll())
+    price = session.price()
+    orders = [session.place_order('buy', 'limit', price * 0.9, 0.001),
+              session.place_order('buy', 'limit', price * 0.8, 0.001)]
+
+    engine.close_session(session)
+    # Every order placed in the log is closed in it too, nothing rests across a reload
+    assert [(event['type'], event['id']) for event in events[-2:]] == \
+        [('order_cancelled', order.id) for order in orders]
+    assert all(order.status == 'cancelled' for order in orders)
+    assert session.orders.orders == {}
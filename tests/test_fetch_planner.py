@@ -0,0 +1,102 @@
+import pandas as pd
+
+from utils.fetch_planner import FetchPlanner
+from helpers import make_bars
+
+
+class FakeSource:
+    """Serves slices of a fixed frame and can fail the first few calls"""
+
+    def __init__(self, bars, failures=0):
+        self.bars = bars
+        self.failures = failures
+        self.requests = []
+
+    def history(self, symbol, start, end, interval='30m'):
+        self.requests.append((start, end))
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("rate limited")
+        return self.bars[(self.bars.index >= start) & (self.bars.index < end)]
+
+
+def test_missing_intervals_finds_head_gaps_and_tail():
+    bars = make_bars('2024-01-01 00:00', 200)
+    have = bars.index[10:50].append(bars.index[60:150])
+    planner = FetchPlanner(FakeSource(bars), 'BTC-USD')
+
+    end = bars.index[-1] + pd.Timedelta(minutes=30)
+    intervals = planner.missing_intervals(have, bars.index[0], end)
+    assert intervals == [
+        (bars.index[0], bars.index[10]),
+        (bars.index[50], bars.index[60]),
+        (bars.index[149], end),
+    ]
+
+
+def test_fetch_fills_gaps_with_retries_and_batches():
+    bars = make_bars('2024-01-01 00:00', 200)
+    have = bars.index[:50].append(bars.index[60:190])
+    source = FakeSource(bars, failures=2)
+    sleeps = []
+    planner = FetchPlanner(source, 'BTC-USD', max_span_days=1, batch_size=2, sleep=sleeps.append)
+
+    end = bars.index[-1] + pd.Timedelta(minutes=30)
+    fetched = planner.fetch(have, bars.index[0], end)
+
+    # The two failed attempts were retried with growing delays
+    assert sleeps[:2] == [1.0, 2.0]
+    assert planner.failed == []
+    merged = bars.loc[have].combine_first(fetched)
+    pd.testing.assert_frame_equal(merged, bars, check_freq=False)
+
+
+def test_warm_restart_is_one_small_request():
+    bars = make_bars('2024-01-01 00:00', 3000)
+    source = FakeSource(bars)
+    planner = FetchPlanner(source, 'BTC-USD')
+
+    end = bars.index[-1] + pd.Timedelta(minutes=30)
+    fetched = planner.fetch(bars.index[:-4], bars.index[0], end)
+
+    assert len(source.requests) == 1
+    assert len(fetched) == 5
+
+
+def test_holes_the_source_cannot_fill_are_only_asked_for_once(tmp_path):
+    from utils.price_manager import PriceManager
+
+    bars = make_bars('2024-01-01 00:00', 3000)
+    # The source never had these bars, like a market closure or a bar Yahoo lost
+    closed = bars.drop(bars.index[1000:1040]).drop(bars.index[2000])
+    source = FakeSource(closed)
+    source.now = lambda: bars.index[-1] + pd.Timedelta(minutes=30)
+
+    pm = PriceManager(source=source, data_dir=str(tmp_path))
+    pm.history_days = 70  # Reaches back before the source's first bar too
+    pm.planner.sleep = lambda delay: None
+    pm.merge_bars(closed.iloc[:-4])
+    assert pm.fetch_historical_data()
+    assert len(source.requests) == 4  # Head, both holes and the tail
+
+    # A warm restart, with the checked holes read back from the store
+    pm.save_data()
+    restarted = PriceManager(source=source, data_dir=str(tmp_path))
+    restarted.history_days = 70
+    restarted.planner.sleep = lambda delay: None
+    assert restarted.load_data()
+    source.requests.clear()
+    assert restarted.fetch_historical_data()
+    assert source.requests == [(closed.index[-1], source.now())]
+
+
+def test_bars_published_late_are_asked_for_again():
+    bars = make_bars('2024-01-01 00:00', 200)
+    source = FakeSource(bars.drop(bars.index[195]))
+    planner = FetchPlanner(source, 'BTC-USD', sleep=lambda delay: None)
+
+    end = bars.index[-1] + pd.Timedelta(minutes=30)
+    have = bars.index.drop(bars.index[195])
+    planner.fetch(have, bars.index[0], end)
+    assert planner.checked == []  # Too recent to give up on
+    assert len(planner.plan(have, bars.index[0], end)) == 2
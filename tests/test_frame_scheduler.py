@@ -0,0 +1,87 @@
+import pytest
+
+from utils.frame_scheduler import FrameScheduler
+from helpers import FakeWidget
+
+
+def test_only_dirty_views_are_redrawn_and_idle_costs_nothing():
+    widget = FakeWidget()
+    scheduler = FrameScheduler(widget)
+    drawn = []
+    scheduler.add_view('chart', lambda: drawn.append('chart'))
+    scheduler.add_view('candle', lambda: drawn.append('candle'), part_of='chart')
+    scheduler.add_view('price', lambda: drawn.append('price'))
+
+    # A burst of updates is one frame
+    for _ in range(10):
+        scheduler.mark_dirty('candle', 'price')
+    assert len(widget.timers) == 1
+    widget.fire()
+    assert drawn == ['candle', 'price']
+
+    # The whole chart covers its last candle
+    drawn.clear()
+    scheduler.mark_dirty('candle')
+    scheduler.mark_dirty('chart')
+    widget.fire()
+    assert drawn == ['chart']
+
+    # Nothing dirty, no tasks: the loop stops
+    widget.fire()
+    assert widget.timers == {}
+
+    scheduler.mark_dirty('price')
+    scheduler.stop()
+    assert widget.timers == {}
+    widget.fire()
+    assert drawn == ['chart']
+
+
+def test_views_marked_during_a_frame_wait_for_the_next_one():
+    widget = FakeWidget()
+    scheduler = FrameScheduler(widget)
+    drawn = []
+    scheduler.add_view('replay', lambda: drawn.append('replay'))
+    scheduler.add_frame_callback('replay', lambda dt: scheduler.mark_dirty('replay'))
+
+    for _ in range(3):
+        widget.fire()
+        assert len(widget.timers) == 1  # Paced by frames, not rescheduled per mark
+    assert drawn == ['replay'] * 3
+
+
+def test_redraws_queued_while_behind_are_merged(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr('utils.frame_scheduler.time.monotonic', lambda: now[0])
+    widget = FakeWidget()
+    scheduler = FrameScheduler(widget, fps=30, max_skipped=4)
+    drawn = []
+
+    def slow_redraw():
+        drawn.append(now[0])
+        now[0] += 0.05  # 50ms, longer than a 33ms frame
+
+    scheduler.add_view('chart', slow_redraw)
+    frames = 0
+    for _ in range(11):
+        # Several updates land between every pair of frames
+        for _ in range(5):
+            scheduler.mark_dirty('chart')
+        assert len(widget.timers) == 1
+        widget.fire()
+        frames += 1
+        now[0] += scheduler.frame_ms / 1000
+
+    # Drawn on the first frame, then once every max_skipped + 1 frames
+    assert frames == 11
+    assert len(drawn) == 3
+    assert scheduler.last_render_ms == pytest.approx(50.0)
+
+    # Back under budget, every frame draws again
+    scheduler.add_view('chart', lambda: drawn.append(now[0]))
+    scheduler.last_render_ms = 0.0
+    for _ in range(3):
+        scheduler.mark_dirty('chart')
+        widget.fire()
+        now[0] += scheduler.frame_ms / 1000
+    assert len(drawn) == 6
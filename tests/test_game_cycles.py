@@ -0,0 +1,96 @@
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+from utils.autosave import Autosaver
+from utils.data_loader import DataLoader
+from utils.engine import GameEngine
+from utils.event_journal import EventJournal
+from utils.frame_scheduler import FrameScheduler
+from utils.market_data import SimulatedDataSource
+from utils.portfolio import Ledger
+from utils.save_manager import SaveManager
+from utils.watchlist import Watchlist
+from helpers import FakeClock, FakeWidget
+
+
+@pytest.fixture
+def saves(tmp_path, monkeypatch):
+    monkeypatch.setattr(SaveManager, 'DB_FILE', str(tmp_path / 'saves.db'))
+    monkeypatch.setattr(SaveManager, 'SAVE_FILE', str(tmp_path / 'saves.json'))
+
+
+def drain(root, loader):
+    """Fires the timers until the loader has handed back every result"""
+    for _ in range(500):
+        root.fire()
+        if not loader._pending:
+            return
+        time.sleep(0.002)
+    raise AssertionError("background loads never finished")
+
+
+def test_game_cycles_leave_nothing_behind_without_a_display(saves, tmp_path):
+    # What GameScreen.setup() and hide() do, minus the widgets, on fake timers.
+    # test_game_screen.py runs the real screen under xvfb-run.
+    source = SimulatedDataSource(clock=FakeClock('2024-03-01 12:00'))
+    engine = GameEngine(Watchlist(source=source, data_dir=str(tmp_path)))
+    engine.watchlist.refresh_prices(['BTC-USD'])  # Some history, no network
+    root = FakeWidget()
+    scheduler = FrameScheduler(root)
+    loader = DataLoader(root)
+    redraws = []
+    scheduler.add_view('price', lambda: redraws.append('price'))
+    slot = SaveManager.create_new_save("Tester")
+
+    def cycle():
+        snapshot, events = SaveManager.load_state(slot)
+        ledger = Ledger.from_dict(snapshot or SaveManager.load_save(slot)['data'])
+        ledger.replay(events)
+        journal = EventJournal(slot, pending=len(events))
+        autosaver = Autosaver(root, lambda keys: {'events': journal.checkpoint(
+            ledger.to_dict, force='snapshot' in keys)}, lambda saved: journal.write(saved['events']))
+
+        def log(event):
+            journal.record(event)
+            autosaver.mark_dirty('events')
+
+        ledger.on_event = log
+        session = engine.open_session(ledger, on_event=log,
+                                      on_update=lambda *args: scheduler.mark_dirty('price'))
+        scheduler.add_task('price', lambda: loader.submit('price', engine.watchlist.refresh_prices,
+                                                          engine.dispatch), 30, run_now=True)
+        loader.submit('history', lambda: engine.watchlist.load(['BTC-USD']),
+                      lambda loaded: scheduler.mark_dirty('price'))
+        session.buy(0.00001)
+        drain(root, loader)
+
+        engine.close_session(session)
+        scheduler.stop()
+        loader.cancel()
+        engine.watchlist.save_all()
+        autosaver.mark_dirty('snapshot')
+        autosaver.shutdown()
+        assert root.timers == {}
+
+    for _ in range(3):
+        cycle()
+    threads = threading.active_count()
+    tracemalloc.start()
+    memory = tracemalloc.get_traced_memory()[0]
+
+    for _ in range(100):
+        cycle()
+
+    growth = tracemalloc.get_traced_memory()[0] - memory
+    tracemalloc.stop()
+    assert threading.active_count() <= threads
+    assert growth < 2 * 2**20
+    assert engine.sessions == {}
+    assert redraws
+    snapshot, events = SaveManager.load_state(slot)
+    assert events == [] and snapshot['btc'] == pytest.approx(0.00001 * 103)
+    engine.shutdown()
+    loader.shutdown()
@@ -0,0 +1,109 @@
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+import pytest
+import tkinter as tk
+
+from utils.engine import GameEngine
+from utils.market_data import SimulatedDataSource
+from utils.save_manager import SaveManager
+from utils.watchlist import Watchlist
+
+NOW = pd.Timestamp('2024-03-01 12:00', tz='UTC')
+
+# GameScreen is the real widget tree, too big to fake: these need a display.
+# On a headless machine run them with `xvfb-run python -m pytest -m xvfb`;
+# test_game_cycles.py checks the same lifecycle on fake timers without one.
+pytestmark = pytest.mark.xvfb
+
+
+@pytest.fixture
+def root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("needs a display, run under xvfb-run")
+    root.withdraw()
+    yield root
+    root.destroy()
+
+
+@pytest.fixture
+def saves(tmp_path, monkeypatch):
+    monkeypatch.setattr(SaveManager, 'DB_FILE', str(tmp_path / 'saves.db'))
+    monkeypatch.setattr(SaveManager, 'SAVE_FILE', str(tmp_path / 'saves.json'))
+
+
+def count_widgets(widget):
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+def count_timers(root):
+    return len(root.tk.splitlist(root.tk.call('after', 'info')))
+
+
+def test_menu_to_game_cycles_leave_nothing_behind(root, saves, tmp_path):
+    from screens.game_screen import GameScreen
+
+    source = SimulatedDataSource(clock=lambda: NOW)
+    engine = GameEngine(Watchlist(source=source, data_dir=str(tmp_path)))
+    engine.watchlist.refresh_prices(['BTC-USD'])  # Some history, no network
+    screen = GameScreen(root, None, engine=engine)
+    slot = SaveManager.create_new_save("Tester")
+
+    def cycle():
+        screen.setup(SaveManager.load_save(slot))
+        screen.show()
+        for _ in range(5):
+            root.update()
+            time.sleep(0.01)
+        screen.hide()
+        root.update()
+
+    # The first games build the widgets and fill the caches
+    for _ in range(3):
+        cycle()
+    widgets, timers, threads = count_widgets(root), count_timers(root), threading.active_count()
+    tracemalloc.start()
+    memory = tracemalloc.get_traced_memory()[0]
+
+    for _ in range(100):
+        cycle()
+
+    growth = tracemalloc.get_traced_memory()[0] - memory
+    tracemalloc.stop()
+    assert count_widgets(root) == widgets
+    assert count_timers(root) <= timers
+    assert threading.active_count() <= threads
+    assert growth < 2 * 2**20
+    assert engine.sessions == {}
+    engine.shutdown()
+
+
+def test_shutdown_writes_the_trades_and_not_the_loaded_balances(root, saves, tmp_path, monkeypatch):
+    from screens.game_screen import GameScreen
+
+    source = SimulatedDataSource(clock=lambda: NOW)
+    engine = GameEngine(Watchlist(source=source, data_dir=str(tmp_path)))
+    engine.watchlist.refresh_prices(['BTC-USD'])
+    screen = GameScreen(root, None, engine=engine)
+    slot = SaveManager.create_new_save("Tester")
+    SaveManager.update_save(slot, {'name': "Tester", 'data': {'money': 100}})  # An imported save
+
+    screen.setup(SaveManager.load_save(slot))
+    screen.show()
+    root.update()
+    writes = []
+    monkeypatch.setattr(SaveManager, 'update_save', lambda slot, save: writes.append(save))
+    screen.session.buy(0.001)
+    screen._save_game()
+    screen.session.sell(0.0005)  # Still waiting for the autosave window
+    screen.shutdown()  # What closing the window does
+
+    snapshot, events = SaveManager.load_state(slot)
+    assert events == []
+    assert snapshot['btc'] == pytest.approx(0.0005)
+    assert writes == []  # The balances the save was loaded with are never written back
+    assert screen.autosaver is None
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from utils.indicators import IndicatorSet, ema_filter
+from helpers import make_bars
+
+
+def reference(data):
+    """The same indicators computed with plain pandas over the whole series"""
+    close, high, low = data['Close'], data['High'], data['Low']
+    ema = lambda series, span: series.ewm(span=span, adjust=False).mean()
+    wilder = lambda series, period: series.ewm(alpha=1 / period, adjust=False).mean()
+
+    change = close.diff().iloc[1:]
+    gain, loss = wilder(change.clip(lower=0), 14), wilder((-change).clip(lower=0), 14)
+    macd = ema(close, 12) - ema(close, 26)
+    mean, std = close.rolling(20).mean(), close.rolling(20).std(ddof=0)
+    true_range = pd.concat([high - low, (high - close.shift()).abs(),
+                            (low - close.shift()).abs()], axis=1).max(axis=1)
+    typical = (high + low + close) / 3
+    day = data.index.floor('1D')
+    vwap = (typical * data['Volume']).groupby(day).cumsum() / data['Volume'].groupby(day).cumsum()
+
+    return {
+        'sma_20': mean,
+        'ema_50': ema(close, 50),
+        'bb_upper': mean + 2 * std,
+        'bb_lower': mean - 2 * std,
+        'rsi_14': (100 - 100 / (1 + gain / loss)).reindex(close.index),
+        'macd': macd,
+        'macd_signal': ema(macd, 9),
+        'atr_14': wilder(true_range, 14),
+        'vwap': vwap,
+    }
+
+
+def assert_matches(values, data):
+    for name, expected in reference(data).items():
+        np.testing.assert_allclose(values[name], expected.to_numpy(), rtol=1e-9, atol=1e-6,
+                                   err_msg=name)
+
+
+def test_ema_filter_matches_recursive_definition():
+    x = np.random.default_rng(1).normal(0, 1, 1000).cumsum()
+    expected = pd.Series(x).ewm(alpha=0.3, adjust=False).mean().to_numpy()
+    np.testing.assert_allclose(ema_filter(x, 0.3), expected, rtol=1e-10, atol=1e-10)
+
+
+def test_streaming_updates_match_a_full_recompute():
+    data = make_bars('2024-01-01', 600, seed=3)
+    indicators = IndicatorSet()
+    assert_matches(indicators.sync(data.iloc[:400]), data.iloc[:400])
+
+    # The live candle changes a few times, then new candles arrive
+    for end in range(401, 600, 7):
+        live = data.iloc[:end].copy()
+        live.iloc[-1, live.columns.get_loc('Close')] += 25
+        live.iloc[-1, live.columns.get_loc('High')] += 25
+        indicators.sync(live)
+        values = indicators.sync(data.iloc[:end])
+        assert indicators._closed == end - 1  # Pushed, not reseeded
+    assert_matches(values, data.iloc[:end])
+
+    # Anything that doesn't continue the series starts over
+    values = indicators.sync(data.iloc[100:300])
+    assert_matches(values, data.iloc[100:300])
+
+
+def test_a_revised_closed_candle_reseeds(tmp_path):
+    from utils.price_manager import PriceManager
+
+    data = make_bars('2024-01-01', 400, seed=5)
+    pm = PriceManager(data_dir=str(tmp_path))
+    pm.merge_bars(data)
+    pm.get_indicators('30m')
+    pm.get_indicators('4h')
+
+    # Same timestamps, a corrected bar well before the live one
+    fixed = data.copy()
+    fixed.iloc[350, fixed.columns.get_loc('Close')] += 300
+    pm.merge_bars(fixed.iloc[350:351])
+    assert_matches(pm.get_indicators('30m'), fixed)
+    four_hourly = pm.get_candles('4h')
+    np.testing.assert_allclose(pm.get_indicators('4h')['sma_20'],
+                               four_hourly['Close'].rolling(20).mean().to_numpy())
+
+    # The live bar moving still doesn't reseed
+    closed = pm._indicators['30m']._closed
+    pm.merge_bars(fixed.iloc[-1:] + 1)
+    pm.get_indicators('30m')
+    assert pm._indicators['30m']._closed == closed
+
+
+def test_one_bar_windows_stream_like_they_seed():
+    from utils.indicators import SMA, BollingerBands
+
+    data = make_bars('2024-01-01', 50, seed=2)
+    indicators = IndicatorSet([SMA(1), BollingerBands(1)])
+    for end in range(10, 51):
+        values = indicators.sync(data.iloc[:end])
+    np.testing.assert_allclose(values['sma_1'], data['Close'].to_numpy())
+    np.testing.assert_allclose(values['bb_upper'], data['Close'].to_numpy())  # No spread in one bar
+    assert indicators._closed == 49  # Pushed, not reseeded
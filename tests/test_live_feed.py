@@ -0,0 +1,159 @@
+import pandas as pd
+import pytest
+
+from utils.live_feed import LiveFeed
+from utils.market_data import ReplayDataSource, SimulatedDataSource
+from utils.ohlcv_store import OHLCVStore
+from utils.price_manager import PriceManager
+from helpers import FakeClock, make_bars
+
+
+def test_live_feed_requests_only_new_bars_and_rebuilds_open_bar(tmp_path):
+    clock = FakeClock('2024-01-01 10:07')
+    source = SimulatedDataSource(clock=clock)
+    pm = PriceManager(source=source, data_dir=str(tmp_path))
+    pm.live_feed = LiveFeed(pm, source, clock=clock)
+    pm.merge_bars(pd.DataFrame({
+        'Open': [30000.0], 'High': [30000.0], 'Low': [30000.0], 'Close': [30000.0], 'Volume': [0.0]
+    }, index=pd.DatetimeIndex([pd.Timestamp('2024-01-01 10:00', tz='UTC')])))
+
+    assert pm.update_current_price()
+    assert len(pm.raw_data) == 1
+    first_request = source.requests[-1][1]
+
+    clock.now += pd.Timedelta(minutes=40)
+    assert pm.update_current_price()
+
+    # Second request starts at the last minute seen, not a day back
+    assert source.requests[-1][1] == pd.Timestamp('2024-01-01 10:07', tz='UTC')
+    assert source.requests[-1][1] > first_request
+
+    minutes = pd.DataFrame.from_dict(source.bars, orient='index').sort_index()
+    minutes.columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+    expected = minutes[minutes.index >= '2024-01-01 10:00'].resample('30min').agg({
+        'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'
+    })
+
+    assert list(pm.raw_data.index) == list(expected.index)
+    pd.testing.assert_frame_equal(pm.raw_data, expected, check_freq=False)
+    assert pm.live_feed.latest_tick() == (minutes.index[-1], minutes['Close'].iloc[-1])
+    assert pm.current_price == minutes['Close'].iloc[-1]
+
+
+def test_live_polls_are_written_every_save_interval(tmp_path):
+    clock = FakeClock('2024-01-01 10:07')
+    source = SimulatedDataSource(clock=clock)
+    pm = PriceManager(source=source, data_dir=str(tmp_path))
+    pm.live_feed = LiveFeed(pm, source, clock=clock)
+    pm.merge_bars(make_bars('2024-01-01 09:00', 2))
+
+    assert pm.update_current_price()
+    assert len(pm.store) == 3  # The first poll is saved
+
+    for _ in range(5):
+        clock.now += pd.Timedelta(minutes=30)
+        assert pm.update_current_price()
+    assert len(pm.store) == 3 and pm._unsaved_from is not None
+
+    pm.save_interval = 0
+    clock.now += pd.Timedelta(minutes=1)
+    assert pm.update_current_price()
+    assert len(pm.store) == len(pm.candles) and pm._unsaved_from is None
+
+    # Unloading flushes whatever the last interval left unsaved
+    pm.save_interval = 300
+    clock.now += pd.Timedelta(minutes=30)
+    assert pm.update_current_price()
+    last = pm.last_timestamp()
+    assert pm.store.last_timestamp() < last
+    pm.unload()
+    assert pm.load_data() and pm.last_timestamp() == last
+
+
+def test_replay_source_releases_bars_at_configured_speed(tmp_path):
+    bars = make_bars('2024-01-01 00:00', 100)
+    OHLCVStore(str(tmp_path / 'replay')).append(bars)
+
+    now = [0.0]
+    source = ReplayDataSource(str(tmp_path / 'replay'), start=bars.index[50], speed=60.0,
+                              clock=lambda: now[0])
+    assert len(source.history('BTC-USD', bars.index[0], bars.index[-1])) == 50
+
+    assert source.advance() == 1  # starts the clock with the first bar
+    now[0] = 30.0  # 30s at 60x = 30 simulated minutes = one more bar
+    assert source.advance() == 1
+    now[0] = 300.0
+    assert source.advance() == 9
+    assert source.now() == bars.index[60] + pd.Timedelta(minutes=30)
+
+    streamed = list(ReplayDataSource(str(tmp_path / 'replay'), start=bars.index[95],
+                                     speed=None).stream())
+    assert [bar[0] for bar in streamed] == list(bars.index[95:])
+
+
+def test_polls_are_timed_by_the_next_bar(tmp_path):
+    clock = FakeClock('2024-01-01 10:07:20')
+    source = SimulatedDataSource(clock=clock)
+    pm = PriceManager(source=source, data_dir=str(tmp_path))
+    pm.live_feed = LiveFeed(pm, source, clock=clock)
+    assert pm.live_feed.next_poll_delay() == 0
+
+    pm.update_current_price()  # Newest minute is 10:07, closing at 10:08
+    assert pm.live_feed.next_poll_delay() == 45
+    assert pm.next_update_delay() == 45
+
+    clock.now += pd.Timedelta(seconds=30)
+    assert pm.next_update_delay() == pm.update_interval  # Never sooner than the rate limit allows
+
+
+@pytest.mark.parametrize('speed, seconds, released', [
+    (1.0, 1800.0, 1),  # Real time: one 30m bar per half hour
+    (60.0, 300.0, 10),
+    (1800.0, 10.0, 10),
+    (None, 0.0, 8),  # As fast as possible, batch_size bars per request
+])
+def test_replay_source_steps_at_several_speeds(tmp_path, speed, seconds, released):
+    bars = make_bars('2024-01-01 00:00', 100)
+    OHLCVStore(str(tmp_path / 'replay')).append(bars)
+
+    now = [0.0]
+    source = ReplayDataSource(str(tmp_path / 'replay'), start=bars.index[50], speed=speed,
+                              batch_size=8, clock=lambda: now[0])
+    first = source.advance()
+    assert first == (8 if speed is None else 1)
+
+    now[0] += seconds
+    assert source.advance() == released
+    position = 50 + first + released
+    assert source.position == position
+    assert source.now() == bars.index[position - 1] + pd.Timedelta(minutes=30)
+
+    # Bars past the cursor stay hidden, whatever the speed
+    assert len(source.history('BTC-USD', bars.index[0], bars.index[-1])) == position
+    assert source.bars_since('BTC-USD', bars.index[0]).index[-1] == bars.index[source.position - 1]
+
+
+def test_replay_speed_changes_keep_the_replayed_time(tmp_path):
+    bars = make_bars('2024-01-01 00:00', 100)
+    OHLCVStore(str(tmp_path / 'replay')).append(bars)
+
+    now = [0.0]
+    sleeps = []
+    source = ReplayDataSource(str(tmp_path / 'replay'), start=bars.index[10], speed=60.0,
+                              clock=lambda: now[0], sleep=sleeps.append)
+    source.advance()
+    now[0] = 60.0  # 1 hour replayed at 60x
+    assert source.advance() == 2
+
+    # Ten times faster from here on, without a jump
+    source.set_speed(600.0)
+    assert source.advance() == 0
+    now[0] = 66.0  # 1 more hour at 600x
+    assert source.advance() == 2
+    assert source.position == 15
+
+    # stream() paces each bar by its gap at the current speed
+    source.set_speed(1800.0)
+    streamed = [bar[0] for _, bar in zip(range(3), source.stream())]
+    assert streamed == list(bars.index[15:18])
+    assert sleeps == [1.0, 1.0]
@@ -0,0 +1,106 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.ohlcv_store import OHLCVStore
+from helpers import make_bars
+
+
+def test_append_reopen_and_slice(tmp_path):
+    bars = make_bars('2024-01-01 00:00', 1000)
+    store = OHLCVStore(str(tmp_path / 'btc'), block_rows=64)
+    store.append(bars.iloc[:600])
+    store.append(bars.iloc[550:])  # overlap is skipped, the rest appended
+
+    # Revise the live bar in place
+    live = bars.iloc[-1:].copy()
+    live['Close'] = 1.0
+    store.append(live)
+
+    reopened = OHLCVStore(str(tmp_path / 'btc'))
+    assert len(reopened) == 1000
+    assert isinstance(reopened.columns['Close'], np.memmap)
+
+    expected = bars.copy()
+    expected.iloc[-1, expected.columns.get_loc('Close')] = 1.0
+    pd.testing.assert_frame_equal(reopened.to_frame(), expected,
+                                  check_freq=False, check_index_type=False)
+
+    start, end = bars.index[100], bars.index[700]
+    pd.testing.assert_frame_equal(reopened.to_frame(start, end), expected.iloc[100:700],
+                                  check_freq=False, check_index_type=False)
+
+
+def test_missing_older_bars_are_merged_in_order(tmp_path):
+    bars = make_bars('2024-01-01 00:00', 300)
+    store = OHLCVStore(str(tmp_path / 'btc'), block_rows=64)
+    store.append(pd.concat([bars.iloc[:100], bars.iloc[200:]]))
+    store.append(bars.iloc[100:200])
+
+    pd.testing.assert_frame_equal(store.to_frame(), bars,
+                                  check_freq=False, check_index_type=False)
+    assert len(store.header['block_index']) == 5
+
+
+def test_concurrent_saves_and_loads_keep_the_store_readable(tmp_path):
+    from utils.price_manager import PriceManager
+
+    bars = make_bars('2024-01-01 00:00', 3000)
+    pm = PriceManager(data_dir=str(tmp_path))
+    pm.merge_bars(bars.iloc[:1000])
+    pm.save_data()
+    errors = []
+
+    def writer(chunks):
+        try:
+            for chunk in chunks:
+                pm.merge_bars(chunk)
+                pm.save_data()
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        try:
+            for _ in range(50):
+                assert pm.load_data()
+        except Exception as e:
+            errors.append(e)
+
+    # One thread appends, the other backfills older bars, which forces rewrites
+    newer = [bars.iloc[i:i + 20] for i in range(2000, 3000, 20)]
+    older = [bars.iloc[i:i + 20] for i in range(1000, 2000, 20)][::-1]
+    threads = [threading.Thread(target=writer, args=(newer,)),
+               threading.Thread(target=writer, args=(older,)),
+               threading.Thread(target=reader)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    pm.save_data()
+    reopened = OHLCVStore(str(tmp_path / 'BTC-USD_30m'))
+    pd.testing.assert_frame_equal(reopened.to_frame(), bars,
+                                  check_freq=False, check_index_type=False)
+
+
+def test_a_crash_before_the_header_is_written_leaves_the_old_bars(tmp_path, monkeypatch):
+    bars = make_bars('2024-01-01 00:00', 300)
+    store = OHLCVStore(str(tmp_path / 'btc'), block_rows=64)
+    store.append(pd.concat([bars.iloc[:100], bars.iloc[200:]]))
+    before = store.to_frame()
+
+    def crash():
+        raise OSError("power cut")
+
+    live = bars.iloc[-1:].copy()
+    live['Close'] = 1.0
+    monkeypatch.setattr(store, '_write_header', crash)
+    for data in [live, bars.iloc[100:200]]:  # Live bar revised in place, then a rewrite
+        try:
+            store.append(data)
+        except OSError:
+            pass
+        reopened = OHLCVStore(str(tmp_path / 'btc'))
+        pd.testing.assert_frame_equal(reopened.to_frame(), before)
@@ -0,0 +1,53 @@
+import random
+
+from utils.order_engine import OrderEngine
+
+
+def test_limit_and_stop_orders_fill_on_intrabar_range():
+    engine = OrderEngine()
+    buy_limit = engine.place('buy', 'limit', 95, 1)
+    sell_limit = engine.place('sell', 'limit', 110, 1)
+    buy_stop = engine.place('buy', 'stop', 105, 1)
+    sell_stop = engine.place('sell', 'stop', 90, 1)
+
+    # Range 96-106 only reaches the buy stop
+    assert engine.process_bar(high=106, low=96, open_=100) == [buy_stop]
+    assert buy_stop.fill_price == 105
+
+    # Gap down through the buy limit and sell stop fills at the open
+    filled = engine.process_bar(high=89, low=85, open_=88)
+    assert set(filled) == {buy_limit, sell_stop}
+    assert buy_limit.fill_price == 88 and sell_stop.fill_price == 88
+    assert list(engine.orders.values()) == [sell_limit]
+
+
+def test_cancelled_orders_never_fill():
+    engine = OrderEngine()
+    order = engine.place('buy', 'limit', 100, 1)
+    assert engine.cancel(order.id)
+    assert not engine.cancel(order.id)
+    assert engine.process_bar(high=100, low=50) == []
+    assert order.status == 'cancelled'
+
+
+def test_matches_brute_force_with_thousands_of_orders():
+    rng = random.Random(1)
+    engine = OrderEngine()
+    resting = []
+    for _ in range(5000):
+        order = engine.place(rng.choice(['buy', 'sell']), rng.choice(['limit', 'stop']),
+                             rng.uniform(50, 150), 1)
+        resting.append(order)
+    for order in rng.sample(resting, 500):
+        engine.cancel(order.id)
+
+    price = 100.0
+    for _ in range(200):
+        low, high = price - rng.uniform(0, 3), price + rng.uniform(0, 3)
+        expected = {
+            order.id for order in engine.orders.values()
+            if (order.side, order.kind) in (('buy', 'limit'), ('sell', 'stop')) and low <= order.price
+            or (order.side, order.kind) in (('sell', 'limit'), ('buy', 'stop')) and high >= order.price
+        }
+        assert {order.id for order in engine.process_bar(high, low)} == expected
+        price += rng.uniform(-2, 2)
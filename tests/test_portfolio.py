@@ -0,0 +1,86 @@
+import pytest
+
+from utils.portfolio import Ledger
+
+
+def test_spot_trades_track_cash_holdings_and_realized_pnl():
+    ledger = Ledger(1000)
+    ledger.buy_spot(2, 100)
+    ledger.buy_spot(2, 200)
+    ledger.sell_spot(1, 300)
+
+    assert ledger.cash == pytest.approx(700)
+    assert ledger.spot_quantity == pytest.approx(3)
+    assert ledger.realized_pnl == pytest.approx(150)  # sold at 300 against a 150 average
+    assert ledger.on_price(250) == []
+    assert ledger.equity == pytest.approx(700 + 3 * 250)
+
+    with pytest.raises(ValueError):
+        ledger.buy_spot(100, 250)
+
+
+def test_leveraged_positions_mark_to_market_and_liquidate():
+    changes = []
+    ledger = Ledger(1000, on_equity_change=changes.append)
+    long = ledger.open_position('long', 1, 100, leverage=10)
+    short = ledger.open_position('short', 2, 100, leverage=1)
+
+    ledger.on_price(110)
+    # Long +10, short -20 on top of the untouched cash and margins
+    assert ledger.equity == pytest.approx(1000 + 10 - 20)
+    assert ledger.unrealized_pnl() == pytest.approx(-10)
+
+    # 10x long liquidates around 90.45; the bar's low reaches it
+    assert ledger.on_bar(high=101, low=90, close=95) == [long]
+    assert list(ledger.positions) == [short.id]
+    assert ledger.realized_pnl == pytest.approx(-10)
+
+    assert ledger.close_position(short.id, 95) == pytest.approx(10)
+    assert ledger.equity == pytest.approx(1000)
+    assert changes[-1] == 1000
+
+
+def test_equity_callback_only_fires_on_displayed_change():
+    changes = []
+    ledger = Ledger(100, on_equity_change=changes.append)
+    ledger.buy_spot(1, 50)
+    ledger.on_price(50.001)
+    ledger.on_price(50.002)
+    ledger.on_price(51)
+    assert changes == [100.0, 101.0]
+
+
+def test_round_trip_through_save_data():
+    ledger = Ledger(1000)
+    ledger.buy_spot(1, 100)
+    ledger.open_position('short', 1, 100, leverage=5)
+    restored = Ledger.from_dict(ledger.to_dict())
+    restored.on_price(90)
+    ledger.on_price(90)
+    assert restored.equity == pytest.approx(ledger.equity)
+    assert restored.open_position('long', 1, 90).id == 2
+
+
+def test_replaying_the_event_log_rebuilds_the_ledger():
+    events = []
+    ledger = Ledger(0, on_event=events.append)
+    ledger.deposit(1000)
+    ledger.buy_spot(2, 100)
+    snapshot = ledger.to_dict()
+    tail_start = len(events)
+
+    position = ledger.open_position('long', 1, 100, leverage=10)
+    ledger.sell_spot(1, 120)
+    ledger.on_bar(high=120, low=80, close=85)  # Liquidates the long
+    ledger.open_position('short', 1, 85, leverage=2)
+
+    assert [event['type'] for event in events][-3:] == ['spot_sell', 'liquidation', 'open_position']
+    assert events[-1]['id'] == position.id + 1
+
+    for base, tail in ((Ledger(0).to_dict(), events), (snapshot, events[tail_start:])):
+        restored = Ledger.from_dict(base)
+        restored.replay(tail)
+        assert restored.to_dict() == ledger.to_dict()
+        restored.on_price(90)
+        ledger.on_price(90)
+        assert restored.equity == pytest.approx(ledger.equity)
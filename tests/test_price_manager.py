@@ -1,13 +1,18 @@
-import sys
-import os
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pandas as pd
 
+from utils.market_data import ReplayDataSource
+from utils.ohlcv_store import OHLCVStore
 from utils.price_manager import PriceManager
+from helpers import make_bars
 
 
-def test_price_manager():
-    pm = PriceManager()
+def test_price_manager(tmp_path):
+    # Replay stored bars instead of calling Yahoo so this runs offline
+    bars = make_bars('2024-01-01 00:00', 60 * 48)
+    OHLCVStore(str(tmp_path / 'replay')).append(bars)
+    source = ReplayDataSource(str(tmp_path / 'replay'), start=bars.index[-200], speed=None,
+                              batch_size=10)
+    pm = PriceManager(source=source, data_dir=str(tmp_path / 'data'))
 
     # Try to load existing data
     if not pm.load_data():
@@ -16,6 +21,8 @@ def test_price_manager():
         if success:
             pm.save_data()
 
+    assert len(pm.raw_data) == len(bars) - 200
+
     # Test different timeframes
     for timeframe in ['30m', '1h', '4h', '1d']:
         data = pm.get_candles(timeframe)
@@ -24,8 +31,34 @@ def test_price_manager():
         print("Latest candle:")
         print(data.tail(1))
 
+    # Each live update releases the next replayed bars
+    assert pm.update_current_price()
+    assert pm.raw_data.index[-1] == bars.index[-191]
+    assert pm.get_latest_price() == bars['Close'].iloc[-191]
+
     print(f"\nLatest Bitcoin price: ${pm.get_latest_price():.2f}")
 
 
-if __name__ == "__main__":
-    test_price_manager()
\ No newline at end of file
+
+def test_load_data_keeps_a_recent_window_and_pages_older_bars_in(tmp_path):
+    bars = make_bars('2024-01-01 00:00', 120 * 48)
+    pm = PriceManager(data_dir=str(tmp_path))
+    pm.store.append(bars)
+
+    assert pm.load_data()
+    assert pm.raw_data.index[0] == bars.index[-1] - pd.Timedelta(days=pm.history_days)
+    assert pm.raw_data.index[-1] == bars.index[-1]
+
+    # Scrolling back 30 days reads just that range out of the store
+    start = pm.raw_data.index[0] - pd.Timedelta(days=30)
+    assert pm.load_older(start)
+    assert pm.raw_data.index[0] == start
+    pd.testing.assert_frame_equal(pm.raw_data, bars.loc[start:], check_freq=False, check_index_type=False)
+    assert pm._unsaved_from is None  # Nothing to write back
+
+    assert pm.load_older(bars.index[0] - pd.Timedelta(days=1))
+    assert not pm.load_older(bars.index[0] - pd.Timedelta(days=1))  # Nothing older
+    assert len(pm.raw_data) == len(bars)
+
+    everything = PriceManager(data_dir=str(tmp_path))
+    assert everything.load_data('all') and len(everything.raw_data) == len(bars)
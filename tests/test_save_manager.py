@@ -0,0 +1,93 @@
+import os
+import json
+
+import pytest
+
+from utils.save_manager import SaveManager
+from utils.event_journal import EventJournal
+
+
+@pytest.fixture
+def saves(tmp_path, monkeypatch):
+    monkeypatch.setattr(SaveManager, 'DB_FILE', str(tmp_path / 'saves.db'))
+    monkeypatch.setattr(SaveManager, 'SAVE_FILE', str(tmp_path / 'saves.json'))
+    return tmp_path
+
+
+def test_slots_are_listed_without_data_and_saved_per_key(saves):
+    assert SaveManager.list_saves() == []
+    slots = [SaveManager.create_new_save(f"player {i}") for i in range(5)]
+    assert slots == [1, 2, 3, 4, 5]  # No fixed slot limit
+    assert [save['name'] for save in SaveManager.list_saves()] == [f"player {i}" for i in range(5)]
+
+    save = SaveManager.load_save(2)
+    assert save == {"name": "player 1", "slot": 2, "data": {}}
+
+    save['data']['volume'] = 50
+    save['data']['settings'] = {"theme": "dark"}
+    SaveManager.update_save(2, save, keys=['settings'])
+    assert SaveManager.load_save(2)['data'] == {"settings": {"theme": "dark"}}
+
+    SaveManager.update_save(2, save)
+    assert SaveManager.load_save(2)['data']['volume'] == 50
+    assert SaveManager.load_save(1)['data'] == {}
+    assert SaveManager.load_save(9) is None
+
+
+def test_old_json_saves_are_imported_once(saves):
+    with open(SaveManager.SAVE_FILE, 'w') as f:
+        json.dump({
+            "save_1": {"name": None, "data": None},
+            "save_2": {"name": "alice", "slot": 2, "data": {"money": 250, "btc": 0.5}},
+            "save_3": {"name": None, "data": None}
+        }, f)
+
+    assert SaveManager.list_saves()[0]['name'] == "alice"
+    assert SaveManager.load_save(2)['data'] == {"money": 250, "btc": 0.5}
+    assert not os.path.exists(SaveManager.SAVE_FILE)
+    assert SaveManager.create_new_save("bob") == 3
+
+
+def test_state_loads_from_latest_snapshot_plus_event_tail(saves):
+    slot = SaveManager.create_new_save("carol")
+    snapshot, events = SaveManager.load_state(slot)
+    assert snapshot is None
+    assert [(event['seq'], event['type'], event['amount']) for event in events] == [(1, 'deposit', 100)]
+
+    SaveManager.append_events(slot, [{"type": "spot_buy"}], snapshot={"money": 50})
+    SaveManager.append_events(slot, [{"type": "spot_sell"}, {"type": "order_placed"}])
+
+    snapshot, events = SaveManager.load_state(slot)
+    assert snapshot == {"money": 50}
+    assert [event['type'] for event in events] == ['spot_sell', 'order_placed']
+
+    # Any earlier point can be rebuilt from the log
+    snapshot, events = SaveManager.load_state(slot, until=1)
+    assert snapshot is None and len(events) == 1
+
+
+def test_journal_keeps_events_until_they_are_stored(saves, monkeypatch):
+    slot = SaveManager.create_new_save("dave")
+    journal = EventJournal(slot, snapshot_every=3, pending=1)  # The starting deposit
+    journal.record({"type": "deposit", "amount": 5})
+    checkpoint = journal.checkpoint(lambda: {"money": 105})
+    assert 'ledger' not in checkpoint
+    journal.record({"type": "deposit", "amount": 1})  # After the checkpoint, goes next time
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+    with monkeypatch.context() as patch:
+        patch.setattr(SaveManager, 'append_events', fail)
+        with pytest.raises(OSError):
+            journal.write(checkpoint)
+    assert journal.pending() == 2
+
+    journal.write(checkpoint)
+    assert journal.pending() == 1
+    journal.write(journal.checkpoint(lambda: {"money": 106}))
+    assert journal.pending() == 0
+
+    snapshot, events = SaveManager.load_state(slot)
+    assert snapshot == {"money": 106} and events == []
+    snapshot, events = SaveManager.load_state(slot, until=2)
+    assert snapshot is None and [event['amount'] for event in events] == [100, 5]
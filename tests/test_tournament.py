@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.backtester import Backtester, sma_crossover
+from utils.tournament import SharedCandles, Tournament, SmaCrossBot, default_bots
+from helpers import make_bars
+
+
+def test_shared_candles_round_trip():
+    candles = make_bars('2024-01-01', 300, seed=8)
+    shared = SharedCandles.create(candles)
+    try:
+        attached = SharedCandles.attach(shared.spec)
+        frame = attached.frame()
+        pd.testing.assert_frame_equal(frame, candles[frame.columns], check_freq=False,
+                                      check_index_type=False)
+        assert np.shares_memory(frame['Close'].to_numpy(), attached.block)
+        del frame
+        attached.close()
+    finally:
+        shared.close()
+
+
+def test_leaderboard_is_the_same_on_worker_processes():
+    candles = make_bars('2024-01-01', 1500, seed=9)
+    bots = dict(default_bots(), **{'SMA 10/40': SmaCrossBot(10, 40)})
+
+    local = Tournament(candles, bots, workers=1).run()
+    parallel = Tournament(candles, bots, workers=2).run()
+    pd.testing.assert_frame_equal(local, parallel)
+    assert list(local.index) == list(range(1, len(bots) + 1))
+    assert local['pnl'].is_monotonic_decreasing
+
+    # Without fees the game's rules give exactly the vectorized result
+    expected = Backtester(candles, fee_rate=0.0, initial_cash=100).run(sma_crossover, fast=10, slow=40)
+    row = local.set_index('bot').loc['SMA 10/40']
+    assert row['final_equity'] == pytest.approx(expected.equity[-1])
+    assert row['trades'] == expected.trades
+
+
+def test_failing_bot_is_left_off_the_leaderboard(capsys):
+    def broken(context):
+        raise RuntimeError("oops")
+
+    leaderboard = Tournament(make_bars('2024-01-01', 100), {'broken': broken, 'SMA': SmaCrossBot(5, 10)},
+                             workers=1).run()
+    assert list(leaderboard['bot']) == ['SMA']
+    assert "broken failed: RuntimeError: oops" in capsys.readouterr().out
@@ -0,0 +1,41 @@
+import sys
+import os
+import subprocess
+import threading
+
+from utils.warmup import Warmup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_build_is_handed_over_before_the_preload_finishes():
+    release = threading.Event()
+    preloaded = []
+
+    def preload(built):
+        release.wait(5)
+        preloaded.append(built)
+
+    warmup = Warmup(['json'], lambda: 'engine', preload)
+    assert warmup.get() is None  # Not started yet
+    warmup.start()
+    assert warmup.get() == 'engine'
+    assert preloaded == []
+    release.set()
+    warmup._thread.join(5)
+    assert preloaded == ['engine']
+
+
+def test_failed_warmup_lets_the_caller_fall_back():
+    warmup = Warmup(['no_such_module_here'], lambda: 'engine')
+    warmup.start()
+    assert warmup.get() is None
+
+
+def test_start_screen_does_not_import_the_chart_and_data_stack():
+    code = ("import sys, main; "
+            "print(sorted(m for m in ('pandas', 'matplotlib', 'yfinance', 'screens.game_screen') "
+            "if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '[]'
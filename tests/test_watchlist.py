@@ -0,0 +1,166 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.market_data import MarketDataSource, OHLCV_COLUMNS
+from utils.watchlist import Watchlist
+
+NOW = pd.Timestamp('2024-03-01 12:00', tz='UTC')
+
+
+def bars(start, end, freq, price):
+    index = pd.date_range(start.ceil(freq), end, freq=freq, inclusive='left')
+    close = price + np.arange(len(index), dtype=float)
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1,
+                         'Close': close, 'Volume': 1.0}, index=index)[OHLCV_COLUMNS]
+
+
+class BatchSource(MarketDataSource):
+    """Records each multi-symbol request"""
+
+    def __init__(self):
+        self.requests = []
+        self.prices = {'BTC-USD': 40000.0, 'ETH-USD': 3000.0, 'SOL-USD': 100.0,
+                       'XRP-USD': 0.5, 'DOGE-USD': 0.1}
+
+    def now(self):
+        return NOW
+
+    def history_many(self, symbols, start, end, interval='30m'):
+        self.requests.append(('history', tuple(symbols)))
+        time.sleep(0.05)  # Long enough for a second caller to join in
+        return {symbol: bars(start, end, '30min', self.prices[symbol]) for symbol in symbols}
+
+    def bars_since_many(self, since_by_symbol, interval='1m'):
+        self.requests.append(('prices', tuple(since_by_symbol)))
+        return {symbol: bars(since, NOW, '1min', self.prices[symbol])
+                for symbol, since in since_by_symbol.items()}
+
+
+def test_history_is_fetched_in_batches_and_shared_between_callers(tmp_path):
+    source = BatchSource()
+    watchlist = Watchlist(source=source, data_dir=str(tmp_path), batch_size=2)
+
+    results = {}
+    threads = [threading.Thread(target=lambda: results.update(watchlist.load(['ETH-USD'])))]
+    threads[0].start()
+    time.sleep(0.01)
+    assert all(watchlist.load().values())
+    threads[0].join()
+
+    assert results == {'ETH-USD': True}
+    history = [symbols for kind, symbols in source.requests if kind == 'history']
+    # ETH was joined rather than fetched again, the other four went out two at a time
+    assert sorted(symbol for batch in history for symbol in batch) == sorted(watchlist.symbols)
+    assert len(history) == 3
+
+    watchlist.pin('BTC-USD')
+    assert all(watchlist.refresh_prices().values())
+    assert source.requests[-1][0] == 'prices'
+    assert watchlist.get('SOL-USD').current_price is not None
+    watchlist.shutdown()
+
+
+def test_memory_budget_unloads_least_recently_used_symbols(tmp_path):
+    source = BatchSource()
+    watchlist = Watchlist(source=source, data_dir=str(tmp_path))
+    watchlist.load()
+    one_symbol = watchlist.get('BTC-USD').memory_usage()
+
+    watchlist.pin('DOGE-USD')
+    watchlist.get('ETH-USD')  # Most recently used
+    watchlist.memory_budget = one_symbol * 2.5
+    watchlist.enforce_budget()
+
+    loaded = [symbol for symbol, manager in watchlist.managers.items() if manager.has_data()]
+    assert sorted(loaded) == ['DOGE-USD', 'ETH-USD']
+    assert watchlist.memory_usage() <= watchlist.memory_budget
+
+    # Evicted symbols come back from their store, not the network
+    requests = len(source.requests)
+    assert watchlist.load(['BTC-USD']) == {'BTC-USD': True}
+    assert len(source.requests) == requests
+    watchlist.shutdown()
+
+
+class GappySource(BatchSource):
+    """Has no bars in `closed`, fails the first `failures` requests and notes when each ran"""
+
+    def __init__(self, closed=None, failures=0):
+        super().__init__()
+        self.closed = closed
+        self.failures = failures
+        self.spans = []
+        self.time = NOW
+
+    def now(self):
+        return self.time
+
+    def history_many(self, symbols, start, end, interval='30m'):
+        started = time.monotonic()
+        self.requests.append(('history', tuple(symbols), start, end))
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("rate limited")
+        time.sleep(0.05)
+        frames = {symbol: bars(start, end, '30min', self.prices[symbol]) for symbol in symbols}
+        if self.closed is not None:
+            frames = {symbol: data[(data.index < self.closed[0]) | (data.index >= self.closed[1])]
+                      for symbol, data in frames.items()}
+        self.spans.append(('history', started, time.monotonic()))
+        return frames
+
+    def bars_since_many(self, since_by_symbol, interval='1m'):
+        started = time.monotonic()
+        frames = super().bars_since_many(since_by_symbol, interval)
+        self.spans.append(('prices', started, time.monotonic()))
+        return frames
+
+
+def test_batched_loads_go_through_the_fetch_planners(tmp_path):
+    closed = (NOW - pd.Timedelta(days=20), NOW - pd.Timedelta(days=18))
+    source = GappySource(closed=closed, failures=1)
+    watchlist = Watchlist(symbols=['BTC-USD', 'ETH-USD'], source=source, data_dir=str(tmp_path))
+    sleeps = []
+    for symbol in watchlist.symbols:
+        watchlist.get(symbol).planner.sleep = sleeps.append
+
+    # A cold start is one request for both, retried with the planner's backoff
+    assert all(watchlist.load().values())
+    assert [request[1] for request in source.requests] == [('BTC-USD', 'ETH-USD')] * 2
+    assert sleeps == [1.0]
+
+    # Restarted later: the hole inside the data is asked for once for both
+    # symbols, then remembered, while the tails keep going out together
+    for hours in [3, 6]:
+        source.requests.clear()
+        for symbol in watchlist.symbols:
+            watchlist.get(symbol).unload()
+        source.time = NOW + pd.Timedelta(hours=hours)
+        assert all(watchlist.load().values())
+        assert [request[1] for request in source.requests][-1] == ('BTC-USD', 'ETH-USD')
+        assert source.requests[-1][2] >= source.time - pd.Timedelta(hours=3, minutes=30)
+        assert len(source.requests) == (2 if hours == 3 else 1)
+    for symbol in watchlist.symbols:
+        assert watchlist.get(symbol).planner.is_checked(*closed)
+        assert watchlist.get(symbol).store.meta('checked') == watchlist.get(symbol).planner.checked
+    watchlist.shutdown()
+
+
+def test_a_symbol_is_never_loaded_and_refreshed_at_once(tmp_path):
+    source = GappySource()
+    watchlist = Watchlist(symbols=['BTC-USD', 'ETH-USD'], source=source, data_dir=str(tmp_path))
+
+    loading = threading.Thread(target=watchlist.load)
+    loading.start()
+    time.sleep(0.01)
+    assert all(watchlist.refresh_prices(['BTC-USD', 'ETH-USD']).values())
+    loading.join()
+
+    # The price refresh waited for the history load instead of racing it
+    (first, _, history_done), (second, prices_started, _) = sorted(source.spans, key=lambda span: span[1])
+    assert (first, second) == ('history', 'prices')
+    assert prices_started >= history_done
+    watchlist.shutdown()
@@ -0,0 +1,75 @@
+# utils/autosave.py
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Autosaver:
+    """
+    Debounced background saves. Callers mark which keys of the player state
+    changed; the first change opens a window of `delay_ms` and everything
+    marked during it goes out in one write. The values are snapshotted on
+    the Tk thread when the window closes and written by a single worker
+    thread, so writes stay in order and the UI never waits on the disk.
+
+    read(keys) returns {key: value} for the dirty keys, write(snapshot)
+    persists them (atomically, e.g. one SQLite transaction).
+    """
+
+    def __init__(self, widget, read, write, delay_ms=2000):
+        self.widget = widget
+        self.read = read
+        self.write = write
+        self.delay_ms = delay_ms
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='autosave')
+        self._dirty = set()
+        self._lock = threading.Lock()  # The worker puts keys back if a write fails
+        self._after_id = None
+        self._last_write = None
+
+    def mark_dirty(self, *keys):
+        """Must be called on the Tk thread"""
+        with self._lock:
+            self._dirty.update(keys)
+        if self._after_id is None:
+            self._after_id = self.widget.after(self.delay_ms, self._on_timer)
+
+    def is_dirty(self):
+        with self._lock:
+            return bool(self._dirty)
+
+    def flush(self, wait=False):
+        """Writes pending changes now, blocking until they're on disk if wait is set"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self._submit()
+        if wait and self._last_write is not None:
+            self._last_write.result()
+
+    def shutdown(self):
+        self.flush(wait=True)
+        self.executor.shutdown(wait=True)
+
+    def _on_timer(self):
+        self._after_id = None
+        self._submit()
+
+    def _submit(self):
+        with self._lock:
+            keys, self._dirty = self._dirty, set()
+        if not keys:
+            return
+
+        # Copied now so later trades can't change what this write sees
+        snapshot = copy.deepcopy(self.read(keys))
+        self._last_write = self.executor.submit(self._write, snapshot)
+
+    def _write(self, snapshot):
+        try:
+            self.write(snapshot)
+        except Exception as e:
+            print(f"Error autosaving: {e}")
+            with self._lock:
+                # Picked up again by the next write
+                self._dirty.update(snapshot)
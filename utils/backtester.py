@@ -0,0 +1,291 @@
+# utils/backtester.py
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from utils.indicators import RSI
+from utils.order_engine import OrderEngine
+from utils.portfolio import Ledger
+
+MINUTES_PER_YEAR = 365 * 1440  # Crypto trades around the clock
+
+
+class BacktestResult:
+    """Equity curve of one run plus the usual summary numbers"""
+
+    def __init__(self, equity, timestamps, trades, bar_minutes, initial_cash, liquidations=0):
+        self.equity = equity
+        self.initial_cash = initial_cash
+        self.timestamps = timestamps
+        self.trades = trades
+        self.liquidations = liquidations
+        self.bar_minutes = bar_minutes
+
+    @property
+    def total_return(self):
+        return self.equity[-1] / self.initial_cash - 1
+
+    @property
+    def max_drawdown(self):
+        peaks = np.maximum(np.maximum.accumulate(self.equity), self.initial_cash)
+        return float(np.max(1 - self.equity / peaks))
+
+    @property
+    def sharpe(self):
+        equity = np.insert(self.equity, 0, self.initial_cash)
+        returns = np.diff(equity) / equity[:-1]
+        std = returns.std()
+        if std == 0:
+            return 0.0
+        return float(returns.mean() / std * np.sqrt(MINUTES_PER_YEAR / self.bar_minutes))
+
+    def summary(self):
+        return {
+            'total_return': self.total_return,
+            'max_drawdown': self.max_drawdown,
+            'sharpe': self.sharpe,
+            'trades': self.trades,
+            'liquidations': self.liquidations,
+            'final_equity': self.equity[-1]
+        }
+
+    def to_series(self):
+        return pd.Series(self.equity, index=self.timestamps, name='equity')
+
+
+class Backtester:
+    """
+    Vectorized backtests over a candle DataFrame (e.g. PriceManager.get_candles).
+
+    A strategy is a function strategy(backtester, **params) that returns the
+    target position for every bar (0 = flat, 1 = all in, negative = short),
+    decided on the bar's close and held through the next bar. Parameters
+    arrive as 1-D arrays, one entry per configuration, and the strategy
+    returns a (configs, bars) array. That way a parameter sweep evaluates
+    a whole block of configurations in a handful of NumPy operations.
+    Strategies that can only take scalars can be passed with vectorized=False.
+
+    Fees are charged on turnover at the close the position changes. For
+    path-dependent logic such as resting limit orders use EventBacktester.
+    """
+
+    def __init__(self, candles, bar_minutes=30, fee_rate=0.001, initial_cash=10000.0,
+                 chunk_elements=4_000_000):
+        self.candles = candles
+        self.bar_minutes = bar_minutes
+        self.fee_rate = fee_rate
+        self.initial_cash = initial_cash
+        self.chunk_elements = chunk_elements  # Bounds the memory of one block of configurations
+
+        self.timestamps = candles.index
+        self.open = candles['Open'].to_numpy(dtype=float)
+        self.high = candles['High'].to_numpy(dtype=float)
+        self.low = candles['Low'].to_numpy(dtype=float)
+        self.close = candles['Close'].to_numpy(dtype=float)
+        self.volume = candles['Volume'].to_numpy(dtype=float)
+        self.returns = np.zeros(len(self.close))
+        self.returns[1:] = self.close[1:] / self.close[:-1] - 1
+        self._cache = {}
+
+    @classmethod
+    def from_price_manager(cls, price_manager, timeframe='30m', **kwargs):
+        # A copy, the manager updates its frames in place as live bars arrive
+        return cls(price_manager.get_candles(timeframe).copy(),
+                   bar_minutes=price_manager.timeframes[timeframe], **kwargs)
+
+    # Shared building blocks, computed once per backtester
+
+    def sma(self, period):
+        key = ('sma', int(period))
+        if key not in self._cache:
+            sums = np.cumsum(np.insert(self.close, 0, 0.0))
+            values = np.full(len(self.close), np.nan)
+            values[period - 1:] = (sums[period:] - sums[:-period]) / period
+            self._cache[key] = values
+        return self._cache[key]
+
+    def rsi(self, period):
+        key = ('rsi', int(period))
+        if key not in self._cache:
+            indicator = RSI(int(period))
+            self._cache[key] = indicator.seed({'close': self.close})[indicator.names[0]]
+        return self._cache[key]
+
+    # Running strategies
+
+    def run(self, strategy, **params):
+        positions = np.asarray(strategy(self, **{name: np.atleast_1d(value)
+                                                 for name, value in params.items()}), dtype=float)
+        equity, trades = self._simulate(np.atleast_2d(positions))
+        return BacktestResult(equity[0], self.timestamps, int(trades[0]), self.bar_minutes,
+                              self.initial_cash)
+
+    def sweep(self, strategy, grid, vectorized=True):
+        """
+        Runs every combination of the parameter lists in `grid` and returns
+        a DataFrame of parameters and summary numbers, best return first.
+        """
+        names = list(grid)
+        combos = list(itertools.product(*(grid[name] for name in names)))
+        params = {name: np.array([combo[i] for combo in combos]) for i, name in enumerate(names)}
+
+        rows = max(1, self.chunk_elements // max(len(self.close), 1))
+        results = []
+        for start in range(0, len(combos), rows):
+            block = {name: values[start:start + rows] for name, values in params.items()}
+            if vectorized:
+                positions = strategy(self, **block)
+            else:
+                positions = np.stack([
+                    strategy(self, **{name: values[i] for name, values in block.items()})
+                    for i in range(len(next(iter(block.values()))))
+                ])
+            results.append(self._summarize(np.atleast_2d(np.asarray(positions, dtype=float))))
+
+        table = pd.DataFrame(params)
+        for column in results[0]:
+            table[column] = np.concatenate([block[column] for block in results])
+        return table.sort_values('total_return', ascending=False, ignore_index=True)
+
+    def _simulate(self, positions):
+        positions = np.nan_to_num(positions)
+        held = np.zeros_like(positions)
+        held[:, 1:] = positions[:, :-1]  # Decided on the previous close
+        turnover = np.abs(np.diff(positions, axis=1, prepend=0.0))
+        growth = (1 + held * self.returns) * (1 - self.fee_rate * turnover)
+        equity = self.initial_cash * np.cumprod(growth, axis=1)
+        trades = np.count_nonzero(turnover, axis=1)
+        return equity, trades
+
+    def _summarize(self, positions):
+        equity, trades = self._simulate(positions)
+        peaks = np.maximum(np.maximum.accumulate(equity, axis=1), self.initial_cash)
+        equity_from_start = np.insert(equity, 0, self.initial_cash, axis=1)
+        returns = np.diff(equity_from_start, axis=1) / equity_from_start[:, :-1]
+        std = returns.std(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where(std > 0, returns.mean(axis=1) / std, 0.0)
+        return {
+            'total_return': equity[:, -1] / self.initial_cash - 1,
+            'max_drawdown': np.max(1 - equity / peaks, axis=1),
+            'sharpe': sharpe * np.sqrt(MINUTES_PER_YEAR / self.bar_minutes),
+            'trades': trades,
+            'final_equity': equity[:, -1]
+        }
+
+
+# Built-in strategies, all vectorized over their parameters
+
+def sma_crossover(bt, fast, slow):
+    """Long while the fast SMA is above the slow one"""
+    fast_sma = np.stack([bt.sma(period) for period in fast])
+    slow_sma = np.stack([bt.sma(period) for period in slow])
+    return (fast_sma > slow_sma).astype(float)  # NaN while warming up compares False
+
+
+def rsi_reversion(bt, period, lower, upper):
+    """Buys when RSI drops below `lower`, sells once it gets above `upper`"""
+    rsi = np.stack([bt.rsi(p) for p in period])
+    signal = np.where(rsi < lower[:, None], 1.0, np.where(rsi > upper[:, None], 0.0, np.nan))
+
+    # Hold the last signal: forward fill along each row
+    seen = np.where(np.isnan(signal), 0, np.arange(signal.shape[1]))
+    last = np.maximum.accumulate(seen, axis=1)
+    positions = np.take_along_axis(signal, last, axis=1)
+    return np.nan_to_num(positions)
+
+
+class EventContext:
+    """What an event-driven strategy sees on each bar"""
+
+    def __init__(self, backtester, ledger, orders):
+        self.bt = backtester
+        self.ledger = ledger
+        self.orders = orders
+        self.i = 0
+
+    @property
+    def price(self):
+        return self.bt.close[self.i]
+
+    # Trades go through the same Ledger checks as the game's buttons and
+    # return False where the game would show a warning instead
+
+    def buy(self, quantity):
+        """Market buy at this bar's close"""
+        return self._trade(self.ledger.buy_spot, quantity, self.price,
+                           quantity * self.price * self.bt.fee_rate)
+
+    def sell(self, quantity):
+        return self._trade(self.ledger.sell_spot, quantity, self.price,
+                           quantity * self.price * self.bt.fee_rate)
+
+    def open_position(self, side, quantity, leverage=1):
+        return self._trade(self.ledger.open_position, side, quantity, self.price, leverage)
+
+    def close_positions(self):
+        for position_id in list(self.ledger.positions):
+            self.ledger.close_position(position_id, self.price)
+
+    def place(self, side, kind, price, quantity):
+        """
+        Resting limit or stop order, filled against the following bars. None
+        if the game would refuse it (Session.place_order's funds checks)
+        """
+        try:
+            self.ledger.check_order(side, price, quantity)
+        except ValueError:
+            return None
+        return self.orders.place(side, kind, price, quantity)
+
+    def _trade(self, func, *args):
+        try:
+            func(*args)
+            return True
+        except ValueError:
+            return False
+
+
+class EventBacktester:
+    """
+    Bar-by-bar fallback for strategies whose outcome depends on the path,
+    e.g. limit and stop orders. It runs the game's own OrderEngine and
+    Ledger, with the order checks and fill booking Session uses, so fills,
+    gaps and funds checks behave exactly as they do in play.
+    strategy(context) is called on every bar's close.
+    """
+
+    def __init__(self, candles, bar_minutes=30, fee_rate=0.001, initial_cash=10000.0):
+        self.bt = Backtester(candles, bar_minutes, fee_rate, initial_cash)
+
+    def run(self, strategy):
+        bt = self.bt
+        counts = {event_type: 0 for event_type in Ledger.TRADE_EVENTS}
+
+        def on_event(event):
+            if event['type'] in counts:
+                counts[event['type']] += 1
+
+        ledger = Ledger(bt.initial_cash, on_event=on_event)
+
+        def on_fill(order):
+            # Booked like Session._on_order_filled does, plus the fee
+            ledger.fill_order(order, order.fill_price * order.quantity * bt.fee_rate)
+
+        orders = OrderEngine(on_fill=on_fill)
+        context = EventContext(bt, ledger, orders)
+        equity = np.empty(len(bt.close))
+
+        for i in range(len(bt.close)):
+            context.i = i
+            if orders.orders:
+                orders.process_bar(bt.high[i], bt.low[i], bt.open[i], bt.timestamps[i])
+            ledger.on_bar(bt.high[i], bt.low[i], bt.close[i])
+            strategy(context)
+            ledger.on_price(bt.close[i])
+            equity[i] = ledger.equity
+
+        liquidations = counts.pop('liquidation')
+        return BacktestResult(equity, bt.timestamps, sum(counts.values()), bt.bar_minutes,
+                              bt.initial_cash, liquidations)
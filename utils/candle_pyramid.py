@@ -0,0 +1,139 @@
+# utils/candle_pyramid.py
+import numpy as np
+
+NS_PER_MINUTE = 60 * 10**9
+# The epoch falls on a Thursday, weekly buckets start on Monday
+WEEK_OFFSET_NS = 4 * 1440 * NS_PER_MINUTE
+
+FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+
+def bucket_offset(minutes):
+    return WEEK_OFFSET_NS if minutes % 10080 == 0 else 0
+
+
+def aggregate(bars, minutes):
+    """
+    Groups bars (dict of equal-length arrays, sorted by epoch-ns timestamp)
+    into `minutes` buckets. Each column is reduced with a single
+    np.*.reduceat over the bucket boundaries; empty buckets are skipped.
+    """
+    ts = bars['timestamp']
+    if len(ts) == 0:
+        return {field: bars[field][:0].copy() for field in FIELDS}
+
+    width = minutes * NS_PER_MINUTE
+    offset = bucket_offset(minutes)
+    bucket = (ts - offset) // width
+    starts = np.flatnonzero(np.diff(bucket, prepend=bucket[0] - 1))
+    ends = np.append(starts[1:], len(ts)) - 1
+
+    return {
+        'timestamp': bucket[starts] * width + offset,
+        'open': bars['open'][starts],
+        'high': np.maximum.reduceat(bars['high'], starts),
+        'low': np.minimum.reduceat(bars['low'], starts),
+        'close': bars['close'][ends],
+        'volume': np.add.reduceat(bars['volume'], starts),
+    }
+
+
+class CandlePyramid:
+    """
+    Every timeframe built from one set of base bars and kept as contiguous
+    arrays. Levels are built finest first and each one is reduced from the
+    finest already-built level that nests inside it (1h -> 4h -> 1d -> 1w),
+    so a full build touches the base bars only once.
+
+    Each level is backed by over-allocated buffers and `levels` holds views
+    of the filled part, so updating the trailing buckets writes in place.
+    Copy a level if you need it to stay fixed across updates.
+    """
+
+    def __init__(self, timeframes):
+        self.timeframes = {}
+        self.sources = {}  # level -> finer level it is reduced from, None = base bars
+        self.levels = {}
+        self._buffers = {}
+        for name, minutes in timeframes.items():
+            self.add_timeframe(name, minutes)
+
+    def add_timeframe(self, name, minutes, base=None):
+        """Registers a timeframe, building it right away if base bars are given"""
+        self.timeframes[name] = minutes
+        self.timeframes = dict(sorted(self.timeframes.items(), key=lambda item: item[1]))
+
+        self.sources = {}
+        for level, level_minutes in self.timeframes.items():
+            self.sources[level] = None
+            for finer, finer_minutes in self.timeframes.items():
+                if finer_minutes >= level_minutes:
+                    break
+                if level_minutes % finer_minutes == 0 and \
+                        bucket_offset(level_minutes) % (finer_minutes * NS_PER_MINUTE) == 0:
+                    self.sources[level] = finer
+
+        if base is not None:
+            source = self.sources[name]
+            self._store(name, 0, aggregate(base if source is None else self.levels[source], minutes))
+
+    def build(self, base):
+        """Builds every level from scratch"""
+        for name, minutes in self.timeframes.items():
+            source = self.sources[name]
+            self._store(name, 0, aggregate(base if source is None else self.levels[source], minutes))
+
+    def rebuild_start(self, since_ns):
+        """Earliest base timestamp update() needs when bars from since_ns changed"""
+        return min(self._floor(since_ns, minutes) for minutes in self.timeframes.values())
+
+    def update(self, base_tail, since_ns):
+        """
+        Recomputes only the trailing buckets of each level. base_tail must
+        hold every base bar from rebuild_start(since_ns) onwards.
+        """
+        if not self.levels:
+            self.build(base_tail)
+            return
+
+        for name, minutes in self.timeframes.items():
+            first_bucket = self._floor(since_ns, minutes)
+            source = self.sources[name]
+            bars = base_tail if source is None else self.levels[source]
+
+            start = np.searchsorted(bars['timestamp'], first_bucket)
+            tail = aggregate({field: bars[field][start:] for field in FIELDS}, minutes)
+
+            keep = np.searchsorted(self.levels[name]['timestamp'], first_bucket)
+            self._store(name, keep, tail)
+
+    @property
+    def nbytes(self):
+        return sum(buffer.nbytes for buffers in self._buffers.values() for buffer in buffers.values())
+
+    def clear(self):
+        """Drops every level and its buffers, build() starts over"""
+        self.levels = {}
+        self._buffers = {}
+
+    def _store(self, name, start, rows):
+        """Writes rows into a level's buffers from row `start` on, growing them if needed"""
+        size = start + len(rows['timestamp'])
+        buffers = self._buffers.get(name)
+        if buffers is None or size > len(buffers['timestamp']):
+            capacity = max(size + size // 2, 64)
+            grown = {field: np.empty(capacity, dtype=rows[field].dtype) for field in FIELDS}
+            if buffers is not None:
+                for field in FIELDS:
+                    grown[field][:start] = buffers[field][:start]
+            buffers = self._buffers[name] = grown
+
+        for field in FIELDS:
+            buffers[field][start:size] = rows[field]
+        self.levels[name] = {field: buffers[field][:size] for field in FIELDS}
+
+    @staticmethod
+    def _floor(ts, minutes):
+        width = minutes * NS_PER_MINUTE
+        offset = bucket_offset(minutes)
+        return (ts - offset) // width * width + offset
@@ -0,0 +1,205 @@
+# utils/candle_store.py
+import numpy as np
+import pandas as pd
+
+from utils.candle_pyramid import FIELDS
+
+# Array field -> DataFrame column
+COLUMNS = dict(zip(FIELDS[1:], ['Open', 'High', 'Low', 'Close', 'Volume']))
+
+
+def frame_arrays(data):
+    """DataFrame of OHLCV bars -> dict of arrays with epoch-ns UTC timestamps"""
+    index = data.index if data.index.tz is not None else data.index.tz_localize('UTC')
+    arrays = {'timestamp': index.tz_convert('UTC').as_unit('ns').asi8}
+    for field, column in COLUMNS.items():
+        arrays[field] = data[column].to_numpy(dtype='float64')
+    return arrays
+
+
+def sorted_unique(rows):
+    """Sorts rows by timestamp, keeping the last of any duplicate timestamps"""
+    ts = rows['timestamp']
+    if len(ts) > 1 and not (np.diff(ts) > 0).all():
+        order = np.argsort(ts, kind='stable')
+        ts = ts[order]
+        last = np.append(ts[1:] != ts[:-1], True)
+        rows = {field: rows[field][order][last] for field in FIELDS}
+    return rows
+
+
+class CandleArray:
+    """
+    Candles as contiguous columns: int64 epoch-ns timestamps (UTC) and
+    OHLCV in `dtype`. float32 takes a candle from 48 to 28 bytes (the
+    timestamps stay int64) if a few digits of price precision can go.
+    The buffers are over-allocated, so appending bars or revising the
+    live one writes in place; a DataFrame is only built when someone
+    asks for one.
+    """
+
+    def __init__(self, dtype='float64'):
+        self.dtype = np.dtype(dtype)
+        self._buffers = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def arrays(self, lo=0, hi=None):
+        """Views of the filled rows, they change with the next merge"""
+        hi = self.size if hi is None else hi
+        if self._buffers is None:
+            return {field: np.empty(0, dtype=np.int64 if field == 'timestamp' else self.dtype)
+                    for field in FIELDS}
+        return {field: self._buffers[field][lo:hi] for field in FIELDS}
+
+    @property
+    def timestamps(self):
+        return self.arrays()['timestamp']
+
+    def last(self, field):
+        return self._buffers[field][self.size - 1] if self.size else None
+
+    def search(self, ts):
+        """First row at or after epoch-ns `ts`"""
+        return int(np.searchsorted(self.timestamps, ts))
+
+    @property
+    def nbytes(self):
+        if self._buffers is None:
+            return 0
+        return sum(buffer.nbytes for buffer in self._buffers.values())
+
+    def merge(self, rows):
+        """
+        Merges rows (dict of arrays keyed by FIELDS); a row with a stored
+        timestamp replaces it. Returns the earliest timestamp that changed,
+        None if there were no rows.
+        """
+        rows = sorted_unique(rows)
+        if len(rows['timestamp']) == 0:
+            return None
+
+        first = int(rows['timestamp'][0])
+        if self.size == 0 or first >= self.last('timestamp'):
+            # Appending or revising the live bar, the common case for updates
+            self._write(self.search(first), rows)
+        else:
+            stored = self.arrays()
+            combined = {field: np.concatenate([stored[field], rows[field]]) for field in FIELDS}
+            self.size = 0
+            self._write(0, sorted_unique(combined))
+        return first
+
+    def load(self, rows, spare=1024):
+        """
+        Replaces everything with rows, e.g. the columns of an OHLCVStore,
+        leaving room for `spare` more bars instead of growing by half
+        """
+        self._buffers = None
+        self.size = 0
+        self._write(0, rows, spare)
+
+    def clear(self):
+        self._buffers = None
+        self.size = 0
+
+    def index(self, tz='UTC', lo=0, hi=None):
+        timestamps = self.arrays(lo, hi)['timestamp'].copy()  # The buffer changes in place
+        return pd.DatetimeIndex(pd.to_datetime(timestamps, unit='ns', utc=True)).tz_convert(tz)
+
+    def to_frame(self, tz='UTC', lo=0, hi=None):
+        """Copies the rows lo:hi out as a DataFrame with the usual OHLCV columns"""
+        arrays = self.arrays(lo, hi)
+        return pd.DataFrame({column: arrays[field].copy() for field, column in COLUMNS.items()},
+                            index=self.index(tz, lo, hi))
+
+    def _write(self, start, rows, spare=None):
+        size = start + len(rows['timestamp'])
+        buffers = self._buffers
+        if buffers is None or size > len(buffers['timestamp']):
+            capacity = max(size + (size // 2 if spare is None else spare), 64)
+            grown = {field: np.empty(capacity, dtype=np.int64 if field == 'timestamp' else self.dtype)
+                     for field in FIELDS}
+            if buffers is not None:
+                for field in FIELDS:
+                    grown[field][:start] = buffers[field][:start]
+            buffers = self._buffers = grown
+
+        for field in FIELDS:
+            buffers[field][start:size] = rows[field]
+        self.size = size
+
+
+class RingBuffer:
+    """
+    The last `capacity` bars in preallocated arrays. append() is O(1) and
+    allocates nothing; once full the oldest bar is overwritten.
+    """
+
+    def __init__(self, capacity, dtype='float64'):
+        self.capacity = capacity
+        self._timestamps = np.zeros(capacity, dtype=np.int64)
+        self._values = np.zeros((len(FIELDS) - 1, capacity), dtype=dtype)
+        self._start = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, ts, open_, high, low, close, volume):
+        """Adds a bar, or replaces the newest one if it has the same timestamp"""
+        if self.size and ts == self.last_timestamp:
+            slot = (self._start + self.size - 1) % self.capacity
+        elif self.size < self.capacity:
+            slot = (self._start + self.size) % self.capacity
+            self.size += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+        self._timestamps[slot] = ts
+        values = self._values
+        values[0, slot] = open_
+        values[1, slot] = high
+        values[2, slot] = low
+        values[3, slot] = close
+        values[4, slot] = volume
+
+    @property
+    def first_timestamp(self):
+        return int(self._timestamps[self._start]) if self.size else None
+
+    @property
+    def last_timestamp(self):
+        return int(self._timestamps[(self._start + self.size - 1) % self.capacity]) if self.size else None
+
+    def clear(self):
+        self._start = 0
+        self.size = 0
+
+    def summary(self):
+        """(open, high, low, close, volume) of all the bars as one bar, reduced in place"""
+        if not self.size:
+            return None
+        first = self._start
+        last = (self._start + self.size - 1) % self.capacity
+        values = self._values
+        if first + self.size <= self.capacity:
+            held = values[:, first:first + self.size]
+            high, low, volume = held[1].max(), held[2].min(), held[4].sum()
+        else:
+            # Wrapped around, reduce both halves
+            head, tail = values[:, first:], values[:, :last + 1]
+            high = max(head[1].max(), tail[1].max())
+            low = min(head[2].min(), tail[2].min())
+            volume = head[4].sum() + tail[4].sum()
+        return values[0, first], high, low, values[3, last], volume
+
+    def arrays(self):
+        """Copies of the bars oldest first"""
+        order = (self._start + np.arange(self.size)) % self.capacity
+        arrays = {'timestamp': self._timestamps[order]}
+        for row, field in enumerate(FIELDS[1:]):
+            arrays[field] = self._values[row, order]
+        return arrays
@@ -1,15 +1,48 @@
-import matplotlib.pyplot as plt
-import mplfinance as mpf
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba
 from matplotlib.dates import DateFormatter, AutoDateLocator
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.transforms import Bbox
 import tkinter as tk
-from datetime import datetime, timedelta
+from utils.indicators import PRICE_OVERLAYS, OSCILLATORS
+
+NS_PER_DAY = 86400 * 10**9
 
 
 class ChartManager:
+    """
+    Candlestick chart built from a fixed set of artists. The closed candles
+    live in one LineCollection (wicks) and one PolyCollection (bodies) whose
+    vertex and colour arrays are swapped on refresh; the live last candle has
+    its own animated artists so a price tick only blits that candle's area
+    over a cached background instead of redrawing the whole figure.
+
+    Scrolling zooms and dragging pans over the whole history. When the view
+    is too wide for the selected timeframe the chart switches to the next
+    coarser one from `lod_levels`, so at most `max_candles` are ever drawn.
+    Double-click to snap back to the latest candles.
+
+    Indicators are lines over the candles (PRICE_OVERLAYS) or in a panel
+    below them (OSCILLATORS). Their values come precomputed from
+    `indicator_source`, aligned with the candles, and the lines are animated
+    artists so a live update redraws them along with the live candle.
+
+    The prepared state of the last `render_cache_size` timeframes (candle
+    geometry, limits and the rendered background) is kept, so switching
+    back to one whose candles haven't changed is a restore and a blit.
+    """
+
     def __init__(self, frame):
         self.frame = frame
-        self.figure, self.ax = plt.subplots(figsize=(10, 6))
+        # A bare Figure, pyplot's global figure manager isn't needed inside Tk
+        self.figure = Figure(figsize=(10, 6))
+        self.ax = self.figure.add_subplot()
         self.canvas = FigureCanvasTkAgg(self.figure, master=self.frame)
 
         # Configure how many candles to show for each timeframe
@@ -24,7 +57,32 @@ class ChartManager:
             '30m': 0.02,  # About half an hour in days
             '1h': 0.04,   # About an hour in days
             '4h': 0.15,   # About 4 hours in days
-            '1d': 0.8     # Most of a day
+            '1d': 0.8,    # Most of a day
+            '1w': 5.6     # Most of a week
+        }
+
+        # Level-of-detail ladder, finest first, used when zoomed out
+        self.lod_levels = ['30m', '1h', '4h', '1d', '1w']
+        self.level_minutes = {'30m': 30, '1h': 60, '4h': 240, '1d': 1440, '1w': 10080}
+        self.max_candles = 400
+        self.candle_source = None  # Callable returning candles for a timeframe
+        self.indicator_source = None  # Callable returning indicator values for a timeframe
+        self.history_source = None  # Callable paging in candles from a timestamp, True if it did
+        self.overlays = []  # Shown on the candles
+        self.oscillator = None  # Shown in the panel below
+        self.osc_ax = None
+        self._indicator_lines = {}  # Indicator output name -> Line2D
+        self.indicator_colors = {
+            'sma_20': '#ff9800',
+            'ema_50': '#2962ff',
+            'bb_upper': '#9c27b0',
+            'bb_middle': '#ce93d8',
+            'bb_lower': '#9c27b0',
+            'vwap': '#795548',
+            'rsi_14': '#7e57c2',
+            'macd': '#2962ff',
+            'macd_signal': '#ff6d00',
+            'atr_14': '#00897b'
         }
 
         self.style = {
@@ -34,84 +92,433 @@ class ChartManager:
             'grid_color': '#2c2c2c',
             'bg_color': 'white'
         }
+        self._up_rgba = np.array(to_rgba(self.style['up_color']))
+        self._down_rgba = np.array(to_rgba(self.style['down_color']))
 
         # Configure the plot
         self.ax.set_facecolor(self.style['bg_color'])
         self.figure.patch.set_facecolor(self.style['bg_color'])
         self.ax.grid(True, color=self.style['grid_color'], linestyle='--', alpha=0.3)
+        self.ax.set_xlabel('')
+        self.ax.tick_params(axis='x', labelrotation=45)
+        for spine in self.ax.spines.values():
+            spine.set_color(self.style['grid_color'])
+            spine.set_alpha(0.3)
+        # Fixed margins instead of tight_layout on every refresh
+        self.figure.subplots_adjust(left=0.09, right=0.98, top=0.93, bottom=0.18)
+        self._full_position = self.ax.get_position()
+
+        # Artists are created once and only have their data replaced
+        self.wicks = LineCollection([], linewidths=1)
+        self.bodies = PolyCollection([], linewidths=0)
+        self.live_wick = LineCollection([], linewidths=1, animated=True)
+        self.live_body = PolyCollection([], linewidths=0, animated=True)
+        for artist in (self.wicks, self.bodies, self.live_wick, self.live_body):
+            self.ax.add_collection(artist)
+
+        self.symbol = 'BTC/USD'  # Shown in the title
+        self.timeframe = None  # Selected by the player
+        self.level = None  # Actually drawn, may be coarser when zoomed out
+        self.view = None  # (x_min, x_max) in days, None follows the latest candles
+        self._data = None
+        self._drag = None
+        self._history_key = None  # Identifies the closed candles currently drawn
+        self._revision = None  # Of the data, changes whenever a closed candle does
+        self._background = None
+        self._live_bbox = None
+        self.render_cache_size = 6
+        self._render_cache = OrderedDict()  # (symbol, timeframe) -> prepared state, oldest first
+        self._cache_key = None  # Entry matching what's drawn, None while panned or zoomed
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.mpl_connect('scroll_event', self._on_scroll)
+        self.canvas.mpl_connect('button_press_event', self._on_press)
+        self.canvas.mpl_connect('motion_notify_event', self._on_motion)
+        self.canvas.mpl_connect('button_release_event', self._on_release)
+
+    def set_candle_source(self, candle_source, indicator_source=None, history_source=None):
+        """
+        Lets the chart pull coarser timeframes (and their indicators) when
+        zoomed out, and older candles when panned back past the first one
+        """
+        self.candle_source = candle_source
+        self.indicator_source = indicator_source
+        self.history_source = history_source
+
+    def set_indicators(self, overlays=(), oscillator=None):
+        """Picks the PRICE_OVERLAYS and the one OSCILLATORS entry (or None) to draw"""
+        for line in self._indicator_lines.values():
+            line.remove()
+        self._indicator_lines = {}
+        self.overlays = list(overlays)
+        self.oscillator = oscillator
+        self._set_oscillator_panel(oscillator is not None)
+
+        for name in self.overlays:
+            for output in PRICE_OVERLAYS[name]:
+                self._add_indicator_line(self.ax, output)
+        if oscillator is not None:
+            for output in OSCILLATORS[oscillator]:
+                self._add_indicator_line(self.osc_ax, output)
+            self.osc_ax.set_ylabel(oscillator, fontsize=8)
 
-    def update_chart(self, data, timeframe):
-        self.ax.clear()
+        self._history_key = None
+        self._render_cache.clear()  # The backgrounds show the old panels
+        if self._data is not None:
+            self._render()
 
-        # Get only the last N candles based on timeframe
-        n_candles = self.timeframe_candle_count[timeframe]
-        data = data.tail(n_candles)
+    def _add_indicator_line(self, ax, output):
+        line = Line2D([], [], color=self.indicator_colors.get(output, 'gray'),
+                      linewidth=1, animated=True)
+        ax.add_line(line)
+        self._indicator_lines[output] = line
+
+    def _set_oscillator_panel(self, show):
+        if show and self.osc_ax is None:
+            box = self._full_position
+            self.ax.set_position([box.x0, box.y0 + 0.18, box.width, box.height - 0.18])
+            self.osc_ax = self.figure.add_axes([box.x0, box.y0, box.width, 0.14], sharex=self.ax)
+            self.osc_ax.set_facecolor(self.style['bg_color'])
+            self.osc_ax.grid(True, color=self.style['grid_color'], linestyle='--', alpha=0.3)
+            self.osc_ax.tick_params(axis='x', labelrotation=45)
+            self.osc_ax.tick_params(axis='y', labelsize=8)
+            self.ax.tick_params(axis='x', labelbottom=False)
+        elif not show and self.osc_ax is not None:
+            self.osc_ax.remove()
+            self.osc_ax = None
+            self.ax.set_position(self._full_position)
+            self.ax.tick_params(axis='x', labelbottom=True)
+
+    def set_symbol(self, symbol):
+        """Switches the title to another instrument, the next update_chart redraws everything"""
+        if symbol == self.symbol:
+            return
+        self.symbol = symbol
+        self.view = None
+        self.level = None
+        self._history_key = None
+
+    def reset(self):
+        """Forgets the drawn data and view so the figure can be reused for another game"""
+        self._data = None
+        self.view = None
+        self.level = None
+        self._history_key = None
+        self._background = None
+        self._live_bbox = None
+        self._drag = None
+        self._render_cache.clear()
+        self._cache_key = None
+
+    def update_chart(self, data, timeframe, revision=None):
+        """
+        Draws `data`. `revision` (e.g. PriceManager.revision) must change
+        whenever a candle other than the last one does; without it the
+        closed candles are compared value by value.
+        """
+        if timeframe != self.timeframe:
+            self.view = None
+            self.timeframe = timeframe
+        self._data = data
+        self._revision = revision
+        self._render()
+
+    def _visible_candles(self):
+        """Returns (level, candles, lo, hi), rows lo:hi of candles are in the current view"""
+        if self.view is None:
+            # Get only the last N candles based on timeframe
+            count = self.timeframe_candle_count[self.timeframe]
+            return self.timeframe, self._data, max(len(self._data) - count, 0), len(self._data)
+
+        x_min, x_max = self.view
+        span_minutes = (x_max - x_min) * 1440
+        # Panned past the first candle: page in a view's width more, so that
+        # dragging on doesn't go back to the store every few pixels
+        if (self.history_source is not None and self.candle_source is not None
+                and self._to_timestamp(x_min) < self._data.index[0]
+                and self.history_source(self._to_timestamp(2 * x_min - x_max))):
+            self._data = self.candle_source(self.timeframe)
+
+        # Finest level that keeps the candle count bounded
+        level, data = self.timeframe, self._data
+        if self.candle_source is not None:
+            for candidate in self.lod_levels[self.lod_levels.index(self.timeframe):]:
+                level = candidate
+                if span_minutes / self.level_minutes[candidate] <= self.max_candles:
+                    break
+            if level != self.timeframe:
+                data = self.candle_source(level)
+
+        lo, hi = data.index.searchsorted([self._to_timestamp(x_min), self._to_timestamp(x_max)])
+        return level, data, max(lo - 1, 0), min(hi + 1, len(data))
+
+    def _visible_indicators(self, level, data, lo, hi):
+        if not self._indicator_lines or self.indicator_source is None:
+            return {}
+        values = self.indicator_source(level)
+        return {name: values[name][lo:hi] for name in self._indicator_lines
+                if len(values.get(name, ())) == len(data)}
+
+    def _render(self):
+        if self._data is None or self._data.empty:
+            return
+        timeframe, candles, lo, hi = self._visible_candles()
+        data = candles.iloc[lo:hi]
+        if data.empty:
+            return
+
+        x = data.index.as_unit('ns').asi8 / NS_PER_DAY
+        ohlc = data[['Open', 'High', 'Low', 'Close']].to_numpy(dtype=float)
+
+        closed = self._revision if self._revision is not None else ohlc[:-1].tobytes()
+        history_key = (timeframe, self.view, len(x), x[0], x[-1], closed)
+        indicators = self._visible_indicators(timeframe, candles, lo, hi)
+        if history_key == self._history_key and self._live_fits(ohlc[-1]):
+            # Only the live candle changed
+            self._set_candles(self.live_wick, self.live_body, x[-1:], ohlc[-1:], timeframe)
+            self._set_indicator_lines(x, indicators)
+            self._blit_live(x[-1], ohlc[-1], timeframe)
+            return
+
+        # Only the default view of a timeframe is cached, pans and zooms are one-offs
+        self._cache_key = (self.symbol, timeframe) if self.view is None else None
+        cached = self._render_cache.get(self._cache_key)
+        if cached is not None and cached['history_key'] == history_key:
+            if self._restore(cached, timeframe, x, ohlc, indicators):
+                return
+
+        if timeframe != self.level:
+            self._set_level(timeframe)
+
+        candles = self._set_candles(self.wicks, self.bodies, x[:-1], ohlc[:-1], timeframe)
+        self._set_candles(self.live_wick, self.live_body, x[-1:], ohlc[-1:], timeframe)
+
+        self._set_indicator_lines(x, indicators)
 
-        # Get bar width for current timeframe
         bar_width = self.timeframe_bar_width[timeframe]
+        low, high = ohlc[:, 2].min(), ohlc[:, 1].max()
+        for name in self.overlays:
+            for values in (indicators.get(output) for output in PRICE_OVERLAYS[name]):
+                if values is not None and np.isfinite(values).any():
+                    low, high = min(low, np.nanmin(values)), max(high, np.nanmax(values))
+        pad = (high - low) * 0.05 or high * 0.01
+        if self.view is None:
+            self.ax.set_xlim(x[0] - bar_width, x[-1] + bar_width)
+        else:
+            self.ax.set_xlim(*self.view)
+        self.ax.set_ylim(low - pad, high + pad)
+        if self.osc_ax is not None:
+            self._scale_oscillator(indicators)
 
-        # Create candlestick chart
-        up_candles = data[data['Close'] >= data['Open']]
-        down_candles = data[data['Close'] < data['Open']]
+        self._history_key = history_key
+        self._background = None
+        if self._cache_key is not None:
+            self._render_cache[self._cache_key] = {
+                'history_key': history_key,
+                'candles': candles,
+                'xlim': self.ax.get_xlim(),
+                'ylim': self.ax.get_ylim(),
+                'osc_ylim': self.osc_ax.get_ylim() if self.osc_ax is not None else None,
+                'background': None,  # Filled in by the draw
+                'size': None
+            }
+            self._render_cache.move_to_end(self._cache_key)
+            while len(self._render_cache) > self.render_cache_size:
+                self._render_cache.popitem(last=False)
+        self.canvas.draw_idle()
 
-        # Plot up candles
-        self.ax.vlines(up_candles.index, up_candles['Low'], up_candles['High'],
-                       color=self.style['up_color'], linewidth=1)
-        self.ax.vlines(down_candles.index, down_candles['Low'], down_candles['High'],
-                       color=self.style['down_color'], linewidth=1)
+    def _restore(self, state, timeframe, x, ohlc, indicators):
+        """Puts back a cached timeframe. Returns False if it has to be drawn from scratch"""
+        bottom, top = state['ylim']
+        if not (bottom <= ohlc[-1, 2] and ohlc[-1, 1] <= top):
+            return False  # The live candle has moved out of the cached range
+        self._render_cache.move_to_end(self._cache_key)
 
-        # Plot candle bodies with adjusted width
-        self.ax.bar(up_candles.index, up_candles['Close'] - up_candles['Open'],
-                    bottom=up_candles['Open'], width=bar_width,
-                    color=self.style['up_color'])
-        self.ax.bar(down_candles.index, down_candles['Close'] - down_candles['Open'],
-                    bottom=down_candles['Open'], width=bar_width,
-                    color=self.style['down_color'])
+        if timeframe != self.level:
+            self._set_level(timeframe)
+        self._apply_candles(self.wicks, self.bodies, state['candles'])
+        self._set_candles(self.live_wick, self.live_body, x[-1:], ohlc[-1:], timeframe)
+        self._set_indicator_lines(x, indicators)
+        self.ax.set_xlim(*state['xlim'])
+        self.ax.set_ylim(*state['ylim'])
+        if self.osc_ax is not None and state['osc_ylim'] is not None:
+            self.osc_ax.set_ylim(*state['osc_ylim'])
+        self._history_key = state['history_key']
+        self._live_bbox = None
+
+        if state['background'] is None or state['size'] != self.figure.bbox.bounds:
+            self._background = None
+            self.canvas.draw_idle()
+            return True
+
+        # The figure looks exactly like the cached bitmap, only the animated artists go on top
+        self._background = state['background']
+        self.canvas.restore_region(self._background)
+        self._draw_live()
+        self.canvas.blit(self.figure.bbox)
+        return True
+
+    def _set_level(self, timeframe):
+        self.level = timeframe
 
         # Format x-axis to show appropriate number of ticks
         if timeframe in ['30m', '1h']:
             locator = AutoDateLocator(minticks=3, maxticks=7)
+            # For shorter timeframes, show date and time
+            formatter = DateFormatter('%d %b \'%y %H:%M')
+        elif timeframe == '1w':
+            # Zoomed out over years
+            locator = AutoDateLocator(minticks=3, maxticks=8)
+            formatter = DateFormatter('%b \'%y')
         else:
             locator = AutoDateLocator(minticks=5, maxticks=10)
-
+            # For longer timeframes, show only date
+            formatter = DateFormatter('%d %b \'%y')
         self.ax.xaxis.set_major_locator(locator)
+        self.ax.xaxis.set_major_formatter(formatter)
 
-        # Style the chart
-        self.ax.set_facecolor(self.style['bg_color'])
-        self.ax.grid(True, color=self.style['grid_color'], linestyle='--', alpha=0.3)
+        # Title with timeframe
+        self.ax.set_title(f'{self.symbol} - {timeframe}', color='black')
 
-        # Format x-axis
-        self.ax.set_xlabel('')
+    def _on_scroll(self, event):
+        if event.inaxes is not self.ax or self._data is None:
+            return
+        x_min, x_max = self.view or self.ax.get_xlim()
 
-        # Format date/time based on timeframe
-        if timeframe in ['30m', '1h']:
-            # For shorter timeframes, show date and time
-            plt.xticks(rotation=45)
-            self.ax.xaxis.set_major_formatter(DateFormatter('%d %b \'%y %H:%M'))
-        else:
-            # For longer timeframes, show only date
-            plt.xticks(rotation=45)
-            self.ax.xaxis.set_major_formatter(DateFormatter('%d %b \'%y'))
+        # Zoom around the cursor
+        factor = 0.8 if event.button == 'up' else 1.25
+        span = (x_max - x_min) * factor
+        min_span = 20 * self.level_minutes[self.timeframe] / 1440
+        span = max(span, min_span)
+        ratio = (event.xdata - x_min) / (x_max - x_min)
+        self.view = (event.xdata - span * ratio, event.xdata + span * (1 - ratio))
+        self._render()
 
-        # Use AutoDateLocator for automatic date tick selection
-        self.ax.xaxis.set_major_locator(AutoDateLocator())
+    def _on_press(self, event):
+        if event.inaxes is not self.ax or event.button != 1 or self._data is None:
+            return
+        if event.dblclick:
+            self.view = None
+            self._render()
+            return
+        self._drag = (event.x, self.view or self.ax.get_xlim())
 
-        # Remove spines
-        for spine in self.ax.spines.values():
-            spine.set_color(self.style['grid_color'])
-            spine.set_alpha(0.3)
+    def _on_motion(self, event):
+        if self._drag is None or event.x is None:
+            return
+        start_x, (x_min, x_max) = self._drag
 
-        # Title with timeframe
-        self.ax.set_title(f'BTC/USD - {timeframe}', color='black')
+        # Convert the pixel offset into days at the current scale
+        days_per_pixel = (x_max - x_min) / self.ax.bbox.width
+        shift = (event.x - start_x) * days_per_pixel
+        self.view = (x_min - shift, x_max - shift)
+        self._render()
+
+    def _on_release(self, event):
+        self._drag = None
+
+    @staticmethod
+    def _to_timestamp(x):
+        return pd.Timestamp(round(x * NS_PER_DAY / 1000), unit='us', tz='UTC')
+
+    def _set_candles(self, wicks, bodies, x, ohlc, timeframe):
+        """Writes candle geometry straight into the collections' vertex arrays"""
+        candles = self._candle_geometry(x, ohlc, timeframe)
+        self._apply_candles(wicks, bodies, candles)
+        return candles
+
+    def _candle_geometry(self, x, ohlc, timeframe):
+        half_width = self.timeframe_bar_width[timeframe] / 2
+        open_, high, low, close = ohlc.T
+
+        segments = np.empty((len(x), 2, 2))
+        segments[:, :, 0] = x[:, None]
+        segments[:, 0, 1] = low
+        segments[:, 1, 1] = high
+
+        bottom = np.minimum(open_, close)
+        top = np.maximum(open_, close)
+        verts = np.empty((len(x), 4, 2))
+        verts[:, 0] = np.column_stack([x - half_width, bottom])
+        verts[:, 1] = np.column_stack([x - half_width, top])
+        verts[:, 2] = np.column_stack([x + half_width, top])
+        verts[:, 3] = np.column_stack([x + half_width, bottom])
+
+        colors = np.where((close >= open_)[:, None], self._up_rgba, self._down_rgba)
+        return segments, verts, colors
+
+    @staticmethod
+    def _apply_candles(wicks, bodies, candles):
+        segments, verts, colors = candles
+        wicks.set_segments(segments)
+        wicks.set_color(colors)
+        bodies.set_verts(verts)
+        bodies.set_facecolor(colors)
+
+    def _set_indicator_lines(self, x, indicators):
+        for name, line in self._indicator_lines.items():
+            values = indicators.get(name)
+            if values is None:
+                line.set_data([], [])
+            else:
+                line.set_data(x, values)
+
+    def _scale_oscillator(self, indicators):
+        if self.oscillator == 'RSI':
+            self.osc_ax.set_ylim(0, 100)
+            return
+        values = [indicators[name] for name in OSCILLATORS[self.oscillator] if name in indicators]
+        values = np.concatenate(values) if values else np.empty(0)
+        values = values[np.isfinite(values)]
+        if len(values):
+            low, high = values.min(), values.max()
+            pad = (high - low) * 0.1 or abs(high) * 0.1 or 1.0
+            self.osc_ax.set_ylim(low - pad, high + pad)
+
+    def _live_fits(self, candle):
+        bottom, top = self.ax.get_ylim()
+        return bottom <= candle[2] and candle[1] <= top
+
+    def _on_draw(self, event):
+        # A full draw just happened: keep it as the blit background
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._live_bbox = None
+        cached = self._render_cache.get(self._cache_key)
+        if cached is not None and cached['history_key'] == self._history_key:
+            cached['background'] = self._background
+            cached['size'] = self.figure.bbox.bounds
+        self._draw_live()
+
+    def _draw_live(self):
+        self.ax.draw_artist(self.live_wick)
+        self.ax.draw_artist(self.live_body)
+        for line in self._indicator_lines.values():
+            line.axes.draw_artist(line)
+
+    def _blit_live(self, x, candle, timeframe):
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+
+        self.canvas.restore_region(self._background)
+        self._draw_live()
+        if self._indicator_lines:
+            # The lines' last points moved too, anywhere on the figure
+            self.canvas.blit(self.figure.bbox)
+            return
 
-        # Adjust layout to prevent label cutoff
-        plt.tight_layout()
+        # Pixel box around the live candle, with a little room for antialiasing
+        half_width = self.timeframe_bar_width[timeframe] / 2
+        corners = self.ax.transData.transform([[x - half_width, candle[2]],
+                                               [x + half_width, candle[1]]])
+        bbox = Bbox(corners).padded(2)
 
-        # Update the canvas
-        self.canvas.draw()
+        # Blit the union with the previous candle so a shrinking candle is cleared
+        region = Bbox.union([bbox, self._live_bbox]) if self._live_bbox is not None else bbox
+        self._live_bbox = bbox
+        self.canvas.blit(Bbox.intersection(region, self.ax.bbox) or self.ax.bbox)
 
     def pack(self):
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
     def destroy(self):
-        plt.close(self.figure)
\ No newline at end of file
+        self.canvas.get_tk_widget().destroy()
@@ -0,0 +1,96 @@
+# utils/data_loader.py
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DataLoader:
+    """
+    Runs blocking market-data calls on worker threads and hands the results
+    back to the Tk loop, so network round-trips never freeze the UI.
+    Requests are keyed: submitting a key that is already in flight just adds
+    another callback to the running job instead of starting a new one.
+    """
+
+    def __init__(self, widget, max_workers=2, poll_ms=50):
+        self.widget = widget
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='data-loader')
+        self._results = queue.Queue()
+        self._pending = {}  # key -> callbacks waiting on that job
+        self._generation = 0  # Bumped by cancel(), older results are dropped
+        self._lock = threading.Lock()
+        self._poll_id = None
+
+    def submit(self, key, func, callback=None):
+        """
+        Runs func() in the background and calls callback(result) on the Tk thread.
+        Returns False if the request was coalesced into one already running.
+        """
+        with self._lock:
+            if key in self._pending:
+                if callback is not None:
+                    self._pending[key].append(callback)
+                return False
+            self._pending[key] = [callback] if callback is not None else []
+            generation = self._generation
+
+        self.executor.submit(self._run, key, func, generation)
+        self._ensure_polling()
+        return True
+
+    def is_loading(self, key):
+        with self._lock:
+            return key in self._pending
+
+    def cancel(self):
+        """
+        Forgets every job in flight, e.g. when the screen that asked goes
+        away. The jobs finish in the background but no callback runs.
+        """
+        with self._lock:
+            self._pending.clear()
+            self._generation += 1
+        if self._poll_id is not None:
+            self.widget.after_cancel(self._poll_id)
+            self._poll_id = None
+
+    def shutdown(self):
+        if self._poll_id is not None:
+            self.widget.after_cancel(self._poll_id)
+            self._poll_id = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, key, func, generation):
+        try:
+            result = func()
+        except Exception as e:
+            print(f"Error loading {key}: {e}")
+            result = None
+        self._results.put((key, generation, result))
+
+    def _ensure_polling(self):
+        # Must be called on the Tk thread; the worker threads never touch Tk
+        if self._poll_id is None:
+            self._poll_id = self.widget.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._poll_id = None
+
+        while True:
+            try:
+                key, generation, result = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            with self._lock:
+                if generation != self._generation:
+                    continue  # Cancelled
+                callbacks = self._pending.pop(key, [])
+            for callback in callbacks:
+                callback(result)
+
+        with self._lock:
+            still_loading = bool(self._pending)
+        if still_loading:
+            self._ensure_polling()
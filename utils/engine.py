@@ -0,0 +1,228 @@
+# utils/engine.py
+import asyncio
+import itertools
+
+from utils.order_engine import OrderEngine
+from utils.portfolio import Ledger
+from utils.save_manager import SaveManager
+from utils.watchlist import Watchlist
+
+
+class Session:
+    """
+    One player's (or bot's) game: a Ledger, resting orders and the market
+    they trade, without any UI. Rule violations raise ValueError with a
+    message fit to show the player. on_event(event) gets the order events
+    (the ledger reports its own), on_update(session) runs after every batch
+    of bars. A bot is called with the session after each batch.
+    """
+
+    def __init__(self, session_id, ledger, price_manager, on_event=None, on_update=None, bot=None):
+        self.id = session_id
+        self.ledger = ledger
+        self.price_manager = price_manager
+        self.live_price_manager = price_manager  # Kept while a replay is running
+        self.live_ledger = ledger  # Replays trade a throwaway copy
+        self.on_event = on_event
+        self.on_update = on_update
+        self.bot = bot
+        self.orders = OrderEngine(on_fill=self._on_order_filled)
+        self.live_orders = self.orders
+
+    @property
+    def symbol(self):
+        return self.live_price_manager.symbol
+
+    @property
+    def is_replaying(self):
+        return self.price_manager is not self.live_price_manager
+
+    def price(self):
+        """Latest price of the traded market, None while it's loading"""
+        if not self.price_manager.has_data():
+            return None
+        return float(self.price_manager.get_latest_price())
+
+    # Trading
+
+    def buy(self, quantity):
+        self.ledger.buy_spot(quantity, self._require_price())
+
+    def sell(self, quantity):
+        self.ledger.sell_spot(quantity, self._require_price())
+
+    def open_position(self, side, quantity, leverage=1):
+        if side not in ('long', 'short'):
+            raise ValueError("Side must be long or short.")
+        self.ledger.open_position(side, quantity, self._require_price(), leverage)
+
+    def close_positions(self):
+        price = self._require_price()
+        for position_id in list(self.ledger.positions):
+            self.ledger.close_position(position_id, price)
+
+    def place_order(self, side, kind, price, quantity):
+        self.ledger.check_order(side, price, quantity)
+        order = self.orders.place(side, kind, price, quantity)
+        self._log({'type': 'order_placed', 'id': order.id, 'side': side, 'kind': kind,
+                   'price': price, 'quantity': quantity})
+        return order
+
+    def cancel_all_orders(self):
+        for order_id in list(self.orders.orders):
+            self.orders.cancel(order_id)
+            self._log({'type': 'order_cancelled', 'id': order_id})
+
+    # Market data
+
+    def on_bars(self, bars):
+        """
+        Matches resting orders and margin positions against every bar that
+        came in, not just the last price
+        """
+        if bars is not None and not bars.empty:
+            if self.orders.orders or self.ledger.positions:
+                rows = zip(bars.index, bars['Open'], bars['High'], bars['Low'], bars['Close'])
+                for timestamp, open_, high, low, close in rows:
+                    if self.orders.orders:
+                        self.orders.process_bar(high, low, open_, timestamp)
+                    self.ledger.on_bar(high, low, close)
+            else:
+                # Nothing to match, only the last price matters
+                self.ledger.on_price(float(bars['Close'].iloc[-1]))
+
+        if self.bot is not None:
+            try:
+                self.bot(self)
+            except Exception as e:
+                print(f"Error in bot of session {self.id}: {e}")
+        if self.on_update is not None:
+            self.on_update(self)
+
+    def start_replay(self, price_manager):
+        """
+        Trades `price_manager`'s replayed market until stop_replay(), on a
+        copy of the ledger and a fresh order book. Nothing traded in the
+        replay is reported to on_event or reaches the real ledger.
+        """
+        if self.ledger.positions:
+            # They would be marked, and maybe liquidated, at replayed prices
+            raise ValueError("Close your margin positions before starting a replay.")
+        self.cancel_all_orders()  # Prices jump, resting orders would fill at random
+        self.ledger = Ledger.from_dict(self.live_ledger.to_dict(),
+                                       on_equity_change=self.live_ledger.on_equity_change,
+                                       on_liquidation=self.live_ledger.on_liquidation)
+        self.orders = OrderEngine(on_fill=self._on_order_filled)
+        self.price_manager = price_manager
+
+    def stop_replay(self):
+        """Drops the replay's ledger and orders and goes back to the live ones"""
+        if not self.is_replaying:
+            return
+        self.price_manager = self.live_price_manager
+        self.ledger = self.live_ledger
+        self.orders = self.live_orders
+        self.ledger.refresh_display()
+
+    def _require_price(self):
+        price = self.price()
+        if price is None:
+            raise ValueError("Market data is still loading.")
+        return price
+
+    def _on_order_filled(self, order):
+        self.ledger.fill_order(order)
+        self._log({'type': f'order_{order.status}', 'id': order.id, 'price': order.fill_price})
+
+    def _log(self, event):
+        if self.on_event is not None and not self.is_replaying:
+            self.on_event(event)
+
+
+class GameEngine:
+    """
+    Hosts any number of sessions on one shared Watchlist, so every session
+    trading a symbol reads the same PriceManager and candle cache and the
+    feed is polled once per symbol, not once per session.
+
+    Headless, run() polls on an asyncio clock: the blocking fetch goes to a
+    worker thread and the bars are dispatched on the event loop. A UI can
+    instead fetch on its own timer and hand the results to dispatch() on its
+    own thread; either way sessions are only touched by that one thread.
+    """
+
+    def __init__(self, watchlist=None, poll_interval=None):
+        self.watchlist = watchlist or Watchlist()
+        self.poll_interval = poll_interval
+        self.sessions = {}
+        self._ids = itertools.count(1)
+        self._dispatched = {}  # symbol -> last bars handed out, so a poll with nothing new is skipped
+        self._running = False
+
+    def price_manager(self, symbol):
+        return self.watchlist.get(symbol)
+
+    def open_session(self, ledger=None, symbol='BTC-USD', on_event=None, on_update=None, bot=None,
+                     cash=SaveManager.STARTING_MONEY):
+        if ledger is None:
+            ledger = Ledger(cash, on_event=on_event)
+        session = Session(next(self._ids), ledger, self.price_manager(symbol),
+                          on_event=on_event, on_update=on_update, bot=bot)
+        self.sessions[session.id] = session
+        self.watchlist.pin(symbol)
+        return session
+
+    def close_session(self, session):
+        """Removes a session. Its resting orders aren't saved, so they're cancelled and logged"""
+        session.stop_replay()
+        session.cancel_all_orders()
+        self.sessions.pop(session.id, None)
+        if session.symbol not in self.symbols():
+            self.watchlist.unpin(session.symbol)
+
+    def symbols(self):
+        """Symbols traded by at least one session"""
+        return list(dict.fromkeys(session.symbol for session in self.sessions.values()))
+
+    def poll(self):
+        """Fetches new bars for every traded symbol. Blocks, so run it off the dispatching thread"""
+        return self.watchlist.refresh_prices(self.symbols())
+
+    def dispatch(self, results):
+        """Hands the bars of a poll ({symbol: updated}) to the live sessions trading them"""
+        for symbol, updated in results.items():
+            bars = self.price_manager(symbol).live_feed.last_bars
+            if not updated or bars is None or bars is self._dispatched.get(symbol):
+                continue
+            self._dispatched[symbol] = bars
+            for session in list(self.sessions.values()):
+                if session.symbol == symbol and not session.is_replaying:
+                    session.on_bars(bars)
+
+    async def tick(self):
+        results = await asyncio.get_running_loop().run_in_executor(None, self.poll)
+        self.dispatch(results)
+        return results
+
+    async def run(self):
+        """
+        Polls and dispatches until stop(), every poll_interval seconds if
+        set, otherwise whenever the next bar of a traded symbol is due
+        """
+        self._running = True
+        while self._running:
+            await self.tick()
+            await asyncio.sleep(self.next_poll_delay())
+
+    def next_poll_delay(self):
+        if self.poll_interval is not None:
+            return self.poll_interval
+        delays = [self.price_manager(symbol).next_update_delay() for symbol in self.symbols()]
+        return min(delays, default=30)
+
+    def stop(self):
+        self._running = False
+
+    def shutdown(self):
+        self.stop()
+        self.watchlist.shutdown()
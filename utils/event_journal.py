@@ -0,0 +1,54 @@
+# utils/event_journal.py
+import threading
+import time
+from utils.save_manager import SaveManager
+
+
+class EventJournal:
+    """
+    Buffers a save slot's events between autosaves. record() runs on the Tk
+    thread; checkpoint() is taken with the autosave snapshot and write()
+    runs on the autosave thread. Events only leave the buffer once they're
+    stored, so a failed write is retried with the next one, in order.
+    A snapshot of the state is added every `snapshot_every` events so
+    loading never has to replay a long tail.
+    """
+
+    def __init__(self, slot, snapshot_every=200, pending=0):
+        self.slot = slot
+        self.snapshot_every = snapshot_every
+        self._events = []  # (index, event) not yet stored
+        self._count = 0
+        self._since_snapshot = pending  # Events after the last stored snapshot
+        self._lock = threading.Lock()
+
+    def record(self, event):
+        event = dict(event, time=time.time())
+        with self._lock:
+            self._events.append((self._count, event))
+        self._count += 1
+        self._since_snapshot += 1
+
+    def checkpoint(self, state, force=False):
+        """
+        Marks everything recorded so far for the next write. state() is only
+        called when a snapshot is due (or forced) and must match the events.
+        """
+        checkpoint = {'events_upto': self._count}
+        if force or self._since_snapshot >= self.snapshot_every:
+            checkpoint['ledger'] = state()
+            self._since_snapshot = 0
+        return checkpoint
+
+    def write(self, checkpoint):
+        upto = checkpoint['events_upto']
+        with self._lock:
+            events = [event for index, event in self._events if index < upto]
+        if events or 'ledger' in checkpoint:
+            SaveManager.append_events(self.slot, events, checkpoint.get('ledger'))
+        with self._lock:
+            self._events = [(index, event) for index, event in self._events if index >= upto]
+
+    def pending(self):
+        with self._lock:
+            return len(self._events)
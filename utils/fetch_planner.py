@@ -0,0 +1,186 @@
+# utils/fetch_planner.py
+import time
+
+import numpy as np
+import pandas as pd
+
+
+class FetchPlanner:
+    """
+    Compares the bars we already have against a requested time range and
+    fetches only what is missing: the stretch before the first bar, any gaps
+    inside the data and everything from the last (possibly still forming)
+    bar onwards. Requests are capped at the source's window size and sent in
+    small rate-limited batches, with exponential backoff on errors.
+
+    Holes the source was asked for and could not fill (market closures,
+    bars the source never had) are kept in `checked` as epoch-ns ranges and
+    not requested again. Only holes older than `settle_days` are kept, the
+    source may still publish recent bars late.
+    """
+
+    def __init__(self, source, symbol, bar_minutes=30, interval='30m', max_span_days=60,
+                 batch_size=4, request_pause=0.5, batch_pause=2.0, retries=3, backoff=1.0,
+                 settle_days=1, checked=None, sleep=time.sleep):
+        self.source = source
+        self.symbol = symbol
+        self.step = pd.Timedelta(minutes=bar_minutes)
+        self.interval = interval
+        self.max_span = pd.Timedelta(days=max_span_days)
+        self.batch_size = batch_size
+        self.request_pause = request_pause
+        self.batch_pause = batch_pause
+        self.retries = retries
+        self.backoff = backoff
+        self.settle = pd.Timedelta(days=settle_days)
+        self.checked = [list(pair) for pair in checked or []]  # [start_ns, end_ns], sorted and disjoint
+        self.sleep = sleep
+        self.failed = []  # (start, end) requests that gave up after all retries
+
+    def missing_intervals(self, index, start, end):
+        """
+        Returns a list of (start, end) ranges not covered by index, holes
+        already checked left out. The last one always runs from the last bar
+        to `end`, that bar may have been stored mid-way.
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        if start >= end:
+            return []
+
+        index = pd.DatetimeIndex(index)
+        if len(index):
+            index = index[(index >= start) & (index < end)]
+        if len(index) == 0:
+            return [(start, end)]
+
+        intervals = [hole for hole in self._holes(index, start, index[-1]) if not self.is_checked(*hole)]
+        intervals.append((index[-1], end))
+        return intervals
+
+    def is_checked(self, start, end):
+        start, end = pd.Timestamp(start).value, pd.Timestamp(end).value
+        return any(lo <= start and end <= hi for lo, hi in self.checked)
+
+    def remember(self, start, end):
+        """Marks start-end as asked for, merged into the ranges already known"""
+        ranges = sorted(self.checked + [[pd.Timestamp(start).value, pd.Timestamp(end).value]])
+        merged = [list(ranges[0])]
+        for lo, hi in ranges[1:]:
+            if lo <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], hi)
+            else:
+                merged.append([lo, hi])
+        self.checked = merged
+
+    def plan(self, index, start, end):
+        """Splits the missing intervals into requests no longer than max_span"""
+        return [request for interval in self.missing_intervals(index, start, end)
+                for request in self._split(*interval)]
+
+    def group(self, intervals):
+        """
+        Merges the missing intervals of several symbols, {symbol: [(start,
+        end), ...]}, into shared requests [(start, end, symbols), ...] no
+        longer than max_span. Overlapping intervals become one request for
+        all their symbols, e.g. the tails of symbols updated at about the
+        same time.
+        """
+        pieces = sorted((request_start, request_end, symbol)
+                        for symbol, ranges in intervals.items() for interval in ranges
+                        for request_start, request_end in self._split(*interval))
+        requests = []
+        for request_start, request_end, symbol in pieces:
+            if requests and request_start <= requests[-1][1] \
+                    and max(request_end, requests[-1][1]) - requests[-1][0] <= self.max_span:
+                last = requests[-1]
+                last[1] = max(last[1], request_end)
+                if symbol not in last[2]:
+                    last[2].append(symbol)
+            else:
+                requests.append([request_start, request_end, [symbol]])
+        return [tuple(request) for request in requests]
+
+    def fetch(self, index, start, end):
+        """Fetches every missing interval and returns the new bars as one DataFrame"""
+        self.failed = []
+        frames = []
+        intervals = self.missing_intervals(index, start, end)
+        requests = [request for interval in intervals for request in self._split(*interval)]
+
+        for n, (request_start, request_end) in enumerate(requests):
+            data = self.request(n, request_start, request_end)
+            if data is None:
+                self.failed.append((request_start, request_end))
+            elif not data.empty:
+                frames.append(data)
+        self.remember_holes(intervals, frames, end)
+
+        if not frames:
+            return None
+        data = pd.concat(frames)
+        return data[~data.index.duplicated(keep='last')].sort_index()
+
+    def request(self, n, start, end, fetch=None):
+        """
+        The n-th request of a run, paced by the rate limits and retried with
+        backoff. fetch(start, end) defaults to this symbol's history. Returns
+        None if it gave up.
+        """
+        if n:
+            self.sleep(self.batch_pause if n % self.batch_size == 0 else self.request_pause)
+        return self._fetch_with_retry(start, end, fetch)
+
+    def remember_holes(self, intervals, frames, end):
+        """
+        Remembers what the holes among `intervals` (all but the tail) still
+        lack after fetching `frames`. Whatever the source had for a hole it
+        has sent now, unless a request for it failed or it is too recent.
+        """
+        for gap_start, gap_end in intervals[:-1]:
+            if gap_end > pd.Timestamp(end) - self.settle \
+                    or any(start < gap_end and gap_start < stop for start, stop in self.failed):
+                continue
+            got = [frame.index[(frame.index >= gap_start) & (frame.index < gap_end)] for frame in frames]
+            got = got[0].append(got[1:]).sort_values() if got else pd.DatetimeIndex([])
+            for hole in self._holes(got, gap_start, gap_end):
+                self.remember(*hole)
+
+    def _holes(self, index, start, end):
+        # Stretches of start-end longer than one bar without a bar in index
+        if len(index) == 0:
+            return [(start, end)]
+        ts = index.as_unit('ns').asi8
+        step = self.step.value
+
+        # Any jump bigger than one bar between neighbours is a hole
+        gaps = np.flatnonzero(np.diff(ts) > step)
+        holes = []
+        if ts[0] - start.value >= step:
+            holes.append((start, index[0]))
+        for gap_start, gap_end in zip(index[gaps] + self.step, index[gaps + 1]):
+            holes.append((gap_start, gap_end))
+        if end.value - ts[-1] > step:
+            holes.append((index[-1] + self.step, end))
+        return holes
+
+    def _split(self, start, end):
+        requests = []
+        while start < end:
+            request_end = min(start + self.max_span, end)
+            requests.append((start, request_end))
+            start = request_end
+        return requests
+
+    def _fetch_with_retry(self, start, end, fetch=None):
+        for attempt in range(self.retries + 1):
+            try:
+                if fetch is not None:
+                    return fetch(start, end)
+                return self.source.history(self.symbol, start, end, interval=self.interval)
+            except Exception as e:
+                if attempt == self.retries:
+                    print(f"Giving up on {start} - {end}: {e}")
+                    return None
+                delay = self.backoff * 2 ** attempt
+                print(f"Fetch failed ({e}), retrying in {delay:.1f}s")
+                self.sleep(delay)
@@ -0,0 +1,141 @@
+# utils/frame_scheduler.py
+import time
+
+
+class FrameScheduler:
+    """
+    One Tk `after` loop that drives the game screen instead of independent
+    timers. The screen is split into views (chart, price label, ...) that
+    data updates mark dirty; each frame redraws only the dirty views, at
+    most once however many updates landed. Tasks run when they are due and
+    frame callbacks run every frame while registered (e.g. replay).
+
+    Redraws are skipped while frames are over budget, so the next frame
+    simply draws the newer state, but never more than `max_skipped` frames
+    in a row. With nothing dirty and no frame callbacks the loop sleeps
+    until the next task, so an idle screen costs nothing.
+    """
+
+    def __init__(self, widget, fps=30, max_skipped=4):
+        self.widget = widget
+        self.frame_ms = 1000 / fps
+        self.max_skipped = max_skipped
+
+        self._views = {}  # name -> (redraw function, view it's part of), in drawing order
+        self._dirty = set()
+        self._tasks = {}  # name -> [func, interval in seconds, next due time]
+        self._frame_callbacks = {}  # name -> func(dt)
+        self._skipped = 0
+        self._last_frame = None
+        self._last_tick = float('-inf')
+        self._after_id = None
+        self._wake_at = None
+        self._in_tick = False
+        self.last_render_ms = 0.0
+
+    def add_view(self, name, redraw, part_of=None):
+        """
+        Registers redraw() for one view. A view that is `part_of` another
+        isn't redrawn separately in a frame where that one is dirty too.
+        """
+        self._views[name] = (redraw, part_of)
+
+    def mark_dirty(self, *names):
+        """Asks for the named views, or all of them, to be redrawn next frame"""
+        self._dirty.update(names or self._views)
+        self._reschedule(self._next_frame())
+
+    def add_task(self, name, func, interval, run_now=False):
+        due = time.monotonic() + (0 if run_now else interval)
+        self._tasks[name] = [func, interval, due]
+        self._reschedule(due)
+
+    def remove_task(self, name):
+        self._tasks.pop(name, None)
+
+    def add_frame_callback(self, name, func):
+        self._frame_callbacks[name] = func
+        self._last_frame = None
+        self._reschedule(self._next_frame())
+
+    def remove_frame_callback(self, name):
+        self._frame_callbacks.pop(name, None)
+
+    def stop(self):
+        """Cancels everything pending, the views stay registered"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self._tasks.clear()
+        self._frame_callbacks.clear()
+        self._dirty.clear()
+
+    def _next_frame(self):
+        # Updates landing in a burst still get at most one frame per frame_ms
+        return self._last_tick + self.frame_ms / 1000
+
+    def _reschedule(self, due):
+        # Wake up by `due` unless already going to
+        if self._in_tick:
+            return  # The end of the tick schedules the next one
+        if self._after_id is not None:
+            if self._wake_at <= due:
+                return
+            self.widget.after_cancel(self._after_id)
+        self._schedule(max(0.0, due - time.monotonic()) * 1000)
+
+    def _schedule(self, delay_ms):
+        self._wake_at = time.monotonic() + delay_ms / 1000
+        self._after_id = self.widget.after(max(1, int(delay_ms)), self._tick)
+
+    def _tick(self):
+        self._after_id = None
+        self._in_tick = True
+        try:
+            self._run_frame()
+        finally:
+            self._in_tick = False
+
+    def _run_frame(self):
+        started = time.monotonic()
+        self._last_tick = started
+        dt = started - self._last_frame if self._last_frame is not None else 0.0
+        self._last_frame = started
+
+        for name, task in list(self._tasks.items()):
+            func, interval, due = task
+            if started >= due:
+                task[2] = started + interval
+                func()
+
+        for func in list(self._frame_callbacks.values()):
+            func(dt)
+
+        if self._dirty:
+            elapsed_ms = (time.monotonic() - started) * 1000
+            if elapsed_ms + self.last_render_ms <= self.frame_ms or self._skipped >= self.max_skipped:
+                render_started = time.monotonic()
+                self._skipped = 0
+                self._redraw()
+                self.last_render_ms = (time.monotonic() - render_started) * 1000
+            else:
+                self._skipped += 1
+
+        self._schedule_next(started)
+
+    def _redraw(self):
+        dirty, self._dirty = self._dirty, set()
+        for name, (redraw, part_of) in self._views.items():
+            if name in dirty and part_of not in dirty:
+                redraw()
+
+    def _schedule_next(self, started):
+        now = time.monotonic()
+        if self._frame_callbacks or self._dirty:
+            delay = self.frame_ms - (now - started) * 1000
+        elif self._tasks:
+            self._last_frame = None
+            delay = (min(task[2] for task in self._tasks.values()) - now) * 1000
+        else:
+            return
+        self._schedule(max(1, delay))
@@ -0,0 +1,427 @@
+# utils/indicators.py
+from collections import deque
+
+import numpy as np
+
+NS_PER_DAY = 86400 * 10**9
+COLUMNS = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}
+
+# What the chart can show: price overlays share the candles' axis, oscillators get their own
+PRICE_OVERLAYS = {
+    'SMA 20': ('sma_20',),
+    'EMA 50': ('ema_50',),
+    'Bollinger': ('bb_upper', 'bb_middle', 'bb_lower'),
+    'VWAP': ('vwap',),
+}
+OSCILLATORS = {
+    'RSI': ('rsi_14',),
+    'MACD': ('macd', 'macd_signal'),
+    'ATR': ('atr_14',),
+}
+
+
+def ema_filter(values, alpha, initial=None, block=128):
+    """
+    y[i] = alpha * x[i] + (1 - alpha) * y[i - 1], starting from `initial`
+    (x[0] if None). Each block of bars is solved in closed form with
+    cumsum, so there's no Python loop per bar.
+    """
+    x = np.asarray(values, dtype=float)
+    out = np.empty_like(x)
+    if len(x) == 0:
+        return out
+    decay = 1.0 - alpha
+    if decay == 0:
+        out[:] = x
+        return out
+
+    steps = np.arange(block)
+    grow = decay ** -steps  # d^-j
+    shrink = decay ** steps  # d^k
+    carry = x[0] if initial is None else initial
+    for start in range(0, len(x), block):
+        chunk = x[start:start + block]
+        m = len(chunk)
+        # y[k] = d^(k+1) * carry + alpha * d^k * sum(d^-j * x[j] for j <= k)
+        out[start:start + m] = shrink[:m] * (decay * carry + alpha * np.cumsum(chunk * grow[:m]))
+        carry = out[start + m - 1]
+    return out
+
+
+def _rsi(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+
+
+class Indicator:
+    """
+    seed(bars) computes every output over closed bars (dict of arrays keyed
+    like candle_pyramid.FIELDS) in one vectorized pass and keeps the state
+    after the last one. push(bar) adds one closed bar in O(1); preview(bar)
+    gives the outputs for the still-forming bar without changing the state.
+    """
+    names = ()
+
+    def seed(self, bars):
+        raise NotImplementedError
+
+    def push(self, bar):
+        raise NotImplementedError
+
+    def preview(self, bar):
+        raise NotImplementedError
+
+
+class SMA(Indicator):
+    def __init__(self, period=20):
+        self.period = period
+        self.names = (f'sma_{period}',)
+
+    def seed(self, bars):
+        close = bars['close']
+        out = np.full(len(close), np.nan)
+        if len(close) >= self.period:
+            sums = np.cumsum(np.insert(close, 0, 0.0))
+            out[self.period - 1:] = (sums[self.period:] - sums[:-self.period]) / self.period
+        # The last period - 1 closes, none for period 1 (close[-0:] would be all of them)
+        recent = close[max(len(close) - self.period + 1, 0):] if self.period > 1 else close[:0]
+        self._window = deque(recent.tolist(), maxlen=self.period - 1)
+        self._sum = float(sum(self._window))
+        return {self.names[0]: out}
+
+    def preview(self, bar):
+        if len(self._window) < self.period - 1:
+            return {self.names[0]: np.nan}
+        return {self.names[0]: (self._sum + bar['close']) / self.period}
+
+    def push(self, bar):
+        values = self.preview(bar)
+        if self.period == 1:
+            return values  # Nothing to carry over
+        if len(self._window) == self._window.maxlen:
+            self._sum -= self._window[0]
+        self._window.append(bar['close'])
+        self._sum += bar['close']
+        return values
+
+
+class EMA(Indicator):
+    def __init__(self, period=50):
+        self.alpha = 2 / (period + 1)
+        self.names = (f'ema_{period}',)
+
+    def seed(self, bars):
+        out = ema_filter(bars['close'], self.alpha)
+        self._ema = out[-1] if len(out) else None
+        return {self.names[0]: out}
+
+    def _next(self, close):
+        return close if self._ema is None else self.alpha * close + (1 - self.alpha) * self._ema
+
+    def preview(self, bar):
+        return {self.names[0]: self._next(bar['close'])}
+
+    def push(self, bar):
+        self._ema = self._next(bar['close'])
+        return {self.names[0]: self._ema}
+
+
+class RSI(Indicator):
+    """Wilder's RSI, smoothed from the first change"""
+
+    def __init__(self, period=14):
+        self.alpha = 1 / period
+        self.names = (f'rsi_{period}',)
+
+    def seed(self, bars):
+        close = bars['close']
+        out = np.full(len(close), np.nan)
+        self._prev = close[-1] if len(close) else None
+        self._gain = self._loss = None
+        if len(close) > 1:
+            change = np.diff(close)
+            gain = ema_filter(np.maximum(change, 0), self.alpha)
+            loss = ema_filter(np.maximum(-change, 0), self.alpha)
+            out[1:] = _rsi(gain, loss)
+            self._gain, self._loss = gain[-1], loss[-1]
+        return {self.names[0]: out}
+
+    def _next(self, close):
+        if self._prev is None:
+            return None, None, np.nan
+        change = close - self._prev
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if self._gain is not None:
+            gain = self.alpha * gain + (1 - self.alpha) * self._gain
+            loss = self.alpha * loss + (1 - self.alpha) * self._loss
+        return gain, loss, float(_rsi(gain, loss))
+
+    def preview(self, bar):
+        return {self.names[0]: self._next(bar['close'])[2]}
+
+    def push(self, bar):
+        gain, loss, rsi = self._next(bar['close'])
+        if gain is not None:
+            self._gain, self._loss = gain, loss
+        self._prev = bar['close']
+        return {self.names[0]: rsi}
+
+
+class MACD(Indicator):
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.alphas = (2 / (fast + 1), 2 / (slow + 1), 2 / (signal + 1))
+        self.names = ('macd', 'macd_signal', 'macd_hist')
+
+    def seed(self, bars):
+        fast_alpha, slow_alpha, signal_alpha = self.alphas
+        fast = ema_filter(bars['close'], fast_alpha)
+        slow = ema_filter(bars['close'], slow_alpha)
+        macd = fast - slow
+        signal = ema_filter(macd, signal_alpha)
+        self._state = (fast[-1], slow[-1], signal[-1]) if len(macd) else None
+        return dict(zip(self.names, (macd, signal, macd - signal)))
+
+    def _next(self, close):
+        if self._state is None:
+            return (close, close, 0.0), (0.0, 0.0, 0.0)
+        (fast_alpha, slow_alpha, signal_alpha), (fast, slow, signal) = self.alphas, self._state
+        fast = fast_alpha * close + (1 - fast_alpha) * fast
+        slow = slow_alpha * close + (1 - slow_alpha) * slow
+        macd = fast - slow
+        signal = signal_alpha * macd + (1 - signal_alpha) * signal
+        return (fast, slow, signal), (macd, signal, macd - signal)
+
+    def preview(self, bar):
+        return dict(zip(self.names, self._next(bar['close'])[1]))
+
+    def push(self, bar):
+        self._state, values = self._next(bar['close'])
+        return dict(zip(self.names, values))
+
+
+class BollingerBands(Indicator):
+    def __init__(self, period=20, width=2.0):
+        self.period = period
+        self.width = width
+        self.names = ('bb_upper', 'bb_middle', 'bb_lower')
+
+    def seed(self, bars):
+        close = bars['close']
+        out = {name: np.full(len(close), np.nan) for name in self.names}
+        if len(close) >= self.period:
+            windows = np.lib.stride_tricks.sliding_window_view(close, self.period)
+            mean, std = windows.mean(axis=1), windows.std(axis=1)
+            out['bb_upper'][self.period - 1:] = mean + self.width * std
+            out['bb_middle'][self.period - 1:] = mean
+            out['bb_lower'][self.period - 1:] = mean - self.width * std
+
+        # Running sums are kept around a reference price so they don't lose precision
+        self._ref = float(close[-1]) if len(close) else 0.0
+        recent = close[max(len(close) - self.period + 1, 0):] if self.period > 1 else close[:0]
+        self._window = deque((recent - self._ref).tolist(), maxlen=self.period - 1)
+        self._sum = float(sum(self._window))
+        self._sum_sq = float(sum(value * value for value in self._window))
+        return out
+
+    def preview(self, bar):
+        if len(self._window) < self.period - 1:
+            return dict.fromkeys(self.names, np.nan)
+        value = bar['close'] - self._ref
+        mean = (self._sum + value) / self.period
+        variance = max((self._sum_sq + value * value) / self.period - mean * mean, 0.0)
+        std, middle = variance ** 0.5, mean + self._ref
+        return {'bb_upper': middle + self.width * std, 'bb_middle': middle,
+                'bb_lower': middle - self.width * std}
+
+    def push(self, bar):
+        values = self.preview(bar)
+        if self.period == 1:
+            return values
+        if len(self._window) == self._window.maxlen:
+            old = self._window[0]
+            self._sum -= old
+            self._sum_sq -= old * old
+        value = bar['close'] - self._ref
+        self._window.append(value)
+        self._sum += value
+        self._sum_sq += value * value
+        return values
+
+
+class VWAP(Indicator):
+    """Volume weighted average of the typical price, restarting every UTC day"""
+    names = ('vwap',)
+
+    def seed(self, bars):
+        typical = (bars['high'] + bars['low'] + bars['close']) / 3
+        volume = bars['volume']
+        day = bars['timestamp'] // NS_PER_DAY
+        if len(day) == 0:
+            self._day, self._pv, self._volume = None, 0.0, 0.0
+            return {'vwap': typical}
+
+        # Running totals minus their value at each session's start
+        new_session = np.diff(day, prepend=day[0] - 1) != 0
+        session_start = np.maximum.accumulate(np.where(new_session, np.arange(len(day)), 0))
+        cum_pv = np.cumsum(typical * volume)
+        cum_volume = np.cumsum(volume)
+        pv = cum_pv - (cum_pv - typical * volume)[session_start]
+        session_volume = cum_volume - (cum_volume - volume)[session_start]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vwap = np.where(session_volume > 0, pv / session_volume, typical)
+
+        self._day, self._pv, self._volume = day[-1], pv[-1], session_volume[-1]
+        return {'vwap': vwap}
+
+    def _next(self, bar):
+        typical = (bar['high'] + bar['low'] + bar['close']) / 3
+        day = bar['timestamp'] // NS_PER_DAY
+        pv, volume = (self._pv, self._volume) if day == self._day else (0.0, 0.0)
+        pv += typical * bar['volume']
+        volume += bar['volume']
+        return day, pv, volume, (pv / volume if volume > 0 else typical)
+
+    def preview(self, bar):
+        return {'vwap': self._next(bar)[3]}
+
+    def push(self, bar):
+        self._day, self._pv, self._volume, vwap = self._next(bar)
+        return {'vwap': vwap}
+
+
+class ATR(Indicator):
+    """Wilder's average true range"""
+
+    def __init__(self, period=14):
+        self.alpha = 1 / period
+        self.names = (f'atr_{period}',)
+
+    def seed(self, bars):
+        high, low, close = bars['high'], bars['low'], bars['close']
+        true_range = high - low
+        if len(close) > 1:
+            previous = close[:-1]
+            true_range[1:] = np.maximum.reduce([true_range[1:], np.abs(high[1:] - previous),
+                                                np.abs(low[1:] - previous)])
+        out = ema_filter(true_range, self.alpha)
+        self._atr = out[-1] if len(out) else None
+        self._prev = close[-1] if len(close) else None
+        return {self.names[0]: out}
+
+    def _next(self, bar):
+        true_range = bar['high'] - bar['low']
+        if self._prev is not None:
+            true_range = max(true_range, abs(bar['high'] - self._prev), abs(bar['low'] - self._prev))
+        if self._atr is None:
+            return true_range
+        return self.alpha * true_range + (1 - self.alpha) * self._atr
+
+    def preview(self, bar):
+        return {self.names[0]: self._next(bar)}
+
+    def push(self, bar):
+        self._atr = self._next(bar)
+        self._prev = bar['close']
+        return {self.names[0]: self._atr}
+
+
+def default_indicators():
+    return [SMA(20), EMA(50), BollingerBands(20, 2.0), VWAP(), RSI(14), MACD(12, 26, 9), ATR(14)]
+
+
+class IndicatorSet:
+    """
+    Indicator values for one candle series, e.g. one timeframe of a
+    PriceManager. sync() is handed the latest candles each time they change:
+    when only the last (live) candle moved it is previewed in O(1), when new
+    candles were added the finished ones are pushed one by one, and anything
+    else (history reloaded, another symbol, a closed candle revised) reseeds
+    everything in one vectorized pass. Outputs live in over-allocated
+    buffers, so the arrays returned are views aligned with the candles.
+    """
+
+    def __init__(self, indicators=None):
+        self.indicators = indicators if indicators is not None else default_indicators()
+        self.names = [name for indicator in self.indicators for name in indicator.names]
+        self._buffers = {}
+        self._closed = 0
+        self._closed_ts = None  # Timestamp of the last closed candle
+        self._live_ts = None
+
+    def sync(self, candles, changed_from=None):
+        """
+        `changed_from` is the earliest epoch-ns timestamp that changed since
+        the last sync (e.g. what PriceManager.merge_arrays saw). Timestamps
+        alone can't tell that a closed candle was revised, a backfill or a
+        corrected bar keeps them all the same.
+        """
+        n = len(candles)
+        if n == 0:
+            self._live_ts = None
+            return {name: np.empty(0) for name in self.names}
+
+        columns = {field: candles[column].to_numpy(dtype=float) for field, column in COLUMNS.items()}
+        index = candles.index
+        closed = self._closed
+        follows = (self._live_ts is not None and n > closed and index[closed] == self._live_ts
+                   and (closed == 0 or index[closed - 1] == self._closed_ts))
+        if follows and changed_from is not None:
+            # The candle holding changed_from, anything before the old live one was pushed as closed
+            follows = np.searchsorted(index.as_unit('ns').asi8, changed_from, side='right') - 1 >= closed
+        if not follows:
+            self._seed(index, columns)
+        else:
+            # The old live candle and any others that finished since
+            for i in range(closed, n - 1):
+                self._write(self._closed, self._push(self._bar(index, columns, i)))
+                self._closed += 1
+            self._closed_ts = index[n - 2] if n > 1 else None
+            self._live_ts = index[n - 1]
+            self._write(self._closed, self._preview(self._bar(index, columns, n - 1)))
+
+        return {name: buffer[:n] for name, buffer in self._buffers.items()}
+
+    def _seed(self, index, columns):
+        n = len(index)
+        history = {field: values[:-1] for field, values in columns.items()}
+        history['timestamp'] = index[:-1].as_unit('ns').asi8
+
+        capacity = max(n + n // 2, 64)
+        self._buffers = {name: np.full(capacity, np.nan) for name in self.names}
+        for indicator in self.indicators:
+            for name, values in indicator.seed(history).items():
+                self._buffers[name][:n - 1] = values
+
+        self._closed = n - 1
+        self._closed_ts = index[n - 2] if n > 1 else None
+        self._live_ts = index[n - 1]
+        self._write(self._closed, self._preview(self._bar(index, columns, n - 1)))
+
+    @staticmethod
+    def _bar(index, columns, i):
+        bar = {field: float(values[i]) for field, values in columns.items()}
+        bar['timestamp'] = index[i].value
+        return bar
+
+    def _push(self, bar):
+        values = {}
+        for indicator in self.indicators:
+            values.update(indicator.push(bar))
+        return values
+
+    def _preview(self, bar):
+        values = {}
+        for indicator in self.indicators:
+            values.update(indicator.preview(bar))
+        return values
+
+    def _write(self, row, values):
+        if row >= len(self._buffers[self.names[0]]):
+            capacity = row + row // 2 + 64
+            for name, buffer in self._buffers.items():
+                grown = np.full(capacity, np.nan)
+                grown[:len(buffer)] = buffer
+                self._buffers[name] = grown
+        for name, value in values.items():
+            self._buffers[name][row] = value
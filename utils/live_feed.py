@@ -0,0 +1,108 @@
+# utils/live_feed.py
+import numpy as np
+import pandas as pd
+
+from utils.candle_pyramid import FIELDS, NS_PER_MINUTE
+from utils.candle_store import RingBuffer, frame_arrays
+
+
+class LiveFeed:
+    """
+    Keeps PriceManager.candles current by asking the data source only for
+    1m bars newer than the last one seen, instead of re-downloading the day.
+    The 1m bars of the open 30m bucket are kept in a ring buffer so that
+    bucket can be rebuilt exactly as it fills in, without building frames.
+    """
+
+    def __init__(self, price_manager, source, bar_minutes=30, clock=None):
+        self.price_manager = price_manager
+        self.source = source
+        self.clock = clock or (lambda: pd.Timestamp.now(tz='UTC'))
+        self.bar_freq = f'{bar_minutes}min'
+        self.bar_width = bar_minutes * NS_PER_MINUTE
+        self._minutes = RingBuffer(bar_minutes)  # 1m bars of the open bucket
+        self._last_seen = None
+        self.last_price = None
+        self.last_time = None
+        self.last_bars = None  # Bars delivered by the most recent poll
+
+    def latest_tick(self):
+        """Returns (timestamp, price) of the newest bar seen, or (None, None)"""
+        return self.last_time, self.last_price
+
+    def poll(self):
+        """Fetches bars since the last poll. Returns True if anything new arrived"""
+        return self.ingest(self.source.bars_since(self.price_manager.symbol, self.start_time()))
+
+    def ingest(self, bars):
+        """
+        Takes 1m bars fetched from start_time() on, e.g. by one batched
+        request for several symbols. Returns True if anything new arrived
+        """
+        since = self.start_time()
+        if bars is None or bars.empty:
+            return False
+
+        bars = self._match_timezone(bars)
+        bars = bars[bars.index >= since]
+        if bars.empty:
+            return False
+        self.last_bars = bars
+
+        self._merge_buckets(frame_arrays(bars))
+
+        self._last_seen = bars.index[-1]
+        self.last_time = self._last_seen
+        self.last_price = float(bars['Close'].iloc[-1])
+        return True
+
+    def next_poll_delay(self, lag=5):
+        """
+        Seconds until the newest minute has closed (plus `lag` for the source
+        to publish it), i.e. when polling again is worth it. 0 before any data.
+        """
+        if self.last_time is None:
+            return 0.0
+        due = self.last_time + pd.Timedelta(minutes=1, seconds=lag)
+        return max(0.0, (due - self.clock()).total_seconds())
+
+    def start_time(self):
+        """Where the next request for 1m bars has to start"""
+        if self._last_seen is not None:
+            return self._last_seen
+
+        # First poll: backfill from the start of the newest stored bar so
+        # that bar gets rebuilt from minute data
+        earliest = self.clock().floor(self.bar_freq) - pd.Timedelta(days=1)
+        last = self.price_manager.last_timestamp()
+        if last is not None:
+            return max(last, earliest)
+        return earliest
+
+    def _match_timezone(self, bars):
+        if self.price_manager.has_data() and bars.index.tz is not None:
+            bars = bars.copy()
+            bars.index = bars.index.tz_convert(self.price_manager.tz)
+        return bars
+
+    def _merge_buckets(self, minutes):
+        """
+        Adds 1m bars to the ring and merges the buckets they touch. Earlier
+        buckets are complete once a later minute shows up, so only the open
+        one is kept in the ring.
+        """
+        ring = self._minutes
+        width = self.bar_width
+        buckets = []
+        # The last minute is re-requested each poll since it may still be forming,
+        # append() replaces it in place
+        for bar in zip(*(minutes[field] for field in FIELDS)):
+            bucket = bar[0] // width * width
+            if len(ring) and ring.first_timestamp // width * width != bucket:
+                buckets.append((ring.first_timestamp // width * width,) + ring.summary())
+                ring.clear()
+            ring.append(*bar)
+        buckets.append((ring.first_timestamp // width * width,) + ring.summary())
+
+        self.price_manager.merge_arrays({field: np.array(values) for field, values
+                                         in zip(FIELDS, zip(*buckets))})
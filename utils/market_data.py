@@ -0,0 +1,246 @@
+# utils/market_data.py
+import time
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from utils.ohlcv_store import OHLCVStore
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+BAR_AGGREGATION = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+class MarketDataSource:
+    """
+    Where PriceManager gets its bars from. Both methods return DataFrames
+    with the OHLCV_COLUMNS and a tz-aware DatetimeIndex.
+    """
+
+    def history(self, symbol, start, end, interval='30m'):
+        """Returns bars with start <= timestamp < end"""
+        raise NotImplementedError
+
+    def bars_since(self, symbol, since, interval='1m'):
+        """Returns bars starting at or after `since`, including one still forming"""
+        raise NotImplementedError
+
+    def now(self):
+        """Current time as the source sees it, replays run on their own clock"""
+        return pd.Timestamp.now(tz='UTC')
+
+    def history_many(self, symbols, start, end, interval='30m'):
+        """history() for several symbols, {symbol: bars}. Sources that can batch override this"""
+        return {symbol: self.history(symbol, start, end, interval) for symbol in symbols}
+
+    def bars_since_many(self, since_by_symbol, interval='1m'):
+        """bars_since() for several symbols, {symbol: bars}"""
+        return {symbol: self.bars_since(symbol, since, interval)
+                for symbol, since in since_by_symbol.items()}
+
+
+class YahooDataSource(MarketDataSource):
+    """Market data from Yahoo Finance"""
+
+    def history(self, symbol, start, end, interval='30m'):
+        """Returns bars with start <= timestamp < end"""
+        data = yf.Ticker(symbol).history(start=start, end=end, interval=interval)
+        if data.empty:
+            return data
+        data = data[OHLCV_COLUMNS].dropna()
+        data.index = pd.to_datetime(data.index)
+        return data
+
+    def bars_since(self, symbol, since, interval='1m'):
+        data = yf.Ticker(symbol).history(start=since, interval=interval)
+        if data.empty:
+            return data
+        data = data[OHLCV_COLUMNS].dropna()
+        return data[data.index >= since]
+
+    def history_many(self, symbols, start, end, interval='30m'):
+        # One multi-ticker request instead of one per symbol, the caller's
+        # workers bound concurrency so yfinance's own threads are off
+        data = yf.download(list(symbols), start=start, end=end, interval=interval,
+                           group_by='ticker', progress=False, threads=False)
+        return self._split_download(data, symbols)
+
+    def bars_since_many(self, since_by_symbol, interval='1m'):
+        start = min(since_by_symbol.values())
+        data = yf.download(list(since_by_symbol), start=start, interval=interval,
+                           group_by='ticker', progress=False, threads=False)
+        frames = self._split_download(data, since_by_symbol)
+        return {symbol: bars[bars.index >= since_by_symbol[symbol]]
+                for symbol, bars in frames.items()}
+
+    @staticmethod
+    def _split_download(data, symbols):
+        frames = {}
+        if data is None or data.empty:
+            return frames
+        for symbol in symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                bars = data[symbol]
+            else:
+                bars = data  # Only one ticker was asked for
+            bars = bars[OHLCV_COLUMNS].dropna()
+            if bars.index.tz is None:
+                bars.index = bars.index.tz_localize('UTC')
+            frames[symbol] = bars
+        return frames
+
+
+class SimulatedDataSource(MarketDataSource):
+    """
+    Offline stand-in for Yahoo. Generates a seeded random walk of 1m bars on
+    demand, so live updates can be tested without the network.
+    """
+
+    def __init__(self, start_price=30000.0, seed=0, volatility=0.0005, clock=None):
+        self.price = start_price
+        self.volatility = volatility
+        self.rng = np.random.default_rng(seed)
+        self.clock = clock or (lambda: pd.Timestamp.now(tz='UTC'))
+        self.bars = {}  # minute timestamp -> row, so repeated requests are consistent
+        self.last_minute = None
+        self.requests = []
+
+    def now(self):
+        return self.clock()
+
+    def history(self, symbol, start, end, interval='30m'):
+        # The simulator has no past, only the minutes generated so far
+        minutes = self._frame(since=start)
+        minutes = minutes[minutes.index < end]
+        return minutes.resample(pd.Timedelta(interval)).agg(BAR_AGGREGATION).dropna()
+
+    def bars_since(self, symbol, since, interval='1m'):
+        self.requests.append((symbol, since))
+        now = self.clock().floor('1min')
+
+        if self.last_minute is None:
+            self.last_minute = since.floor('1min') - pd.Timedelta(minutes=1)
+        while self.last_minute < now:
+            self.last_minute += pd.Timedelta(minutes=1)
+            self.bars[self.last_minute] = self._next_bar()
+
+        return self._frame(since)
+
+    def _frame(self, since):
+        rows = [(ts, bar) for ts, bar in self.bars.items() if ts >= since]
+        if not rows:
+            return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], tz='UTC'))
+        index = pd.DatetimeIndex([ts for ts, _ in rows])
+        return pd.DataFrame([bar for _, bar in rows], index=index, columns=OHLCV_COLUMNS)
+
+    def _next_bar(self):
+        open_ = self.price
+        close = open_ * (1 + self.rng.normal(0, self.volatility))
+        spread = abs(self.rng.normal(0, self.volatility)) * open_
+        self.price = close
+        return [open_, max(open_, close) + spread, min(open_, close) - spread, close,
+                float(self.rng.integers(1, 50))]
+
+
+class ReplayDataSource(MarketDataSource):
+    """
+    Plays stored bars from an OHLCVStore back as if they were live, for
+    offline play, deterministic tests and load testing. A cursor marks the
+    replayed present: bars before `start` count as history, history() never
+    returns bars past the cursor and bars_since() moves it forward.
+    `speed` is simulated seconds per real second (1.0 = real time); None
+    plays as fast as possible, releasing `batch_size` bars per request.
+    """
+
+    def __init__(self, store, start=None, speed=1.0, batch_size=1,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.store = store if isinstance(store, OHLCVStore) else OHLCVStore(store)
+        self.speed = speed
+        self.batch_size = batch_size
+        self.clock = clock
+        self.sleep = sleep
+
+        self.timestamps = self.store.columns['timestamp']
+        self.bar_ns = int(self.timestamps[1] - self.timestamps[0]) if len(self.timestamps) > 1 \
+            else 30 * 60 * 10**9
+        self.position = self.store.row_range(start=start)[0] if start is not None else 0
+        self._started_at = None
+        self._anchor_ns = None  # Replayed time when the clock was (re)started
+
+    def now(self):
+        """The replayed time: the close of the newest released bar"""
+        if len(self.timestamps) == 0:
+            return pd.Timestamp.now(tz='UTC')
+        if self.position == 0:
+            return pd.Timestamp(int(self.timestamps[0]), unit='ns', tz='UTC')
+        return pd.Timestamp(int(self.timestamps[self.position - 1]) + self.bar_ns,
+                            unit='ns', tz='UTC')
+
+    def finished(self):
+        return self.position >= len(self.timestamps)
+
+    def advance(self):
+        """Releases the bars that are due and returns how many were released"""
+        before = self.position
+        if self.finished():
+            return 0
+
+        if self.speed is None:
+            self.position = min(self.position + self.batch_size, len(self.timestamps))
+            return self.position - before
+
+        if self._started_at is None:
+            # The clock starts with the first bar after the starting point
+            self._started_at = self.clock()
+            self._anchor_ns = int(self.timestamps[self.position])
+
+        # Everything up to the replayed time has happened by now
+        due = int(np.searchsorted(self.timestamps, self._replayed_ns(), side='right'))
+        self.position = max(self.position, min(due, len(self.timestamps)))
+        return self.position - before
+
+    def set_speed(self, speed):
+        """Changes speed mid-replay without jumping in time"""
+        if speed is not None and self.speed is not None and self._started_at is not None:
+            self._anchor_ns = self._replayed_ns()
+            self._started_at = self.clock()
+        elif speed is not None:
+            self._started_at = None
+        self.speed = speed
+
+    def _replayed_ns(self):
+        return self._anchor_ns + int((self.clock() - self._started_at) * self.speed * 10**9)
+
+    def history(self, symbol, start, end, interval='30m'):
+        lo, hi = self.store.row_range(start, end)
+        return self._rows(lo, min(hi, self.position))
+
+    def bars_since(self, symbol, since, interval='1m'):
+        self.advance()
+        lo = self.store.row_range(start=since)[0]
+        return self._rows(lo, self.position)
+
+    def stream(self):
+        """Yields each bar as (timestamp, open, high, low, close, volume), paced by speed"""
+        columns = self.store.columns
+        start_row = self.position
+        while not self.finished():
+            row = self.position
+            if self.speed is not None and row > start_row:
+                gap_seconds = (self.timestamps[row] - self.timestamps[row - 1]) / 10**9
+                self.sleep(gap_seconds / self.speed)
+            self.position += 1
+            yield (pd.Timestamp(int(self.timestamps[row]), unit='ns', tz='UTC'),
+                   float(columns['Open'][row]), float(columns['High'][row]),
+                   float(columns['Low'][row]), float(columns['Close'][row]),
+                   float(columns['Volume'][row]))
+
+    def _rows(self, lo, hi):
+        if hi <= lo:
+            return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], tz='UTC'))
+        index = pd.to_datetime(np.asarray(self.timestamps[lo:hi]), unit='ns', utc=True)
+        columns = self.store.columns
+        return pd.DataFrame({name: np.asarray(columns[name][lo:hi]) for name in OHLCV_COLUMNS},
+                            index=index)
@@ -0,0 +1,271 @@
+# utils/ohlcv_store.py
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+class OHLCVStore:
+    """
+    Append-only columnar store for OHLCV bars.
+
+    Each column is a flat binary file (int64 epoch-ns timestamps, float64
+    prices/volume) that is memory-mapped on open, so reopening a long history
+    costs nothing until a range is actually read. header.json holds the row
+    count, the timezone and a block index (first timestamp of every
+    `block_rows` rows) used to find any time range without scanning.
+
+    The header is the commit point and is replaced atomically, last. Bars
+    past its row count are ignored, the newest bar (the one revised in
+    place) is also kept in the header, and a rewrite goes to a new
+    generation of column files. So a crash mid-write leaves the previous
+    state readable. Every store on the same path shares one lock, so
+    threads never read or write it halfway through another write.
+    """
+
+    _locks = {}
+    _locks_guard = threading.Lock()
+
+    COLUMNS = [
+        ('timestamp', '<i8'),
+        ('Open', '<f8'),
+        ('High', '<f8'),
+        ('Low', '<f8'),
+        ('Close', '<f8'),
+        ('Volume', '<f8'),
+    ]
+    HEADER_FILE = 'header.json'
+    VERSION = 1
+
+    def __init__(self, path, block_rows=4096):
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+        with self._locks_guard:
+            self._lock = self._locks.setdefault(os.path.realpath(path), threading.RLock())
+
+        self.header = {
+            'version': self.VERSION,
+            'rows': 0,
+            'tz': 'UTC',
+            'block_rows': block_rows,
+            'block_index': [],
+            'generation': 0,
+            'live': None
+        }
+        self._header_stat = None
+        self._columns = None
+        with self._lock:
+            self._refresh()
+
+    def __len__(self):
+        return self.header['rows']
+
+    @property
+    def columns(self):
+        """
+        Copy-on-write memory maps of every column, trimmed to the stored rows,
+        with the newest bar as committed in the header
+        """
+        with self._lock:
+            self._refresh()
+            if self._columns is None:
+                columns = {}
+                for name, dtype in self.COLUMNS:
+                    if len(self) == 0:
+                        columns[name] = np.empty(0, dtype=dtype)
+                    else:
+                        columns[name] = np.memmap(self._column_path(name), dtype=dtype,
+                                                  mode='c', shape=(len(self),))
+                live = self.header.get('live')
+                if live is not None and len(self):
+                    # Undoes a torn in-place write of the live bar
+                    for (name, _), value in zip(self.COLUMNS, live):
+                        columns[name][-1] = value
+                self._columns = columns
+            return self._columns
+
+    def first_timestamp(self):
+        with self._lock:
+            return self._to_timestamp(self.columns['timestamp'][0]) if len(self) else None
+
+    def last_timestamp(self):
+        with self._lock:
+            return self._to_timestamp(self.columns['timestamp'][-1]) if len(self) else None
+
+    def row_range(self, start=None, end=None):
+        """Returns (lo, hi) rows covering start <= timestamp < end"""
+        with self._lock:
+            self._refresh()
+            lo = self._search(start) if start is not None else 0
+            hi = self._search(end) if end is not None else len(self)
+            return lo, hi
+
+    def arrays(self, start=None, end=None, copy=False):
+        """
+        Returns views of each column for a time range, or copies taken
+        under the lock if `copy` (views of the live bar can change)
+        """
+        with self._lock:
+            lo, hi = self.row_range(start, end)
+            return {name: np.array(column[lo:hi]) if copy else column[lo:hi]
+                    for name, column in self.columns.items()}
+
+    def to_frame(self, start=None, end=None):
+        """Returns the bars in a time range as a DataFrame"""
+        with self._lock:
+            arrays = self.arrays(start, end, copy=True)
+            tz = self.header['tz']
+        index = pd.to_datetime(arrays['timestamp'], unit='ns', utc=True).tz_convert(tz)
+        return pd.DataFrame({name: arrays[name] for name, _ in self.COLUMNS[1:]}, index=index)
+
+    def meta(self, key, default=None):
+        with self._lock:
+            self._refresh()
+            return self.header.get(key, default)
+
+    def set_meta(self, key, value):
+        """Keeps a small JSON value in the header, e.g. what the fetch planner already checked"""
+        with self._lock:
+            self._refresh()
+            self.header[key] = value
+            self._write_header()
+
+    def append(self, data):
+        """
+        Stores bars from a DataFrame. Bars after the last stored one are
+        appended in place and a bar at the last timestamp replaces it (the
+        live bar). Older bars that are already stored are skipped; older bars
+        that are missing force a one-off rewrite to keep the file sorted.
+        """
+        if data is None or data.empty:
+            return
+        with self._lock:
+            self._refresh()
+            self._append(data)
+
+    def _append(self, data):
+        data = data.sort_index()
+        if data.index.tz is None:
+            data = data.tz_localize('UTC')
+        timestamps = self._to_ns(data.index)
+        if len(self) == 0:
+            self.header['tz'] = str(data.index.tz) if data.index.tz is not None else 'UTC'
+            self._write_rows(0, timestamps, data)
+            return
+
+        stored = self.columns['timestamp']
+        last = stored[-1]
+
+        older = timestamps < last
+        if older.any():
+            positions = np.searchsorted(stored, timestamps[older])
+            positions = np.minimum(positions, len(stored) - 1)
+            if (stored[positions] != timestamps[older]).any():
+                self._rewrite(data)
+                return
+
+        newer = ~older
+        if newer.any():
+            start_row = len(self) - 1 if timestamps[newer][0] == last else len(self)
+            self._write_rows(start_row, timestamps[newer], data[newer])
+
+    def _write_rows(self, start_row, timestamps, data, generation=None):
+        # Drop the maps before touching the files
+        self._columns = None
+        if generation is None:
+            generation = self.header.get('generation', 0)
+
+        for name, dtype in self.COLUMNS:
+            values = timestamps if name == 'timestamp' else data[name].to_numpy()
+            values = np.ascontiguousarray(values, dtype=dtype)
+            path = self._column_path(name, generation)
+            mode = 'r+b' if os.path.exists(path) else 'wb'
+            with open(path, mode) as f:
+                f.seek(start_row * values.itemsize)
+                f.write(values.tobytes())
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())  # On disk before the header commits it
+
+        rows = start_row + len(timestamps)
+        block_rows = self.header['block_rows']
+        block_index = self.header['block_index'][:start_row // block_rows]
+        for block_start in range(len(block_index) * block_rows, rows, block_rows):
+            if block_start >= start_row:
+                block_index.append(int(timestamps[block_start - start_row]))
+            else:
+                block_index.append(self.header['block_index'][block_start // block_rows])
+
+        self.header['rows'] = rows
+        self.header['block_index'] = block_index
+        self.header['generation'] = generation
+        self.header['live'] = [int(timestamps[-1])] + [float(data[name].iloc[-1])
+                                                       for name, _ in self.COLUMNS[1:]]
+        self._write_header()
+
+    def _rewrite(self, data):
+        # Written to a new generation of files, the header switches over
+        existing = self.to_frame()
+        combined = pd.concat([existing, data.tz_convert(existing.index.tz)])
+        combined = combined[~combined.index.duplicated(keep='last')].sort_index()
+        old = self.header.get('generation', 0)
+        self._write_rows(0, self._to_ns(combined.index), combined, generation=old + 1)
+        for name, _ in self.COLUMNS:
+            try:
+                os.remove(self._column_path(name, old))
+            except OSError:
+                pass  # Still mapped somewhere (Windows), it is ignored from now on
+
+    def _search(self, when):
+        target = self._to_ns(pd.DatetimeIndex([pd.Timestamp(when)]))[0]
+        block_rows = self.header['block_rows']
+
+        # The header index narrows the search down to a single block
+        block = np.searchsorted(self.header['block_index'], target, side='right') - 1
+        if block < 0:
+            return 0
+        lo = block * block_rows
+        hi = min(lo + block_rows, len(self))
+        return lo + int(np.searchsorted(self.columns['timestamp'][lo:hi], target))
+
+    def _refresh(self):
+        # Picks up writes made through another store on the same path
+        header_path = os.path.join(self.path, self.HEADER_FILE)
+        try:
+            stat = os.stat(header_path)
+        except FileNotFoundError:
+            return
+        if (stat.st_mtime_ns, stat.st_size, stat.st_ino) != self._header_stat:
+            with open(header_path, 'r') as f:
+                self.header = json.load(f)
+            self._header_stat = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            self._columns = None
+
+    def _write_header(self):
+        header_path = os.path.join(self.path, self.HEADER_FILE)
+        tmp_path = header_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.header, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, header_path)
+        stat = os.stat(header_path)
+        self._header_stat = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _column_path(self, name, generation=None):
+        if generation is None:
+            generation = self.header.get('generation', 0)
+        suffix = f'.{generation}' if generation else ''  # Generation 0 keeps the original names
+        return os.path.join(self.path, f'{name.lower()}{suffix}.bin')
+
+    def _to_timestamp(self, value):
+        return pd.Timestamp(int(value), unit='ns', tz='UTC').tz_convert(self.header['tz'])
+
+    @staticmethod
+    def _to_ns(index):
+        index = pd.DatetimeIndex(index)
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+        return index.tz_convert('UTC').as_unit('ns').asi8
@@ -0,0 +1,113 @@
+# utils/order_engine.py
+import heapq
+import itertools
+
+
+class Order:
+    def __init__(self, order_id, side, kind, price, quantity):
+        self.id = order_id
+        self.side = side  # 'buy' or 'sell'
+        self.kind = kind  # 'limit' or 'stop'
+        self.price = price
+        self.quantity = quantity
+        self.status = 'open'
+        self.fill_price = None
+        self.filled_at = None
+
+    def __repr__(self):
+        return f"Order({self.id}, {self.side} {self.kind} {self.quantity} @ {self.price}, {self.status})"
+
+
+class OrderEngine:
+    """
+    Resting limit and stop orders, one heap per side and kind, ordered so
+    the order closest to being triggered is always on top:
+
+        buy limit   fills when price falls to it   -> max-heap on price
+        sell limit  fills when price rises to it   -> min-heap on price
+        buy stop    triggers when price rises to it -> min-heap on price
+        sell stop   triggers when price falls to it -> max-heap on price
+
+    A bar only pops orders whose price it crossed, so processing it costs
+    O(log n) per fill plus one peek per heap. Cancelled orders are dropped
+    lazily when they reach the top.
+    """
+
+    def __init__(self, on_fill=None):
+        self.on_fill = on_fill
+        self.orders = {}  # Resting orders by id
+        self._heaps = {
+            ('buy', 'limit'): [],
+            ('sell', 'limit'): [],
+            ('buy', 'stop'): [],
+            ('sell', 'stop'): [],
+        }
+        self._ids = itertools.count(1)
+        self._sequence = itertools.count()  # Keeps time priority between equal prices
+
+    def place(self, side, kind, price, quantity):
+        if side not in ('buy', 'sell') or kind not in ('limit', 'stop'):
+            raise ValueError(f"Unknown order type: {side} {kind}")
+        if price <= 0 or quantity <= 0:
+            raise ValueError("Price and quantity must be positive")
+
+        order = Order(next(self._ids), side, kind, price, quantity)
+        self.orders[order.id] = order
+        entry = (self._key(side, kind, price), next(self._sequence), order)
+        heapq.heappush(self._heaps[(side, kind)], entry)
+        return order
+
+    def cancel(self, order_id):
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return False
+        order.status = 'cancelled'
+        return True
+
+    def process_tick(self, price, timestamp=None):
+        return self.process_bar(price, price, price, timestamp)
+
+    def process_bar(self, high, low, open_=None, timestamp=None):
+        """
+        Fills every order the bar's range crossed. If the bar opened beyond
+        an order's price (a gap) the order fills at the open instead.
+        Returns the filled orders.
+        """
+        filled = []
+        filled += self._trigger(('buy', 'limit'), lambda price: low <= price,
+                                lambda price: min(price, open_) if open_ is not None else price)
+        filled += self._trigger(('sell', 'limit'), lambda price: high >= price,
+                                lambda price: max(price, open_) if open_ is not None else price)
+        filled += self._trigger(('buy', 'stop'), lambda price: high >= price,
+                                lambda price: max(price, open_) if open_ is not None else price)
+        filled += self._trigger(('sell', 'stop'), lambda price: low <= price,
+                                lambda price: min(price, open_) if open_ is not None else price)
+
+        for order in filled:
+            order.filled_at = timestamp
+            if self.on_fill is not None:
+                self.on_fill(order)
+        return filled
+
+    def _trigger(self, book, crossed, fill_price):
+        heap = self._heaps[book]
+        filled = []
+        while heap:
+            order = heap[0][2]
+            if order.status != 'open':
+                heapq.heappop(heap)  # Cancelled earlier
+                continue
+            if not crossed(order.price):
+                break
+            heapq.heappop(heap)
+            del self.orders[order.id]
+            order.status = 'filled'
+            order.fill_price = fill_price(order.price)
+            filled.append(order)
+        return filled
+
+    @staticmethod
+    def _key(side, kind, price):
+        # heapq is a min-heap, so negate the books that want the highest price first
+        highest_first = (side, kind) in (('buy', 'limit'), ('sell', 'stop'))
+        return -price if highest_first else price
@@ -0,0 +1,284 @@
+# utils/portfolio.py
+
+
+class Position:
+    """An isolated-margin leveraged position"""
+
+    def __init__(self, position_id, side, quantity, entry_price, leverage, maintenance_margin):
+        self.id = position_id
+        self.side = side  # 'long' or 'short'
+        self.quantity = quantity
+        self.entry_price = entry_price
+        self.leverage = leverage
+        self.margin = quantity * entry_price / leverage
+
+        # Solved once at open so each tick is a single comparison:
+        # liquidated when margin + unrealized PnL <= maintenance_margin * notional
+        if side == 'long':
+            self.liquidation_price = entry_price * (1 - 1 / leverage) / (1 - maintenance_margin)
+        else:
+            self.liquidation_price = entry_price * (1 + 1 / leverage) / (1 + maintenance_margin)
+
+    @property
+    def direction(self):
+        return 1 if self.side == 'long' else -1
+
+    def unrealized_pnl(self, price):
+        return (price - self.entry_price) * self.quantity * self.direction
+
+    def is_liquidated(self, high, low):
+        if self.side == 'long':
+            return low <= self.liquidation_price
+        return high >= self.liquidation_price
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'side': self.side,
+            'quantity': self.quantity,
+            'entry_price': self.entry_price,
+            'leverage': self.leverage
+        }
+
+
+class Ledger:
+    """
+    Cash, spot holdings and leveraged positions for one player.
+
+    Equity is kept from running totals (net signed quantity and signed
+    entry value across positions), so a price tick costs O(1) for equity plus
+    one liquidation comparison per position. Nothing is recomputed from the
+    trade history. on_equity_change is only called when the rounded equity
+    actually changes.
+
+    Every change to the saved state (deposits, trades, liquidations) is an
+    event dict passed to on_event after it's applied, and replay() applies
+    logged events to a restored state. Replaying a snapshot's events gives
+    back exactly the same ledger.
+    """
+
+    TRADE_EVENTS = ('spot_buy', 'spot_sell', 'open_position', 'close_position', 'liquidation')
+
+    def __init__(self, cash, spot_quantity=0.0, spot_cost=0.0, realized_pnl=0.0,
+                 maintenance_margin=0.005, on_equity_change=None, on_liquidation=None,
+                 on_event=None):
+        self.cash = cash
+        self.spot_quantity = spot_quantity
+        self.spot_cost = spot_cost  # Total paid for the spot holdings, for average cost
+        self.realized_pnl = realized_pnl
+        self.maintenance_margin = maintenance_margin
+        self.on_equity_change = on_equity_change
+        self.on_liquidation = on_liquidation
+        self.on_event = on_event
+
+        self.positions = {}
+        self.next_position_id = 1
+        self._total_margin = 0.0
+        self._net_quantity = 0.0  # Sum of direction * quantity
+        self._net_entry_value = 0.0  # Sum of direction * quantity * entry price
+
+        self.price = None
+        self.equity = cash
+        self._displayed_equity = None
+
+    def deposit(self, amount):
+        self._record({'type': 'deposit', 'amount': amount})
+        self._refresh(self.price)
+
+    # Spot trading
+
+    def buy_spot(self, quantity, price, fee=0.0):
+        if quantity * price + fee > self.cash + 1e-9:
+            raise ValueError("Not enough money")
+        self._record({'type': 'spot_buy', 'quantity': quantity, 'price': price, 'fee': fee})
+        self._refresh(price)
+
+    def sell_spot(self, quantity, price, fee=0.0):
+        if quantity > self.spot_quantity + 1e-12:
+            raise ValueError("Not enough BTC")
+        self._record({'type': 'spot_sell', 'quantity': quantity, 'price': price, 'fee': fee})
+        self._refresh(price)
+
+    # Resting orders, shared by the game's sessions and the backtester
+
+    def check_order(self, side, price, quantity):
+        """Raises ValueError if the funds for a resting order aren't there when it's placed"""
+        if side == 'buy' and price * quantity > self.cash:
+            raise ValueError("Not enough money for this order.")
+        if side == 'sell' and quantity > self.spot_quantity:
+            raise ValueError("Not enough BTC for this order.")
+
+    def fill_order(self, order, fee=0.0):
+        """
+        Books a filled order as a spot trade at its fill price. Other fills may
+        have used the funds since it was placed, then it's rejected instead.
+        """
+        try:
+            if order.side == 'buy':
+                self.buy_spot(order.quantity, order.fill_price, fee)
+            else:
+                self.sell_spot(order.quantity, order.fill_price, fee)
+        except ValueError:
+            order.status = 'rejected'
+        return order.status == 'filled'
+
+    # Leveraged positions
+
+    def open_position(self, side, quantity, price, leverage=1):
+        if side not in ('long', 'short'):
+            raise ValueError(f"Unknown side: {side}")
+        if quantity * price / leverage > self.cash + 1e-9:
+            raise ValueError("Not enough money for margin")
+
+        position_id = self.next_position_id
+        self._record({'type': 'open_position', 'id': position_id, 'side': side,
+                      'quantity': quantity, 'price': price, 'leverage': leverage})
+        self._refresh(price)
+        return self.positions[position_id]
+
+    def close_position(self, position_id, price):
+        pnl = self.positions[position_id].unrealized_pnl(price)
+        self._record({'type': 'close_position', 'id': position_id, 'price': price})
+        self._refresh(price)
+        return pnl
+
+    # Market updates
+
+    def on_price(self, price):
+        return self.on_bar(price, price, price)
+
+    def on_bar(self, high, low, close):
+        """Liquidates positions the bar's range reached, then marks equity at the close"""
+        liquidated = [position for position in self.positions.values()
+                      if position.is_liquidated(high, low)]
+        for position in liquidated:
+            self._record({'type': 'liquidation', 'id': position.id,
+                          'price': position.liquidation_price})
+            if self.on_liquidation is not None:
+                self.on_liquidation(position)
+
+        self._refresh(close)
+        return liquidated
+
+    def refresh_display(self):
+        """Reports the equity to on_equity_change again, e.g. after another ledger was shown"""
+        self._displayed_equity = None
+        self._refresh(self.price)
+
+    def unrealized_pnl(self, price=None):
+        price = self.price if price is None else price
+        if price is None:
+            return 0.0
+        return self._net_quantity * price - self._net_entry_value
+
+    # Events
+
+    def replay(self, events):
+        """Applies logged events without notifying anyone, e.g. on top of a snapshot"""
+        for event in events:
+            self._apply(event)
+            if event['type'] in self.TRADE_EVENTS:
+                self.price = event['price']
+        self.equity = self._equity(self.price)
+
+    def _record(self, event):
+        self._apply(event)
+        if self.on_event is not None:
+            self.on_event(event)
+
+    def _apply(self, event):
+        kind = event['type']
+        if kind == 'deposit':
+            self.cash += event['amount']
+
+        elif kind == 'spot_buy':
+            cost = event['quantity'] * event['price']
+            self.cash -= cost + event.get('fee', 0.0)
+            self.realized_pnl -= event.get('fee', 0.0)
+            self.spot_quantity += event['quantity']
+            self.spot_cost += cost
+
+        elif kind == 'spot_sell':
+            quantity, price = event['quantity'], event['price']
+            average_cost = self.spot_cost / self.spot_quantity
+            self.cash += quantity * price - event.get('fee', 0.0)
+            self.realized_pnl += (price - average_cost) * quantity - event.get('fee', 0.0)
+            self.spot_cost -= average_cost * quantity
+            self.spot_quantity -= quantity
+            if self.spot_quantity <= 1e-12:
+                self.spot_quantity = self.spot_cost = 0.0
+
+        elif kind == 'open_position':
+            position = Position(event['id'], event['side'], event['quantity'], event['price'],
+                                event['leverage'], self.maintenance_margin)
+            self.cash -= position.margin
+            self._add(position)
+
+        elif kind == 'close_position':
+            position = self.positions[event['id']]
+            pnl = position.unrealized_pnl(event['price'])
+            self._remove(position)
+            self.cash += position.margin + pnl
+            self.realized_pnl += pnl
+
+        elif kind == 'liquidation':
+            # The whole isolated margin is lost
+            position = self.positions[event['id']]
+            self._remove(position)
+            self.realized_pnl -= position.margin
+
+        # Anything else (order placed, cancelled...) is only kept for the record
+
+    def _equity(self, price):
+        if price is None:
+            # Nothing to mark at yet, value spot holdings at cost
+            return self.cash + self.spot_cost + self._total_margin
+        return (self.cash + self.spot_quantity * price + self._total_margin
+                + self.unrealized_pnl(price))
+
+    def _refresh(self, price):
+        self.price = price
+        self.equity = self._equity(price)
+
+        displayed = round(self.equity, 2)
+        if displayed != self._displayed_equity:
+            self._displayed_equity = displayed
+            if self.on_equity_change is not None:
+                self.on_equity_change(displayed)
+
+    def _add(self, position):
+        self.positions[position.id] = position
+        self.next_position_id = max(self.next_position_id, position.id + 1)
+        self._total_margin += position.margin
+        self._net_quantity += position.direction * position.quantity
+        self._net_entry_value += position.direction * position.quantity * position.entry_price
+
+    def _remove(self, position):
+        del self.positions[position.id]
+        self._total_margin -= position.margin
+        self._net_quantity -= position.direction * position.quantity
+        self._net_entry_value -= position.direction * position.quantity * position.entry_price
+
+    # Save data
+
+    def to_dict(self):
+        return {
+            'money': self.cash,
+            'btc': self.spot_quantity,
+            'btc_cost': self.spot_cost,
+            'realized_pnl': self.realized_pnl,
+            'positions': [position.to_dict() for position in self.positions.values()],
+            'next_position_id': self.next_position_id
+        }
+
+    @classmethod
+    def from_dict(cls, data, **kwargs):
+        ledger = cls(data.get('money', 0.0), data.get('btc', 0.0), data.get('btc_cost', 0.0),
+                     data.get('realized_pnl', 0.0), **kwargs)
+        for saved in data.get('positions', []):
+            position = Position(saved['id'], saved['side'], saved['quantity'],
+                                saved['entry_price'], saved['leverage'], ledger.maintenance_margin)
+            ledger._add(position)
+        ledger.next_position_id = max(ledger.next_position_id, data.get('next_position_id', 1))
+        ledger.equity = ledger._equity(None)
+        return ledger
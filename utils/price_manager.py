@@ -1,111 +1,427 @@
 # utils/price_manager.py
-import yfinance as yf
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import timedelta
+import itertools
 import os
+import threading
+import time
+from utils.market_data import YahooDataSource
+from utils.live_feed import LiveFeed
+from utils.ohlcv_store import OHLCVStore
+from utils.fetch_planner import FetchPlanner
+from utils.candle_pyramid import CandlePyramid, FIELDS
+from utils.candle_store import CandleArray, COLUMNS, frame_arrays
+from utils.indicators import IndicatorSet
+
+# Unique across managers, so a revision also tells which manager it came from
+_revisions = itertools.count(1)
+
+
+def _mark_changed(changed, timeframes, ts):
+    """Lowers changed[timeframe] to epoch-ns ts for each of timeframes"""
+    for timeframe in timeframes:
+        if changed.get(timeframe) is None or ts < changed[timeframe]:
+            changed[timeframe] = ts
+
 
 class PriceManager:
-    def __init__(self):
-        self.symbol = "BTC-USD"
-        self.raw_data = None
+    def __init__(self, source=None, data_dir='data', persist=True, symbol="BTC-USD", price_dtype='float64'):
+        self.symbol = symbol
+        self.source = source or YahooDataSource()
+        self.persist = persist  # False for replays, which must not write to the store
+
+        # The 30m bars live in contiguous arrays, raw_data is a DataFrame of them
+        # built on demand. _unsaved_from is the earliest bar not yet in the store.
+        self.candles = CandleArray(price_dtype)
+        self.revision = next(_revisions)  # Changes when any bar but the newest one does
+        self.tz = 'UTC'
+        self._unsaved_from = None
         self.timeframes = {
             '30m': 30,
             '1h': 60,
             '4h': 240,
-            '1d': 1440
+            '1d': 1440,
+            '1w': 10080
         }
-        self.data_dir = 'data'
+        self.data_dir = data_dir
         os.makedirs(self.data_dir, exist_ok=True)
         self.last_price = None
         self.current_price = None
         self.update_interval = 30  # 30 seconds to avoid rate limits
+        self.history_days = 60  # How far back fetch_historical_data fills in
+        self.save_interval = 300  # Seconds between writes of live bars, save_data() flushes
+        self._saved_at = None  # time.monotonic() of the last save
+        self.store = OHLCVStore(os.path.join(self.data_dir, f'{self.symbol}_30m'))
 
-    def fetch_historical_data(self):
+        # Every timeframe above 30m lives in one pyramid of arrays. _pyramid_dirty_from
+        # is the earliest epoch-ns timestamp changed since it was synced ('all' = rebuild).
+        # _candle_cache holds (DataFrame, its columns) per timeframe, the frames handed
+        # out, and _frames_changed_from what changed in them since (see _cached_frame).
+        self.pyramid = CandlePyramid({tf: minutes for tf, minutes in self.timeframes.items()
+                                      if tf != '30m'})
+        self._pyramid_dirty_from = 'all'
+        self._candle_cache = {}
+        self._frames_changed_from = {}
+        self._indicators = {}  # timeframe -> IndicatorSet, updated as candles change
+        self._indicators_changed_from = {}  # timeframe -> earliest epoch-ns changed since its sync
+
+        # Live updates can land from a worker thread while the chart reads candles.
+        # _store_lock keeps this manager's saves and loads in order without making
+        # the chart wait on disk I/O.
+        self._lock = threading.RLock()
+        self._store_lock = threading.Lock()
+        self.live_feed = LiveFeed(self, self.source, clock=self.source.now)
+        self.planner = FetchPlanner(self.source, self.symbol, checked=self.store.meta('checked'))
+
+    @property
+    def raw_data(self):
         """
-        Fetches 60 days of historical data for Bitcoin (Yahoo's limit for 30m data)
-        Returns DataFrame with OHLCV data
+        The 30m bars as a DataFrame, None before any data. Cached like the
+        other timeframes: revising the newest bars writes just those rows into
+        it in place, only a new bar makes it build a new one, so reading it
+        every tick is cheap. Copy it if you need it to stay fixed.
         """
-        try:
-            btc = yf.Ticker(self.symbol)
-            # Get 60 days of 30-minute data (Yahoo's limit)
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=60)
+        with self._lock:
+            if not len(self.candles):
+                return None
+            return self._cached_frame('30m', self.candles.arrays())
 
-            self.raw_data = btc.history(
-                start=start_date,
-                end=end_date,
-                interval="30m"
-            )
+    def has_data(self):
+        return len(self.candles) > 0
 
-            # Clean the data
-            self.raw_data = self.raw_data[['Open', 'High', 'Low', 'Close', 'Volume']]
-            self.raw_data = self.raw_data.dropna()
+    def last_timestamp(self):
+        """Start of the newest 30m bar, None before any data"""
+        with self._lock:
+            last = self.candles.last('timestamp')
+        return None if last is None else pd.Timestamp(int(last), unit='ns', tz='UTC').tz_convert(self.tz)
 
-            # Ensure index is datetime
-            self.raw_data.index = pd.to_datetime(self.raw_data.index)
+    def fetch_historical_data(self):
+        """
+        Fills in the last 60 days of 30m data (Yahoo's limit for 30m data).
+        Only the ranges missing from the candles are requested, so a warm start
+        costs one small request instead of the whole window.
+        """
+        try:
+            end_date = self.source.now()
+            start_date = end_date - timedelta(days=self.history_days)
 
-            print(f"Fetched {len(self.raw_data)} data points")
-            return True
+            with self._lock:
+                index = self.candles.index(self.tz)
+            checked = list(self.planner.checked)
+            data = self.planner.fetch(index, start_date, end_date)
+            self._save_checked(checked)
+
+            if data is not None:
+                self.merge_bars(data)
+                print(f"Fetched {len(data)} data points")
+            return self.has_data() and not self.planner.failed
 
         except Exception as e:
             print(f"Error fetching data: {e}")
             return False
 
+    def missing_history(self, end_date):
+        """
+        The ranges of the history window up to end_date that fetch_historical_data
+        would request, for fetching them elsewhere, e.g. batched with other symbols
+        """
+        with self._lock:
+            index = self.candles.index(self.tz)
+        return self.planner.missing_intervals(index, end_date - timedelta(days=self.history_days), end_date)
+
+    def fill_history(self, intervals, frames, end_date, failed=()):
+        """
+        Merges bars fetched for the missing_history() intervals and remembers
+        the holes they didn't fill. `failed` are the requests that gave up.
+        """
+        checked = list(self.planner.checked)
+        self.planner.failed = list(failed)
+        self.planner.remember_holes(intervals, frames, end_date)
+        self._save_checked(checked)
+        frames = [frame for frame in frames if frame is not None and not frame.empty]
+        if frames:
+            data = pd.concat(frames)
+            self.merge_bars(data[~data.index.duplicated(keep='last')].sort_index())
+
+    def _save_checked(self, checked):
+        if self.persist and self.planner.checked != checked:
+            self.store.set_meta('checked', self.planner.checked)
+
     def get_candles(self, timeframe):
         """
         Returns OHLCV data for specified timeframe
-        timeframe: '30m', '1h', '4h', or '1d'
+        timeframe: '30m', '1h', '4h', '1d' or '1w'
+        While only the newest candles change the same DataFrame is returned
+        and updated in place, copy it if you need it to stay fixed.
         """
         if timeframe not in self.timeframes:
             raise ValueError(f"Invalid timeframe. Must be one of {list(self.timeframes.keys())}")
 
-        if self.raw_data is None:
+        if not self.has_data():
             raise ValueError("No data available. Call fetch_historical_data first.")
 
         # For 30m, just return the raw data
         if timeframe == '30m':
             return self.raw_data
 
-        # For other timeframes, resample the data
-        minutes = self.timeframes[timeframe]
-        resampled = self.raw_data.resample(f'{minutes}min').agg({
-            'Open': 'first',
-            'High': 'max',
-            'Low': 'min',
-            'Close': 'last',
-            'Volume': 'sum'
-        })
+        with self._lock:
+            if timeframe in self._candle_cache and timeframe not in self._frames_changed_from:
+                return self._candle_cache[timeframe][0]
+            self._sync_pyramid()
+            return self._cached_frame(timeframe, self.pyramid.levels[timeframe])
+
+    def _cached_frame(self, timeframe, arrays):
+        # The frame is built over its own copies of the columns. If no row was
+        # added or removed since it was handed out, only the rows from the
+        # bucket holding the first change on are written into them, so a live
+        # update costs a few rows instead of the whole history
+        cached = self._candle_cache.get(timeframe)
+        changed_from = self._frames_changed_from.pop(timeframe, None)
+        ts = arrays['timestamp']
+        if cached is not None:
+            frame, columns = cached
+            if changed_from is None:
+                return frame
+            if len(ts) == len(frame):
+                lo = max(int(np.searchsorted(ts, changed_from, side='right')) - 1, 0)
+                if np.array_equal(columns['timestamp'][lo:], ts[lo:]):
+                    for field in COLUMNS:
+                        columns[field][lo:] = arrays[field][lo:]
+                    return frame
+
+        columns = {field: values.copy() for field, values in arrays.items()}
+        index = pd.to_datetime(columns['timestamp'], unit='ns', utc=True).tz_convert(self.tz)
+        frame = pd.DataFrame({column: columns[field] for field, column in COLUMNS.items()},
+                             index=index, copy=False)
+        self._candle_cache[timeframe] = (frame, columns)
+        return frame
+
+    def _sync_pyramid(self):
+        dirty_from = self._pyramid_dirty_from
+        if dirty_from is None:
+            return
+
+        if dirty_from == 'all':
+            self.pyramid.build(self.candles.arrays())
+        else:
+            # Only the buckets holding the first changed bar and later can differ
+            start = self.candles.search(self.pyramid.rebuild_start(dirty_from))
+            self.pyramid.update(self.candles.arrays(start), dirty_from)
+        self._pyramid_dirty_from = None
+
+    def merge_bars(self, bars):
+        """
+        Merges new or updated 30m bars (a DataFrame) into the candles.
+        Rows with an existing timestamp replace the old bar.
+        """
+        if bars is None or bars.empty:
+            return
+        with self._lock:
+            if not self.has_data() and bars.index.tz is not None:
+                self.tz = str(bars.index.tz)
+            self.merge_arrays(frame_arrays(bars))
+
+    def merge_arrays(self, rows):
+        """merge_bars() for bars already in arrays (epoch-ns UTC timestamps, see FIELDS)"""
+        complete = ~(np.isnan(rows['open']) | np.isnan(rows['high']) | np.isnan(rows['low'])
+                     | np.isnan(rows['close']) | np.isnan(rows['volume']))
+        if not complete.all():
+            rows = {field: values[complete] for field, values in rows.items()}
 
-        return resampled.dropna()
+        with self._lock:
+            was_empty = not self.has_data()
+            last = self.candles.last('timestamp')
+            first_new = self.candles.merge(rows)
+            if first_new is None:
+                return
+            if last is not None and first_new < last:
+                self.revision = next(_revisions)  # A closed bar changed
+
+            if self._unsaved_from is None or first_new < self._unsaved_from:
+                self._unsaved_from = first_new
+            if was_empty:
+                self._clear_candle_cache()
+                return
+
+            _mark_changed(self._frames_changed_from, self._candle_cache, first_new)
+            _mark_changed(self._indicators_changed_from, self._indicators, first_new)
+            if self._pyramid_dirty_from is None or (self._pyramid_dirty_from != 'all'
+                                                    and first_new < self._pyramid_dirty_from):
+                self._pyramid_dirty_from = first_new
+
+    def _clear_candle_cache(self):
+        self.revision = next(_revisions)
+        self._candle_cache.clear()
+        self._frames_changed_from = {}
+        self._pyramid_dirty_from = 'all'
+        self._indicators = {}  # Reseeded, the same timestamps may hold other bars now
+        self._indicators_changed_from = {}
+
+    def get_indicators(self, timeframe):
+        """Returns {name: array} of indicator values aligned with get_candles(timeframe)"""
+        with self._lock:
+            candles = self.get_candles(timeframe)
+            indicators = self._indicators.get(timeframe)
+            if indicators is None:
+                indicators = self._indicators[timeframe] = IndicatorSet()
+            return indicators.sync(candles, self._indicators_changed_from.pop(timeframe, None))
+
+    @property
+    def display_name(self):
+        """'BTC-USD' -> 'BTC/USD', for titles"""
+        return self.symbol.replace('-', '/')
+
+    def memory_usage(self):
+        """Bytes held in memory for this symbol, the store on disk not included"""
+        with self._lock:
+            total = self.pyramid.nbytes + self.candles.nbytes
+            for candles, _ in self._candle_cache.values():
+                total += int(candles.memory_usage(index=True).sum())
+            return total
+
+    def unload(self):
+        """Saves and frees the in-memory data, load_data() brings it back from the store"""
+        try:
+            self.save_data()
+        except Exception as e:
+            print(f"Error saving data: {e}")
+            return  # Kept until a save works, the bars aren't anywhere else
+        with self._lock:
+            self.candles.clear()
+            self._unsaved_from = None
+            self.pyramid.clear()
+            self._clear_candle_cache()
 
     def get_latest_price(self):
         """Returns the most recent closing price"""
-        if self.raw_data is None:
-            raise ValueError("No data available. Call fetch_historical_data first.")
-        return self.raw_data['Close'].iloc[-1]
+        with self._lock:
+            if not self.has_data():
+                raise ValueError("No data available. Call fetch_historical_data first.")
+            return self.candles.last('close')
 
     def save_data(self):
-        """Saves the data to a file to avoid frequent API calls"""
-        if self.raw_data is not None:
-            filepath = os.path.join(self.data_dir, 'btc_price_history.pkl')
-            self.raw_data.to_pickle(filepath)
+        """Appends new or changed bars to the on-disk store to avoid frequent API calls"""
+        if not self.persist:
+            return
+        with self._store_lock:
+            with self._lock:
+                unsaved_from = self._unsaved_from
+                if unsaved_from is None:
+                    return
+                bars = self.candles.to_frame(self.tz, lo=self.candles.search(unsaved_from))
+                self._unsaved_from = None
+            try:
+                self.store.append(bars)
+                self._saved_at = time.monotonic()
+            except Exception:
+                with self._lock:
+                    # Try again with the next save
+                    if self._unsaved_from is None or unsaved_from < self._unsaved_from:
+                        self._unsaved_from = unsaved_from
+                raise
 
-    def load_data(self):
-        """Loads the data from file if available"""
+    def load_data(self, days=None):
+        """
+        Loads the last `days` of stored bars (history_days if None, 'all'
+        for everything, e.g. for backtests). Older bars stay on disk until
+        the chart scrolls back to them, see load_older(). Returns True if any
+        data was available, use is_stale() to check whether it needs topping up.
+        """
         try:
-            filepath = os.path.join(self.data_dir, 'btc_price_history.pkl')
-            self.raw_data = pd.read_pickle(filepath)
+            with self._store_lock:
+                if len(self.store) == 0:
+                    self._import_legacy_pickle()
+                if len(self.store) == 0:
+                    return False
+
+                start = None
+                if days != 'all':
+                    days = self.history_days if days is None else days
+                    start = self.store.last_timestamp() - timedelta(days=days)
+                columns = self.store.arrays(start)
+                with self._lock:
+                    pending = None
+                    if self._unsaved_from is not None:
+                        # Bars merged since the last save must survive the reload
+                        lo = self.candles.search(self._unsaved_from)
+                        pending = {field: values.copy() for field, values in self.candles.arrays(lo).items()}
+
+                    # Copied out of the memory maps, in the store's column order. The
+                    # candles are merged into in place and may be float32, and a
+                    # rewrite of the store removes the files the maps point at
+                    self.candles.load({field: column for field, column in zip(FIELDS, columns.values())})
+                    self.tz = self.store.header['tz']
+                    self._unsaved_from = None
+                    self._clear_candle_cache()
+                    if pending is not None:
+                        self.merge_arrays(pending)
+            return True
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            return False
 
-            # Ensure index is datetime
-            self.raw_data.index = pd.to_datetime(self.raw_data.index)
+    def load_older(self, start):
+        """
+        Pages the stored bars from `start` up to the first loaded one in from
+        the store, for when the chart scrolls back past what load_data()
+        brought in. Returns True if any bars were added. Gives up right away
+        if a save holds the store, the next scroll asks again.
+        """
+        if not self._store_lock.acquire(blocking=False):
+            return False
+        try:
+            with self._lock:
+                if not len(self.candles):
+                    return False
+                first = int(self.candles.timestamps[0])
+            stored = self.store.first_timestamp()
+            if stored is None or stored.value >= first:
+                return False  # Nothing older on disk
 
-            # Check if data is outdated (more than 1 hour old)
-            last_timestamp = self.raw_data.index[-1]
-            if datetime.now() - last_timestamp > timedelta(hours=1):
+            # The block index finds the range without touching the rest of the store
+            end = pd.Timestamp(first, unit='ns', tz='UTC')
+            columns = self.store.arrays(pd.Timestamp(start), end, copy=True)
+            if not len(columns['timestamp']):
                 return False
+            with self._lock:
+                unsaved_from = self._unsaved_from
+                self.merge_arrays({field: column for field, column in zip(FIELDS, columns.values())})
+                self._unsaved_from = unsaved_from  # They came from the store
             return True
-        except:
+        except Exception as e:
+            print(f"Error loading older data: {e}")
             return False
+        finally:
+            self._store_lock.release()
+
+    def is_stale(self, max_age=timedelta(hours=1)):
+        """Returns True if there is no data or the newest bar is older than max_age"""
+        if not self.has_data():
+            return True
+        return self.source.now() - self.last_timestamp() > max_age
+
+    def load_history(self):
+        """Loads stored history and only goes to the network if it is missing or stale"""
+        if (self.has_data() or self.load_data()) and not self.is_stale():
+            return True  # Already in memory, e.g. loaded by the warm-up
+        self.fetch_historical_data()
+        self.save_data()
+        return self.has_data()
+
+    def _import_legacy_pickle(self):
+        # One-off migration from the old whole-file pickle cache, which only had Bitcoin
+        if self.symbol != "BTC-USD":
+            return
+        filepath = os.path.join(self.data_dir, 'btc_price_history.pkl')
+        if os.path.exists(filepath):
+            data = pd.read_pickle(filepath)
+            data.index = pd.to_datetime(data.index)
+            self.store.append(data)
+
+    def next_update_delay(self):
+        """Seconds until the next poll: when the next bar is due, but no sooner than update_interval"""
+        return max(self.update_interval, self.live_feed.next_poll_delay())
 
     def get_price_change(self):
         """Returns tuple of (price, is_increase)"""
@@ -113,15 +429,25 @@ class PriceManager:
             return (self.current_price, None)
         return (self.current_price, self.current_price > self.last_price)
 
-    def update_current_price(self):
-        """Updates current price and returns True if successful"""
+    def update_current_price(self, bars=None):
+        """
+        Updates current price and returns True if successful. `bars` are 1m
+        bars already fetched from live_feed.start_time() on, polled if None.
+        """
         try:
-            btc = yf.Ticker(self.symbol)
-            new_price = btc.history(period='1d', interval='1m').iloc[-1]['Close']
+            # Only bars newer than the last one seen are requested
+            arrived = self.live_feed.poll() if bars is None else self.live_feed.ingest(bars)
+            if not arrived:
+                return self.current_price is not None
 
-            self.last_price = self.current_price
-            self.current_price = new_price
-            return True
+            # Each save is an fsync and a header rewrite, so live bars go out
+            # every save_interval; unload() and Watchlist.shutdown() flush the rest
+            if self._saved_at is None or time.monotonic() - self._saved_at >= self.save_interval:
+                self.save_data()
+            if self.live_feed.last_price != self.current_price:
+                self.last_price = self.current_price
+                self.current_price = self.live_feed.last_price
+            return self.current_price is not None
         except Exception as e:
             print(f"Error updating price: {e}")
             return False
@@ -1,45 +1,192 @@
 import json
 import os
+import sqlite3
+import time
+from contextlib import closing
 
 
 class SaveManager:
-    SAVE_FILE = "saves.json"
-    MAX_SAVES = 3
+    """
+    Save slots in a SQLite database. Every value in a save's `data` dict is
+    its own row, so saving only rewrites the keys passed in and each save is
+    one transaction: a crash can't leave a slot (or any other slot) half
+    written. The `slots` table is a small index that the save screen lists
+    without loading any game state.
+
+    Balances and positions are event sourced: every deposit, trade and order
+    is appended to the slot's `events`, and `snapshots` hold the derived
+    state every so often. Loading reads the latest snapshot plus the events
+    after it, and any earlier state can be rebuilt the same way.
+    """
+    DB_FILE = "saves.db"
+    SAVE_FILE = "saves.json"  # Old format, imported once
+    STARTING_MONEY = 100  # Recorded as the save's first deposit
+    DEFAULT_DATA = {
+        # Add other initial game state here
+    }
+
+    _schema_ready = set()
 
     @staticmethod
-    def load_saves():
+    def _connect():
+        # Short-lived connections, so background threads can save safely
+        conn = sqlite3.connect(SaveManager.DB_FILE, timeout=10)
+        if SaveManager.DB_FILE not in SaveManager._schema_ready:
+            SaveManager._create_schema(conn)
+            SaveManager._schema_ready.add(SaveManager.DB_FILE)
+        return conn
+
+    @staticmethod
+    def _create_schema(conn):
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS slots (
+                    slot INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    updated REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS slot_data (
+                    slot INTEGER NOT NULL REFERENCES slots(slot) ON DELETE CASCADE,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (slot, key)
+                );
+                CREATE TABLE IF NOT EXISTS events (
+                    slot INTEGER NOT NULL REFERENCES slots(slot) ON DELETE CASCADE,
+                    seq INTEGER NOT NULL,
+                    time REAL NOT NULL,
+                    event TEXT NOT NULL,
+                    PRIMARY KEY (slot, seq)
+                );
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    slot INTEGER NOT NULL REFERENCES slots(slot) ON DELETE CASCADE,
+                    seq INTEGER NOT NULL,
+                    state TEXT NOT NULL,
+                    PRIMARY KEY (slot, seq)
+                );
+            """)
+        SaveManager._import_json(conn)
+
+    @staticmethod
+    def _import_json(conn):
+        """Moves saves from the old saves.json file into the database"""
         if not os.path.exists(SaveManager.SAVE_FILE):
-            # Create default empty saves
-            default_saves = {
-                f"save_{i + 1}": {"name": None, "data": None}
-                for i in range(SaveManager.MAX_SAVES)
-            }
-            SaveManager.save_data(default_saves)
-            return default_saves
+            return
+        if conn.execute("SELECT COUNT(*) FROM slots").fetchone()[0]:
+            return
+
+        try:
+            with open(SaveManager.SAVE_FILE, 'r') as f:
+                saves = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not import {SaveManager.SAVE_FILE}: {e}")
+            return
+
+        with conn:
+            for key, save in saves.items():
+                if save.get("name") is None:
+                    continue  # Empty slot
+                slot = save.get("slot") or int(key.split("_")[-1])
+                SaveManager._write(conn, slot, save["name"], save.get("data") or {})
+        os.replace(SaveManager.SAVE_FILE, SaveManager.SAVE_FILE + ".imported")
 
-        with open(SaveManager.SAVE_FILE, 'r') as f:
-            return json.load(f)
+    @staticmethod
+    def _write(conn, slot, name, data):
+        conn.execute(
+            "INSERT INTO slots (slot, name, updated) VALUES (?, ?, ?) "
+            "ON CONFLICT(slot) DO UPDATE SET name = excluded.name, updated = excluded.updated",
+            (slot, name, time.time())
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO slot_data (slot, key, value) VALUES (?, ?, ?)",
+            [(slot, key, json.dumps(value)) for key, value in data.items()]
+        )
 
     @staticmethod
-    def save_data(data):
-        with open(SaveManager.SAVE_FILE, 'w') as f:
-            json.dump(data, f, indent=4)
+    def list_saves():
+        """Returns [{'slot', 'name', 'updated'}, ...] without loading any save data"""
+        with closing(SaveManager._connect()) as conn:
+            rows = conn.execute("SELECT slot, name, updated FROM slots ORDER BY slot").fetchall()
+        return [{"slot": slot, "name": name, "updated": updated} for slot, name, updated in rows]
 
     @staticmethod
-    def create_new_save(slot, player_name):
-        saves = SaveManager.load_saves()
-        saves[f"save_{slot}"] = {
-            "name": player_name,
-            "slot": slot,  # Add this line
-            "data": {
-                "money": 100,
-                # Add other initial game state here
+    def load_save(slot):
+        """Returns the full save for a slot, or None if it doesn't exist"""
+        with closing(SaveManager._connect()) as conn:
+            row = conn.execute("SELECT name FROM slots WHERE slot = ?", (slot,)).fetchone()
+            if row is None:
+                return None
+            data = conn.execute("SELECT key, value FROM slot_data WHERE slot = ?", (slot,))
+            return {
+                "name": row[0],
+                "slot": slot,
+                "data": {key: json.loads(value) for key, value in data}
             }
-        }
-        SaveManager.save_data(saves)
 
     @staticmethod
-    def update_save(slot, save_data):
-        saves = SaveManager.load_saves()
-        saves[f"save_{slot}"] = save_data
-        SaveManager.save_data(saves)
\ No newline at end of file
+    def create_new_save(player_name):
+        """Creates a save in the next free slot and returns the slot number"""
+        with closing(SaveManager._connect()) as conn, conn:
+            slot = conn.execute("SELECT COALESCE(MAX(slot), 0) + 1 FROM slots").fetchone()[0]
+            SaveManager._write(conn, slot, player_name, SaveManager.DEFAULT_DATA)
+            SaveManager._append(conn, slot, [
+                {"type": "deposit", "amount": SaveManager.STARTING_MONEY, "time": time.time()}
+            ])
+        return slot
+
+    @staticmethod
+    def update_save(slot, save_data, keys=None):
+        """Writes a save in one transaction, only the given data keys if any are given"""
+        data = save_data["data"]
+        if keys is not None:
+            data = {key: data[key] for key in keys if key in data}
+        with closing(SaveManager._connect()) as conn, conn:
+            SaveManager._write(conn, slot, save_data["name"], data)
+
+    @staticmethod
+    def _append(conn, slot, events):
+        """Appends events after the slot's last one and returns the last sequence number"""
+        seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM events WHERE slot = ?",
+                           (slot,)).fetchone()[0]
+        conn.executemany(
+            "INSERT INTO events (slot, seq, time, event) VALUES (?, ?, ?, ?)",
+            [(slot, seq + i, event.get("time", time.time()), json.dumps(event))
+             for i, event in enumerate(events, 1)]
+        )
+        return seq + len(events)
+
+    @staticmethod
+    def append_events(slot, events, snapshot=None):
+        """
+        Appends events to a slot's log in one transaction. A snapshot, if
+        given, is the state after all of them.
+        """
+        with closing(SaveManager._connect()) as conn, conn:
+            seq = SaveManager._append(conn, slot, events)
+            if snapshot is not None:
+                conn.execute("INSERT OR REPLACE INTO snapshots (slot, seq, state) VALUES (?, ?, ?)",
+                             (slot, seq, json.dumps(snapshot)))
+            conn.execute("UPDATE slots SET updated = ? WHERE slot = ?", (time.time(), slot))
+        return seq
+
+    @staticmethod
+    def load_state(slot, until=None):
+        """
+        Returns (snapshot, events) to rebuild a slot's state as of event
+        `until` (default: the latest). snapshot is None if there is none
+        yet, in which case the events apply to the save's data.
+        """
+        until = until if until is not None else 2 ** 62
+        with closing(SaveManager._connect()) as conn:
+            row = conn.execute(
+                "SELECT seq, state FROM snapshots WHERE slot = ? AND seq <= ? "
+                "ORDER BY seq DESC LIMIT 1", (slot, until)
+            ).fetchone()
+            seq, snapshot = (row[0], json.loads(row[1])) if row else (0, None)
+            rows = conn.execute(
+                "SELECT seq, event FROM events WHERE slot = ? AND seq > ? AND seq <= ? ORDER BY seq",
+                (slot, seq, until)
+            )
+            events = [dict(json.loads(event), seq=event_seq) for event_seq, event in rows]
+        return snapshot, events
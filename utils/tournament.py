@@ -0,0 +1,250 @@
+# utils/tournament.py
+import argparse
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from utils.backtester import EventBacktester
+from utils.save_manager import SaveManager
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class SharedCandles:
+    """
+    Candle arrays in one shared memory block: row 0 holds the timestamps
+    (int64 ns), the rest OHLCV. Worker processes attach by name and build
+    their DataFrame on views of the block, so the history is never pickled
+    or copied per worker.
+    """
+
+    def __init__(self, shm, length, owner):
+        self.shm = shm
+        self.length = length
+        self.owner = owner
+        self.block = np.ndarray((len(COLUMNS) + 1, length), dtype=np.float64, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, candles):
+        length = len(candles)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, (len(COLUMNS) + 1) * length * 8))
+        shared = cls(shm, length, owner=True)
+        shared.block[0].view(np.int64)[:] = candles.index.as_unit('ns').asi8
+        for row, column in enumerate(COLUMNS, 1):
+            shared.block[row] = candles[column].to_numpy(dtype=float)
+        return shared
+
+    @classmethod
+    def attach(cls, spec):
+        name, length = spec
+        return cls(shared_memory.SharedMemory(name=name), length, owner=False)
+
+    @property
+    def spec(self):
+        """What a worker needs to attach, cheap to pickle"""
+        return self.shm.name, self.length
+
+    def frame(self):
+        index = pd.DatetimeIndex(self.block[0].view(np.int64), tz='UTC')
+        return pd.DataFrame({column: self.block[row] for row, column in enumerate(COLUMNS, 1)},
+                            index=index, copy=False)
+
+    def close(self):
+        self.block = None  # Views must go before the block can be closed
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# Scripted bots. Each is a picklable callable taking the EventContext of
+# every bar, and gets a fresh copy of itself in the worker that runs it.
+
+class HodlBot:
+    """Buys everything on the first bar and never sells"""
+
+    def __call__(self, context):
+        if context.i == 0:
+            context.buy(context.ledger.cash / context.price)
+
+
+class SmaCrossBot:
+    """Spot trend follower: all in while the fast SMA is above the slow one"""
+
+    def __init__(self, fast=20, slow=50):
+        self.fast = fast
+        self.slow = slow
+
+    def __call__(self, context):
+        fast, slow = context.bt.sma(self.fast)[context.i], context.bt.sma(self.slow)[context.i]
+        ledger = context.ledger
+        if fast > slow and ledger.spot_quantity == 0:
+            context.buy(ledger.cash / (context.price * (1 + context.bt.fee_rate)))
+        elif not fast > slow and ledger.spot_quantity > 0:
+            context.sell(ledger.spot_quantity)
+
+
+class DipBuyerBot:
+    """Rests a limit buy `dip` below the close and takes profit with a limit sell"""
+
+    def __init__(self, dip=0.02, take_profit=0.03):
+        self.dip = dip
+        self.take_profit = take_profit
+        self.order = None
+
+    def __call__(self, context):
+        ledger = context.ledger
+        if self.order is not None and self.order.status == 'open':
+            return
+        if ledger.spot_quantity > 0:
+            price = ledger.spot_cost / ledger.spot_quantity * (1 + self.take_profit)
+            self.order = context.place('sell', 'limit', price, ledger.spot_quantity)
+        elif ledger.cash > 0:
+            price = context.price * (1 - self.dip)
+            quantity = ledger.cash / (price * (1 + context.bt.fee_rate))
+            self.order = context.place('buy', 'limit', price, quantity)
+
+
+class MomentumBot:
+    """Opens a leveraged long or short on RSI extremes and closes at the midline"""
+
+    def __init__(self, leverage=3, period=14, lower=30, upper=70):
+        self.leverage = leverage
+        self.period = period
+        self.lower = lower
+        self.upper = upper
+
+    def __call__(self, context):
+        rsi = context.bt.rsi(self.period)[context.i]
+        ledger = context.ledger
+        if ledger.positions:
+            position = next(iter(ledger.positions.values()))
+            if (position.side == 'long') != (rsi > 50):
+                context.close_positions()
+        elif rsi > self.upper or rsi < self.lower:
+            side = 'long' if rsi > self.upper else 'short'
+            margin = ledger.cash * 0.5
+            context.open_position(side, margin * self.leverage / context.price, self.leverage)
+
+
+def default_bots():
+    return {
+        'HODL': HodlBot(),
+        'SMA 20/50': SmaCrossBot(20, 50),
+        'SMA 50/200': SmaCrossBot(50, 200),
+        'Dip buyer 2%': DipBuyerBot(0.02, 0.03),
+        'Dip buyer 5%': DipBuyerBot(0.05, 0.05),
+        'Momentum 3x': MomentumBot(3),
+        'Momentum 10x': MomentumBot(10),
+    }
+
+
+# Worker side: attach once per process, then run bots against the views
+
+_worker = {}
+
+
+def _init_worker(spec, bar_minutes, fee_rate, initial_cash):
+    shared = SharedCandles.attach(spec)
+    _worker['shared'] = shared
+    _worker['backtester'] = EventBacktester(shared.frame(), bar_minutes, fee_rate, initial_cash)
+
+
+def _run_bot(name, bot):
+    try:
+        summary = _worker['backtester'].run(bot).summary()
+        summary['pnl'] = summary['final_equity'] - _worker['backtester'].bt.initial_cash
+        return name, summary
+    except Exception as e:
+        return name, {'error': f"{type(e).__name__}: {e}"}
+
+
+class Tournament:
+    """
+    Runs bots against the same candles on a pool of worker processes and
+    ranks them. Every bot trades through the game's OrderEngine and Ledger
+    (EventBacktester), with the same funds checks and fill booking as a
+    Session, starting with a new save's money and no fees, so a result is
+    what a player would get making the same trades in GameScreen.
+    """
+
+    def __init__(self, candles, bots=None, bar_minutes=30, fee_rate=0.0,
+                 initial_cash=SaveManager.STARTING_MONEY, workers=None):
+        self.candles = candles
+        self.bots = bots if bots is not None else default_bots()
+        self.bar_minutes = bar_minutes
+        self.fee_rate = fee_rate
+        self.initial_cash = initial_cash
+        self.workers = workers or os.cpu_count() or 1
+
+    @classmethod
+    def from_price_manager(cls, price_manager, timeframe='30m', **kwargs):
+        # A copy, the manager updates its frames in place as live bars arrive
+        return cls(price_manager.get_candles(timeframe).copy(),
+                   bar_minutes=price_manager.timeframes[timeframe], **kwargs)
+
+    def run(self):
+        """Returns the leaderboard, best PnL first"""
+        shared = SharedCandles.create(self.candles)
+        try:
+            init_args = (shared.spec, self.bar_minutes, self.fee_rate, self.initial_cash)
+            workers = min(self.workers, len(self.bots))
+            if workers <= 1:
+                _init_worker(*init_args)
+                try:
+                    results = [_run_bot(name, copy.deepcopy(bot)) for name, bot in self.bots.items()]
+                finally:
+                    _worker.pop('backtester')
+                    _worker.pop('shared').close()
+            else:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=init_args) as executor:
+                    futures = [executor.submit(_run_bot, name, bot) for name, bot in self.bots.items()]
+                    results = [future.result() for future in as_completed(futures)]
+        finally:
+            shared.close()
+
+        return self._leaderboard(results)
+
+    def _leaderboard(self, results):
+        rows = []
+        for name, summary in results:
+            if 'error' in summary:
+                print(f"Bot {name} failed: {summary['error']}")
+                continue
+            rows.append(dict(bot=name, **summary))
+
+        columns = ['bot', 'pnl', 'total_return', 'max_drawdown', 'sharpe', 'trades',
+                   'liquidations', 'final_equity']
+        table = pd.DataFrame(rows, columns=columns)
+        table = table.sort_values('pnl', ascending=False, ignore_index=True)
+        table.index += 1  # Rank
+        return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the trading bots against stored price history")
+    parser.add_argument('--symbol', default='BTC-USD')
+    parser.add_argument('--timeframe', default='30m')
+    parser.add_argument('--days', type=int, default=None, help="Only the last N days of history")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--data-dir', default='data')
+    args = parser.parse_args()
+
+    from utils.price_manager import PriceManager
+    price_manager = PriceManager(data_dir=args.data_dir, symbol=args.symbol)
+    if not price_manager.load_data(args.days or 'all'):
+        print(f"No stored history for {args.symbol} in {args.data_dir}, play a game first")
+        return
+
+    tournament = Tournament.from_price_manager(price_manager, args.timeframe, workers=args.workers)
+    leaderboard = tournament.run()
+    print(f"{args.symbol} {args.timeframe}, {len(tournament.candles):,} candles")
+    print(leaderboard.to_string(float_format=lambda value: f"{value:,.4f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# utils/warmup.py
+import importlib
+import threading
+
+
+class Warmup:
+    """
+    Does the slow parts of entering the game on a background thread while
+    the menus are up: imports `modules`, calls build() and then
+    preload(built), e.g. to load price history. get() hands over what
+    build() made as soon as it's ready, without waiting for the preload.
+    Nothing run here may touch Tk.
+    """
+
+    def __init__(self, modules, build, preload=None):
+        self.modules = modules
+        self.build = build
+        self.preload = preload
+        self._result = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='warmup', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def get(self):
+        """Waits for build(). None if it failed, so the caller can fall back"""
+        if not self._thread.is_alive() and not self._ready.is_set():
+            return None  # Never started
+        self._ready.wait()
+        return self._result
+
+    def _run(self):
+        try:
+            for module in self.modules:
+                importlib.import_module(module)
+            self._result = self.build()
+        except Exception as e:
+            print(f"Error warming up: {e}")
+        finally:
+            self._ready.set()
+
+        if self._result is not None and self.preload is not None:
+            try:
+                self.preload(self._result)
+            except Exception as e:
+                print(f"Error preloading: {e}")
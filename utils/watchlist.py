@@ -0,0 +1,197 @@
+# utils/watchlist.py
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from utils.market_data import YahooDataSource
+from utils.price_manager import PriceManager
+
+DEFAULT_WATCHLIST = ['BTC-USD', 'ETH-USD', 'SOL-USD', 'XRP-USD', 'DOGE-USD']
+
+
+class Watchlist:
+    """
+    One PriceManager per symbol, all sharing a data source. History and live
+    prices are fetched for up to `batch_size` symbols per request on at most
+    `max_workers` threads, and a symbol that is already being fetched is
+    joined rather than requested again, whichever screen asks.
+
+    Each symbol keeps its bars in its own store on disk. The in-memory data
+    is dropped least recently used first once the watchlist goes over
+    `memory_budget` bytes; pinned symbols (the one on the chart) are kept.
+    """
+
+    def __init__(self, symbols=DEFAULT_WATCHLIST, source=None, data_dir='data',
+                 memory_budget=256 * 2**20, batch_size=10, max_workers=4):
+        self.symbols = list(symbols)
+        self.source = source or YahooDataSource()
+        self.data_dir = data_dir
+        self.memory_budget = memory_budget
+        self.batch_size = batch_size
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='watchlist')
+        self.managers = OrderedDict()  # symbol -> PriceManager, least recently used first
+        self.pinned = set()
+        self._inflight = {}  # symbol -> (kind, future of the batch fetching it)
+        self._lock = threading.RLock()
+
+    def get(self, symbol):
+        """Returns the symbol's PriceManager and marks it as the most recently used"""
+        with self._lock:
+            manager = self.managers.get(symbol)
+            if manager is None:
+                manager = PriceManager(source=self.source, data_dir=self.data_dir, symbol=symbol)
+                self.managers[symbol] = manager
+            self.managers.move_to_end(symbol)
+            return manager
+
+    def pin(self, symbol):
+        self.pinned.add(symbol)
+
+    def unpin(self, symbol):
+        self.pinned.discard(symbol)
+
+    def load(self, symbols=None):
+        """
+        Loads stored history and tops up stale symbols. Blocks, so run it off
+        the Tk thread. Returns {symbol: True if it has data}.
+        """
+        results = self._run_batched('history', symbols or self.symbols, self._load_batch)
+        self.enforce_budget()
+        return results
+
+    def refresh_prices(self, symbols=None):
+        """
+        Fetches new 1m bars for pinned symbols and those in memory (or the given ones).
+        Blocks. Returns {symbol: True if it has a current price}.
+        """
+        if symbols is None:
+            with self._lock:
+                symbols = [symbol for symbol, manager in self.managers.items()
+                           if manager.has_data() or symbol in self.pinned]
+        return self._run_batched('prices', symbols, self._refresh_batch)
+
+    def memory_usage(self):
+        with self._lock:
+            managers = list(self.managers.values())
+        return sum(manager.memory_usage() for manager in managers)
+
+    def enforce_budget(self):
+        """Unloads least recently used symbols until the watchlist fits its budget"""
+        with self._lock:
+            managers = list(self.managers.values())
+        usage = {manager.symbol: manager.memory_usage() for manager in managers}
+        total = sum(usage.values())
+        for manager in managers:
+            if total <= self.memory_budget:
+                break
+            if manager.symbol in self.pinned or not manager.has_data():
+                continue
+            manager.unload()
+            total -= usage[manager.symbol]
+
+    def save_all(self):
+        """Writes the bars every symbol got since its last save"""
+        with self._lock:
+            managers = list(self.managers.values())
+        for manager in managers:
+            try:
+                manager.save_data()
+            except Exception as e:
+                print(f"Error saving {manager.symbol}: {e}")
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.save_all()
+
+    def _run_batched(self, kind, symbols, func):
+        """
+        Runs func(batch) for symbols not already in flight and waits for every
+        symbol. A symbol being fetched for the same kind is joined; one being
+        fetched for the other kind (history vs prices) is waited for first,
+        so a symbol's manager is never updated by two fetches at once.
+        """
+        results = {}
+        waiting = list(dict.fromkeys(symbols))
+        while waiting:
+            futures = {}
+            busy = {}
+            with self._lock:
+                todo = []
+                for symbol in waiting:
+                    running_kind, future = self._inflight.get(symbol, (None, None))
+                    if future is None:
+                        todo.append(symbol)
+                    elif running_kind == kind:
+                        futures[symbol] = future  # Someone else is fetching it already
+                    else:
+                        busy[symbol] = future
+
+                for i in range(0, len(todo), self.batch_size):
+                    batch = todo[i:i + self.batch_size]
+                    future = self.executor.submit(func, batch)
+                    for symbol in batch:
+                        self._inflight[symbol] = (kind, future)
+                        futures[symbol] = future
+                    future.add_done_callback(lambda done, batch=batch: self._finished(batch, done))
+
+            for symbol, future in futures.items():
+                results[symbol] = future.result().get(symbol, False)
+            wait(busy.values())
+            waiting = list(busy)
+        return results
+
+    def _finished(self, symbols, future):
+        with self._lock:
+            for symbol in symbols:
+                if self._inflight.get(symbol, (None, None))[1] is future:
+                    del self._inflight[symbol]
+
+    def _peek(self, symbol):
+        # Like get() but background refreshes don't count as use
+        with self._lock:
+            manager = self.managers.get(symbol)
+        return manager if manager is not None else self.get(symbol)
+
+    def _load_batch(self, symbols):
+        try:
+            managers = [self._peek(symbol) for symbol in symbols]
+            stale = [manager for manager in managers
+                     if (not manager.has_data() and not manager.load_data()) or manager.is_stale()]
+            if stale:
+                # Each symbol's planner says what it lacks; overlapping ranges,
+                # usually the tails since the last bar, go out as one request
+                end = self.source.now()
+                missing = {manager.symbol: manager.missing_history(end) for manager in stale}
+                planner = stale[0].planner  # Every planner has the same limits and retries
+                frames = {symbol: [] for symbol in missing}
+                failed = {symbol: [] for symbol in missing}
+                for n, (start, stop, batch) in enumerate(planner.group(missing)):
+                    fetch = lambda start, stop, batch=batch: self.source.history_many(
+                        batch, start, stop, interval=planner.interval)
+                    data = planner.request(n, start, stop, fetch)
+                    for symbol in batch:
+                        if data is None:
+                            failed[symbol].append((start, stop))
+                        elif data.get(symbol) is not None:
+                            frames[symbol].append(data[symbol])
+                for manager in stale:
+                    manager.fill_history(missing[manager.symbol], frames[manager.symbol], end,
+                                         failed[manager.symbol])
+                    manager.save_data()
+            return {manager.symbol: manager.has_data() for manager in managers}
+        except Exception as e:
+            print(f"Error loading {', '.join(symbols)}: {e}")
+            return {}
+
+    def _refresh_batch(self, symbols):
+        try:
+            managers = [self._peek(symbol) for symbol in symbols]
+            since = {manager.symbol: manager.live_feed.start_time() for manager in managers}
+            frames = self.source.bars_since_many(since)
+            return {manager.symbol: manager.update_current_price(frames.get(manager.symbol, pd.DataFrame()))
+                    for manager in managers}
+        except Exception as e:
+            print(f"Error updating prices for {', '.join(symbols)}: {e}")
+            return {}